@@ -0,0 +1,554 @@
+"""
+Offline benchmark suite for the feedback parsers and commit loops.
+
+Micro-benchmarks each parser, then drains synthetic problem and toptask
+backlogs through problem_commit and top_task_survey_commit, reporting
+messages/sec and p50/p99 latency.
+
+Backends:
+- fake: in-process SQS and MongoDB stand-ins (no Docker required)
+- local: ElasticMQ and MongoDB started by start-local-mock-infrastructure.sh
+
+Usage:
+    python benchmark.py
+    python benchmark.py --backend local --messages 5000
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+# Defaults match template.yaml so the local backend works out of the box
+os.environ.setdefault("ENVIRONMENT", "local")
+os.environ.setdefault("AWS_DEFAULT_REGION", "ca-central-1")
+os.environ.setdefault(
+    "PROBLEM_QUEUE_URL", "http://localhost:9324/000000000000/problem-queue"
+)
+os.environ.setdefault(
+    "TOPTASK_QUEUE_URL", "http://localhost:9324/000000000000/toptask-queue"
+)
+os.environ.setdefault("MONGO_URL", "localhost")
+os.environ.setdefault("MONGO_USERNAME", "admin")
+os.environ.setdefault("MONGO_PASSWORD", "password")
+
+import synthetic_messages  # noqa: E402
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the pct-th percentile of samples (nearest rank)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(name: str, count: int, elapsed_s: float, latencies_ms: List[float]) -> Dict[str, Any]:
+    """Build a result row for the report."""
+    return {
+        "name": name,
+        "count": count,
+        "elapsed_s": round(elapsed_s, 4),
+        "msgs_per_sec": round(count / elapsed_s, 1) if elapsed_s > 0 else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 4),
+        "p99_ms": round(percentile(latencies_ms, 99), 4),
+    }
+
+
+# ============================================
+# In-process stand-ins
+# ============================================
+
+
+class FakeSQS:
+    """Minimal in-memory SQS supporting the calls made by the commit Lambdas."""
+
+    def __init__(self, visibility_timeout: int = 300):
+        self.visibility_timeout = visibility_timeout
+        self._queues: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def _queue(self, url: str) -> Dict[str, Dict[str, Any]]:
+        return self._queues.setdefault(url, {})
+
+    def send_message(self, QueueUrl: str, MessageBody: str, **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            message_id = str(next(self._ids))
+            self._queue(QueueUrl)[message_id] = {
+                "Body": MessageBody,
+                "visible_at": 0.0,
+                "receipt": None,
+                "receive_count": 0,
+            }
+        return {"MessageId": message_id}
+
+    def send_message_batch(self, QueueUrl: str, Entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        successful = []
+        for entry in Entries:
+            response = self.send_message(QueueUrl, entry["MessageBody"])
+            successful.append({"Id": entry["Id"], "MessageId": response["MessageId"]})
+        return {"Successful": successful, "Failed": []}
+
+    def receive_message(
+        self,
+        QueueUrl: str,
+        MaxNumberOfMessages: int = 1,
+        VisibilityTimeout: Optional[int] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        now = time.monotonic()
+        timeout = self.visibility_timeout if VisibilityTimeout is None else VisibilityTimeout
+        messages = []
+        with self._lock:
+            for message_id, message in self._queue(QueueUrl).items():
+                if message["visible_at"] > now:
+                    continue
+                message["receipt"] = f"{message_id}-{next(self._ids)}"
+                message["visible_at"] = now + timeout
+                message["receive_count"] += 1
+                messages.append(
+                    {
+                        "MessageId": message_id,
+                        "ReceiptHandle": message["receipt"],
+                        "Body": message["Body"],
+                        "Attributes": {
+                            "ApproximateReceiveCount": str(message["receive_count"])
+                        },
+                    }
+                )
+                if len(messages) >= MaxNumberOfMessages:
+                    break
+        return {"Messages": messages} if messages else {}
+
+    def _find(self, url: str, receipt_handle: str) -> Optional[str]:
+        message_id = receipt_handle.split("-", 1)[0]
+        message = self._queue(url).get(message_id)
+        if message and message["receipt"] == receipt_handle:
+            return message_id
+        return None
+
+    def delete_message(self, QueueUrl: str, ReceiptHandle: str) -> Dict[str, Any]:
+        with self._lock:
+            message_id = self._find(QueueUrl, ReceiptHandle)
+            if message_id:
+                del self._queue(QueueUrl)[message_id]
+        return {}
+
+    def delete_message_batch(self, QueueUrl: str, Entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        for entry in Entries:
+            self.delete_message(QueueUrl, entry["ReceiptHandle"])
+        return {"Successful": [{"Id": e["Id"]} for e in Entries], "Failed": []}
+
+    def change_message_visibility(
+        self, QueueUrl: str, ReceiptHandle: str, VisibilityTimeout: int
+    ) -> Dict[str, Any]:
+        with self._lock:
+            message_id = self._find(QueueUrl, ReceiptHandle)
+            if message_id:
+                self._queue(QueueUrl)[message_id]["visible_at"] = (
+                    time.monotonic() + VisibilityTimeout
+                )
+        return {}
+
+    def change_message_visibility_batch(
+        self, QueueUrl: str, Entries: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        for entry in Entries:
+            self.change_message_visibility(
+                QueueUrl, entry["ReceiptHandle"], entry["VisibilityTimeout"]
+            )
+        return {"Successful": [{"Id": e["Id"]} for e in Entries], "Failed": []}
+
+    def get_queue_attributes(self, QueueUrl: str, AttributeNames: List[str]) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            queue = list(self._queue(QueueUrl).values())
+        visible = sum(1 for m in queue if m["visible_at"] <= now)
+        return {
+            "Attributes": {
+                "ApproximateNumberOfMessages": str(visible),
+                "ApproximateNumberOfMessagesNotVisible": str(len(queue) - visible),
+            }
+        }
+
+    def purge_queue(self, QueueUrl: str) -> Dict[str, Any]:
+        with self._lock:
+            self._queue(QueueUrl).clear()
+        return {}
+
+
+class FakeInsertResult:
+    def __init__(self, inserted_id=None, inserted_ids=None):
+        self.inserted_id = inserted_id
+        self.inserted_ids = inserted_ids or []
+
+
+class FakeCollection:
+    """Append-only collection stand-in recording inserted documents."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.documents: List[Dict[str, Any]] = []
+        self._ids = itertools.count(1)
+
+    def insert_one(self, document: Dict[str, Any], **kwargs) -> FakeInsertResult:
+        document.setdefault("_id", next(self._ids))
+        self.documents.append(document)
+        return FakeInsertResult(inserted_id=document["_id"])
+
+    def insert_many(self, documents: List[Dict[str, Any]], **kwargs) -> FakeInsertResult:
+        ids = [self.insert_one(document).inserted_id for document in documents]
+        return FakeInsertResult(inserted_ids=ids)
+
+    def bulk_write(self, requests: List[Any], **kwargs) -> None:
+        self.documents.extend(requests)
+
+    def count_documents(self, filter: Dict[str, Any]) -> int:
+        return len(self.documents)
+
+    def index_information(self) -> Dict[str, Any]:
+        return {"_id_": {"key": [("_id", 1)]}}
+
+    def create_indexes(self, indexes: List[Any]) -> List[str]:
+        return [index.document["name"] for index in indexes]
+
+
+class FakeDatabase:
+    """Database stand-in that creates collections on first access."""
+
+    def __init__(self):
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return self._collections.setdefault(name, FakeCollection(name))
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+
+class TimingSQS:
+    """
+    Proxy around an SQS client that records receive→delete latency per message
+    and counts empty receives.
+    """
+
+    def __init__(self, client: Any):
+        self._client = client
+        self._received: Dict[str, float] = {}
+        self.latencies_ms: List[float] = []
+        self.receive_calls = 0
+        self.empty_receives = 0
+
+    def receive_message(self, **kwargs) -> Dict[str, Any]:
+        response = self._client.receive_message(**kwargs)
+        now = time.perf_counter()
+        messages = response.get("Messages", [])
+        self.receive_calls += 1
+        if not messages:
+            self.empty_receives += 1
+        for message in messages:
+            self._received[message["ReceiptHandle"]] = now
+        return response
+
+    def _record(self, receipt_handle: str) -> None:
+        started = self._received.pop(receipt_handle, None)
+        if started is not None:
+            self.latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    def delete_message(self, **kwargs) -> Dict[str, Any]:
+        response = self._client.delete_message(**kwargs)
+        self._record(kwargs["ReceiptHandle"])
+        return response
+
+    def delete_message_batch(self, **kwargs) -> Dict[str, Any]:
+        response = self._client.delete_message_batch(**kwargs)
+        for entry in kwargs["Entries"]:
+            self._record(entry["ReceiptHandle"])
+        return response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+# ============================================
+# Benchmarks
+# ============================================
+
+
+def time_calls(name: str, inputs: List[Any], func: Callable[[Any], Any]) -> Dict[str, Any]:
+    """Call func once per input and summarize per-call latency."""
+    latencies = []
+    start = time.perf_counter()
+    for item in inputs:
+        call_start = time.perf_counter()
+        func(item)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+    return summarize(name, len(inputs), elapsed, latencies)
+
+
+def bench_parsers(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Micro-benchmark every parser on pre-generated messages."""
+    import auto_tagger
+    import pii
+    import schema
+
+    tagger = auto_tagger.Tagger(auto_tagger.read_dictionary(auto_tagger.TAG_KEYWORDS_PATH))
+
+    def parse_delimited(message: str):
+        body = message.replace("<html><body><pre>", "").replace("</pre></body></html>", "")
+        return schema.parse_toptask_delimited(body.split("~!~"))
+
+    return [
+        time_calls(
+            "parse_problem_text (15 fields)",
+            synthetic_messages.generate("problem_widget", count, seed),
+            schema.parse_problem_text,
+        ),
+        time_calls(
+            "parse_problem_text (9 fields)",
+            synthetic_messages.generate("problem_email", count, seed),
+            schema.parse_problem_text,
+        ),
+        time_calls(
+            "pii.scrub_text",
+            [m.split(";")[10] for m in synthetic_messages.generate("problem_widget", count, seed)],
+            pii.scrub_text,
+        ),
+        time_calls(
+            "auto_tagger.tags_for",
+            [m.split(";")[10] for m in synthetic_messages.generate("problem_widget", count, seed)],
+            tagger.tags_for,
+        ),
+        time_calls(
+            "parse_toptask_json",
+            [json.loads(m) for m in synthetic_messages.generate("toptask_json", count, seed)],
+            schema.parse_toptask_json,
+        ),
+        time_calls(
+            "parse_toptask_delimited",
+            synthetic_messages.generate("toptask_delimited", count, seed),
+            parse_delimited,
+        ),
+    ]
+
+
+def seed_queue(sqs: Any, queue_url: str, messages: List[str]) -> None:
+    """Send messages to a queue in batches of 10."""
+    for offset in range(0, len(messages), 10):
+        chunk = messages[offset : offset + 10]
+        sqs.send_message_batch(
+            QueueUrl=queue_url,
+            Entries=[{"Id": str(i), "MessageBody": body} for i, body in enumerate(chunk)],
+        )
+
+
+def bench_drain(
+    name: str,
+    module: Any,
+    messages: List[str],
+    backend: str,
+    fake_sqs: Optional[FakeSQS],
+    max_invocations: int,
+) -> Dict[str, Any]:
+    """Seed a queue, then invoke process_queue_messages until it is drained."""
+    original_sqs = module.sqs
+    client = fake_sqs if backend == "fake" else original_sqs
+    if backend == "local":
+        client.purge_queue(QueueUrl=module.QUEUE_URL)
+    seed_queue(client, module.QUEUE_URL, messages)
+
+    timing = TimingSQS(client)
+    module.sqs = timing
+    processed = 0
+    invocations = 0
+    start = time.perf_counter()
+    try:
+        while invocations < max_invocations:
+            count, _ = module.process_queue_messages()
+            invocations += 1
+            processed += count
+            if count == 0:
+                break
+    finally:
+        module.sqs = original_sqs
+    elapsed = time.perf_counter() - start
+
+    result = summarize(name, processed, elapsed, timing.latencies_ms)
+    result.update(
+        {
+            "seeded": len(messages),
+            "invocations": invocations,
+            "receive_calls": timing.receive_calls,
+            "empty_receives": timing.empty_receives,
+        }
+    )
+    return result
+
+
+def bench_worker_drain(
+    problems: List[str],
+    toptasks: List[str],
+    backend: str,
+    fake_sqs: Optional[FakeSQS],
+    max_invocations: int,
+) -> Dict[str, Any]:
+    """Seed both queues, then invoke the unified commit worker until both are drained."""
+    import commit_worker
+    import problem_commit
+    import top_task_survey_commit
+
+    modules = (problem_commit, top_task_survey_commit)
+    original_clients = [module.sqs for module in modules]
+    client = fake_sqs if backend == "fake" else problem_commit.sqs
+    for module, messages in zip(modules, (problems, toptasks)):
+        if backend == "local":
+            client.purge_queue(QueueUrl=module.QUEUE_URL)
+        seed_queue(client, module.QUEUE_URL, messages)
+
+    timing = TimingSQS(client)
+    for module in modules:
+        module.sqs = timing
+    processed = 0
+    invocations = 0
+    start = time.perf_counter()
+    try:
+        while invocations < max_invocations:
+            response = commit_worker.lambda_handler({}, None)
+            count = json.loads(response["body"]).get("messages_processed", 0)
+            invocations += 1
+            processed += count
+            if count == 0:
+                break
+    finally:
+        for module, original in zip(modules, original_clients):
+            module.sqs = original
+    elapsed = time.perf_counter() - start
+
+    result = summarize("commit_worker drain (both)", processed, elapsed, timing.latencies_ms)
+    result.update(
+        {
+            "seeded": len(problems) + len(toptasks),
+            "invocations": invocations,
+            "receive_calls": timing.receive_calls,
+            "empty_receives": timing.empty_receives,
+        }
+    )
+    return result
+
+
+def bench_drains(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Drain synthetic backlogs through both commit loops."""
+    from db_utils import MongoDBConnection
+    import problem_commit
+    import top_task_survey_commit
+
+    fake_sqs = None
+    if args.backend == "fake":
+        fake_sqs = FakeSQS()
+        MongoDBConnection._database = FakeDatabase()
+
+    rng = random.Random(args.seed)
+    half = args.messages // 2
+    problems = synthetic_messages.generate(
+        "problem_widget", args.messages - half, args.seed
+    ) + synthetic_messages.generate("problem_email", half, args.seed)
+    toptasks = synthetic_messages.generate(
+        "toptask_json", args.messages - half, args.seed
+    ) + synthetic_messages.generate("toptask_delimited", half, args.seed)
+    rng.shuffle(problems)
+    rng.shuffle(toptasks)
+
+    # Separate seed so the dedup caches warmed by the single-queue drains do not drop them
+    worker_problems = synthetic_messages.generate("problem_widget", args.messages, args.seed + 1)
+    worker_toptasks = synthetic_messages.generate("toptask_json", args.messages // 4, args.seed + 1)
+
+    return [
+        bench_drain(
+            "problem_commit drain",
+            problem_commit,
+            problems,
+            args.backend,
+            fake_sqs,
+            args.max_invocations,
+        ),
+        bench_drain(
+            "top_task_survey_commit drain",
+            top_task_survey_commit,
+            toptasks,
+            args.backend,
+            fake_sqs,
+            args.max_invocations,
+        ),
+        bench_worker_drain(
+            worker_problems, worker_toptasks, args.backend, fake_sqs, args.max_invocations
+        ),
+    ]
+
+
+def print_report(title: str, rows: List[Dict[str, Any]]) -> None:
+    """Print benchmark rows as an aligned table."""
+    print(f"\n{title}")
+    print("-" * len(title))
+    print(f"{'benchmark':<34}{'count':>8}{'msgs/sec':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for row in rows:
+        print(
+            f"{row['name']:<34}{row['count']:>8}{row['msgs_per_sec']:>12}"
+            f"{row['p50_ms']:>10}{row['p99_ms']:>10}"
+        )
+        if "invocations" in row:
+            print(
+                f"{'':<4}seeded={row['seeded']} invocations={row['invocations']} "
+                f"receives={row['receive_calls']} empty={row['empty_receives']}"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend", choices=["fake", "local"], default="fake")
+    parser.add_argument("--iterations", type=int, default=5000, help="messages per parser benchmark")
+    parser.add_argument("--messages", type=int, default=1000, help="messages per drain benchmark")
+    parser.add_argument("--max-invocations", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-parsers", action="store_true")
+    parser.add_argument("--skip-drains", action="store_true")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    # Import the Lambda modules first; they set the root logger to INFO
+    import problem_commit  # noqa: F401
+    import top_task_survey_commit  # noqa: F401
+
+    logging.getLogger().setLevel(args.log_level)
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    if not args.skip_parsers:
+        results["parsers"] = bench_parsers(args.iterations, args.seed)
+        print_report("Parser micro-benchmarks", results["parsers"])
+    if not args.skip_drains:
+        results["drains"] = bench_drains(args)
+        print_report(f"Commit loop drains ({args.backend} backend)", results["drains"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""
+Load generator for the ingest Lambda handlers.
+
+Synthesizes (or replays) form submissions and SES/SNS email events and invokes
+queue_problem_form, queue_toptask_survey_form, queue_problem and queue_toptask
+directly, at a configurable rate and concurrency. Reports per-handler latency
+percentiles and samples queue depth over time.
+
+Profiles shape the request rate over the run:
+- steady: constant rate
+- election: short, sharp spikes on top of the base rate
+- tax-season: gradual ramp to 4x the base rate, sustained, then tail-off
+
+Usage:
+    python load_generator.py --rate 50 --duration 60
+    python load_generator.py --backend local --profile tax-season --concurrency 16
+    python load_generator.py --replay events.jsonl --rate 20
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlencode
+
+from benchmark import FakeSQS, percentile
+import synthetic_messages
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+    "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (iPad; CPU OS 16_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:119.0) Gecko/20100101 Firefox/119.0",
+    "",
+]
+
+PAYLOAD_SIZES = {
+    "small": (1, 10),
+    "medium": (10, 80),
+    "large": (80, 400),
+}
+
+TARGETS = ["problem_form", "toptask_form", "problem_email", "toptask_email"]
+
+
+# ============================================
+# Event builders
+# ============================================
+
+
+def api_gateway_event(body: str, user_agent: str, content_type: str) -> Dict[str, Any]:
+    """Wrap a body in an API Gateway proxy event."""
+    return {
+        "httpMethod": "POST",
+        "headers": {"User-Agent": user_agent, "Content-Type": content_type},
+        "body": body,
+        "isBase64Encoded": False,
+    }
+
+
+def sns_email_event(text: str, subtype: str) -> Dict[str, Any]:
+    """Wrap email text in an SES-via-SNS notification event."""
+    mime = MIMEText(text, subtype, "utf-8")
+    mime["Subject"] = "Feedback"
+    mime["From"] = "no-reply@canada.ca"
+    return {
+        "Records": [
+            {
+                "EventSource": "aws:sns",
+                "Sns": {"Message": json.dumps({"content": mime.as_string()})},
+            }
+        ]
+    }
+
+
+def problem_form_event(rng: random.Random, words: Tuple[int, int], user_agent: str) -> Dict[str, Any]:
+    fields = synthetic_messages.problem_widget_message(rng, *words).split(";")
+    form = {
+        "submissionPage": fields[2],
+        "language": fields[3],
+        "oppositelang": fields[4],
+        "pageTitle": fields[5],
+        "institutionopt": fields[6],
+        "themeopt": fields[7],
+        "sectionopt": fields[8],
+        "problem": fields[9],
+        "details": fields[10],
+        "helpful": fields[11],
+        "contact": "",
+    }
+    return api_gateway_event(urlencode(form), user_agent, "application/x-www-form-urlencoded")
+
+
+def toptask_form_event(rng: random.Random, words: Tuple[int, int], user_agent: str) -> Dict[str, Any]:
+    form = synthetic_messages.toptask_fields(rng, *words)
+    return api_gateway_event(urlencode(form), user_agent, "application/x-www-form-urlencoded")
+
+
+def problem_email_event(rng: random.Random, words: Tuple[int, int], user_agent: str) -> Dict[str, Any]:
+    return sns_email_event(synthetic_messages.problem_email_message(rng, *words), "plain")
+
+
+def toptask_email_event(rng: random.Random, words: Tuple[int, int], user_agent: str) -> Dict[str, Any]:
+    return sns_email_event(synthetic_messages.toptask_delimited_message(rng, *words), "html")
+
+
+EVENT_BUILDERS = {
+    "problem_form": problem_form_event,
+    "toptask_form": toptask_form_event,
+    "problem_email": problem_email_event,
+    "toptask_email": toptask_email_event,
+}
+
+
+# ============================================
+# Rate profiles
+# ============================================
+
+
+def rate_multiplier(profile: str, progress: float) -> float:
+    """
+    Return the rate multiplier for a profile at a point in the run.
+
+    Args:
+        profile: steady, election or tax-season
+        progress: Fraction of the run elapsed (0.0 - 1.0)
+
+    Returns:
+        Multiplier applied to the base rate
+    """
+    if profile == "election":
+        # Spikes when results are announced: 10% of the run at 8x, three times
+        for peak in (0.25, 0.55, 0.85):
+            if peak <= progress < peak + 0.1:
+                return 8.0
+        return 1.0
+    if profile == "tax-season":
+        if progress < 0.3:
+            return 1.0 + 3.0 * (progress / 0.3)
+        if progress < 0.8:
+            return 4.0
+        return 4.0 - 3.0 * ((progress - 0.8) / 0.2)
+    return 1.0
+
+
+# ============================================
+# Runner
+# ============================================
+
+
+class LoadStats:
+    """Thread-safe collector for handler latencies and status codes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies_ms: Dict[str, List[float]] = defaultdict(list)
+        self.status_codes: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.depth_samples: List[Tuple[float, Dict[str, int]]] = []
+
+    def record(self, target: str, latency_ms: float, status_code: int) -> None:
+        with self._lock:
+            self.latencies_ms[target].append(latency_ms)
+            self.status_codes[target][status_code] += 1
+
+
+def load_handlers(backend: str) -> Tuple[Dict[str, Any], Dict[str, Tuple[Any, str]]]:
+    """
+    Import the ingest handlers, swapping in a shared fake SQS for the fake backend.
+
+    Returns:
+        Tuple of (handlers by target, (sqs client, queue url) by queue name)
+    """
+    import queue_problem
+    import queue_problem_form
+    import queue_toptask
+    import queue_toptask_survey_form
+
+    modules = {
+        "problem_form": queue_problem_form,
+        "toptask_form": queue_toptask_survey_form,
+        "problem_email": queue_problem,
+        "toptask_email": queue_toptask,
+    }
+
+    if backend == "fake":
+        fake_sqs = FakeSQS()
+        for module in modules.values():
+            module.sqs = fake_sqs
+
+    queues = {
+        "problem-queue": (queue_problem.sqs, queue_problem.QUEUE_URL),
+        "toptask-queue": (queue_toptask.sqs, queue_toptask.QUEUE_URL),
+    }
+    return {target: module.lambda_handler for target, module in modules.items()}, queues
+
+
+def sample_depths(queues: Dict[str, Tuple[Any, str]]) -> Dict[str, int]:
+    """Read ApproximateNumberOfMessages for each queue."""
+    depths = {}
+    for name, (client, url) in queues.items():
+        try:
+            attributes = client.get_queue_attributes(
+                QueueUrl=url, AttributeNames=["ApproximateNumberOfMessages"]
+            )["Attributes"]
+            depths[name] = int(attributes.get("ApproximateNumberOfMessages", 0))
+        except Exception:
+            depths[name] = -1
+    return depths
+
+
+def read_replay(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Read a JSONL file of {"target": ..., "event": {...}} lines."""
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                events.append((record["target"], record["event"]))
+    return events
+
+
+def run(args: argparse.Namespace) -> LoadStats:
+    handlers, queues = load_handlers(args.backend)
+    logging.getLogger().setLevel(args.log_level)
+
+    rng = random.Random(args.seed)
+    weights = [args.mix[target] for target in TARGETS]
+    sizes = list(PAYLOAD_SIZES.values())
+    size_weights = [args.size_mix[name] for name in PAYLOAD_SIZES]
+    replay = read_replay(args.replay) if args.replay else None
+
+    stats = LoadStats()
+    stop = threading.Event()
+    run_start = time.monotonic()
+
+    def sampler():
+        while not stop.is_set():
+            stats.depth_samples.append((time.monotonic() - run_start, sample_depths(queues)))
+            stop.wait(args.sample_interval)
+
+    def invoke(target: str, event: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        try:
+            status_code = handlers[target](event, None).get("statusCode", 0)
+        except Exception:
+            status_code = -1
+        stats.record(target, (time.perf_counter() - start) * 1000, status_code)
+
+    sampler_thread = threading.Thread(target=sampler, daemon=True)
+    sampler_thread.start()
+
+    sent = 0
+    next_send = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        while True:
+            elapsed = time.monotonic() - run_start
+            if elapsed >= args.duration or (args.count and sent >= args.count):
+                break
+            if replay is not None:
+                if sent >= len(replay):
+                    break
+                target, event = replay[sent]
+            else:
+                target = rng.choices(TARGETS, weights)[0]
+                words = rng.choices(sizes, size_weights)[0]
+                event = EVENT_BUILDERS[target](rng, words, rng.choice(USER_AGENTS))
+
+            executor.submit(invoke, target, event)
+            sent += 1
+
+            rate = args.rate * rate_multiplier(args.profile, elapsed / args.duration)
+            next_send += 1.0 / rate
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    stop.set()
+    sampler_thread.join()
+    stats.depth_samples.append((time.monotonic() - run_start, sample_depths(queues)))
+    return stats
+
+
+def print_report(stats: LoadStats) -> None:
+    print("\nHandler latency")
+    print("---------------")
+    print(f"{'handler':<16}{'requests':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}  status codes")
+    for target in TARGETS:
+        samples = stats.latencies_ms.get(target, [])
+        if not samples:
+            continue
+        codes = ", ".join(f"{code}={n}" for code, n in sorted(stats.status_codes[target].items()))
+        print(
+            f"{target:<16}{len(samples):>10}{percentile(samples, 50):>10.2f}"
+            f"{percentile(samples, 90):>10.2f}{percentile(samples, 99):>10.2f}  {codes}"
+        )
+
+    print("\nQueue depth over time")
+    print("---------------------")
+    for offset, depths in stats.depth_samples:
+        row = "  ".join(f"{name}={depth}" for name, depth in depths.items())
+        print(f"t={offset:7.1f}s  {row}")
+
+
+def parse_mix(value: str, names: List[str]) -> Dict[str, float]:
+    """Parse 'name=weight,...' into a weight per name (missing names get 0)."""
+    mix = {name: 0.0 for name in names}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in mix:
+            raise argparse.ArgumentTypeError(f"Unknown mix entry: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend", choices=["fake", "local"], default="fake")
+    parser.add_argument("--rate", type=float, default=20.0, help="base requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--count", type=int, default=0, help="stop after N requests")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--profile", choices=["steady", "election", "tax-season"], default="steady"
+    )
+    parser.add_argument(
+        "--mix",
+        default="problem_form=6,toptask_form=3,problem_email=0.5,toptask_email=0.5",
+        help="relative weight per handler",
+    )
+    parser.add_argument(
+        "--size-mix",
+        default="small=5,medium=4,large=1",
+        help="relative weight per comment size (small/medium/large)",
+    )
+    parser.add_argument("--replay", metavar="PATH", help="JSONL file of recorded events")
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    args.mix = parse_mix(args.mix, TARGETS)
+    args.size_mix = parse_mix(args.size_mix, list(PAYLOAD_SIZES))
+
+    print_report(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,14 +8,7 @@ db.createCollection('problem');
 db.createCollection('originalproblem');
 db.createCollection('toptasksurvey');
 
-// Create indexes for better query performance
-db.problem.createIndex({ "problemDate": 1 });
-db.problem.createIndex({ "url": 1 });
-db.problem.createIndex({ "institution": 1 });
-db.problem.createIndex({ "processed": 1 });
-
-db.toptasksurvey.createIndex({ "dateTime": 1 });
-db.toptasksurvey.createIndex({ "surveyReferrer": 1 });
-db.toptasksurvey.createIndex({ "processed": 1 });
+// Indexes are declared in src/indexes.py and created by the commit Lambdas
+// on cold start (or: cd src && python indexes.py)
 
 print('Database initialized successfully with collections: problem, originalproblem, toptasksurvey');
@@ -0,0 +1,242 @@
+"""
+Synthetic feedback message generators for local benchmarking and load testing.
+
+Produces realistic queue payloads for every format the commit Lambdas accept:
+- Problem widget messages (15 semicolon-separated fields)
+- Problem email messages (9 semicolon-separated fields, old AEM format)
+- TopTask form messages (JSON)
+- TopTask email messages (24 fields separated by ~!~)
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+INSTITUTIONS = ["CRA", "ESDC", "IRCC", "HC", "TC", "ECCC", "PSPC", "ISED"]
+THEMES = ["taxes", "benefits", "immigration", "health", "travel", "jobs", "business"]
+SECTIONS = ["filing", "ei", "cerb", "visas", "passports", "covid", "grants"]
+PROBLEMS = ["Other", "Page not found", "Information missing", "Confusing", "404"]
+DEVICES = ["Desktop", "Mobile", "Tablet"]
+BROWSERS = ["Chrome/118.0", "Firefox/119.0", "Safari/605.1.15", "Edge/118.0"]
+DEPARTMENTS = ["CRA", "ESDC", "IRCC", "HC"]
+TASKS = ["File taxes", "Apply for EI", "Check application status", "Renew passport"]
+
+URL_PATHS = [
+    "/services/taxes/income-tax.html",
+    "/services/benefits/ei.html",
+    "/services/immigration-citizenship.html",
+    "/services/health/covid.html",
+    "/services/jobs/opportunities.html",
+    "/revenue-agency/services/e-services.html",
+]
+
+WORDS = (
+    "the form page does not work on my phone I could not find the link to apply "
+    "for benefits and the information about deadlines is confusing please update "
+    "le formulaire ne fonctionne pas je ne trouve pas le lien pour faire une demande"
+).split()
+
+
+def _comment(rng: random.Random, min_words: int, max_words: int) -> str:
+    """Build a free-text comment of a random length."""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def _url(rng: random.Random, language: str) -> str:
+    """Build a Canada.ca URL in the given language."""
+    return f"https://www.canada.ca/{language}{rng.choice(URL_PATHS)}"
+
+
+def problem_widget_message(
+    rng: random.Random, min_words: int = 5, max_words: int = 60
+) -> str:
+    """
+    Generate a 15-field problem message as produced by queue_problem_form.
+
+    Args:
+        rng: Random number generator
+        min_words: Minimum number of words in the comment
+        max_words: Maximum number of words in the comment
+
+    Returns:
+        Semicolon-separated queue message
+    """
+    now = datetime.utcnow() - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+    language = rng.choice(["en", "fr"])
+    opposite = "fr" if language == "en" else "en"
+    fields = [
+        now.strftime("%H:%M"),
+        now.strftime("%Y-%m-%d"),
+        _url(rng, language),
+        language,
+        _url(rng, opposite),
+        "Page title " + str(rng.randint(1, 500)),
+        rng.choice(INSTITUTIONS),
+        rng.choice(THEMES),
+        rng.choice(SECTIONS),
+        rng.choice(PROBLEMS),
+        _comment(rng, min_words, max_words),
+        rng.choice(["Yes", "No"]),
+        rng.choice(["iPhone", "Android", "Windows NT", "Macintosh"]),
+        rng.choice(BROWSERS),
+        "",
+    ]
+    return ";".join(fields)
+
+
+def problem_email_message(
+    rng: random.Random, min_words: int = 5, max_words: int = 60
+) -> str:
+    """
+    Generate a 9-field problem message as produced by the email widget.
+
+    Args:
+        rng: Random number generator
+        min_words: Minimum number of words in the comment
+        max_words: Maximum number of words in the comment
+
+    Returns:
+        Semicolon-separated queue message
+    """
+    language = rng.choice(["en", "fr"])
+    fields = [
+        datetime.utcnow().strftime("%Y-%m-%d"),
+        rng.choice(INSTITUTIONS),
+        rng.choice(THEMES),
+        rng.choice(SECTIONS),
+        "Page title " + str(rng.randint(1, 500)),
+        _url(rng, language),
+        rng.choice(["Yes", "No"]),
+        rng.choice(PROBLEMS),
+        _comment(rng, min_words, max_words),
+    ]
+    return ";".join(fields)
+
+
+def toptask_fields(rng: random.Random, min_words: int = 0, max_words: int = 40) -> Dict[str, str]:
+    """
+    Generate TopTask survey form fields as submitted by the survey form.
+
+    Args:
+        rng: Random number generator
+        min_words: Minimum number of words in each comment
+        max_words: Maximum number of words in each comment
+
+    Returns:
+        Dictionary of survey form fields
+    """
+    now = datetime.utcnow() - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+    use_task2 = rng.random() < 0.2
+    dept = rng.choice(DEPARTMENTS)
+    task = rng.choice(TASKS)
+    return {
+        "dateTime": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "surveyReferrer": _url(rng, rng.choice(["en", "fr"])),
+        "language": rng.choice(["en", "fr"]),
+        "device": rng.choice(DEVICES),
+        "screener": rng.choice(["Yes", "No"]),
+        "dept1": "" if use_task2 else dept,
+        "theme1": "" if use_task2 else rng.choice(THEMES),
+        "themeOther1": "",
+        "grouping1": "" if use_task2 else "Grouping",
+        "task1": "" if use_task2 else task,
+        "taskOther1": "",
+        "dept2": dept if use_task2 else "",
+        "theme2": rng.choice(THEMES) if use_task2 else "",
+        "grouping2": "Grouping" if use_task2 else "",
+        "task2": task if use_task2 else "",
+        "taskOther2": "",
+        "satisfaction": str(rng.randint(1, 5)),
+        "ease": str(rng.randint(1, 5)),
+        "completion": rng.choice(["Yes", "No", "Partially"]),
+        "improve": rng.choice(["Yes", "No"]),
+        "improveComment": _comment(rng, min_words, max_words),
+        "whyNot": "",
+        "whyNotComment": _comment(rng, min_words, max_words) if rng.random() < 0.3 else "",
+        "sampling": "invitation:gc:canada:taxes:cra:income:file",
+    }
+
+
+def toptask_json_message(rng: random.Random, min_words: int = 0, max_words: int = 40) -> str:
+    """
+    Generate a TopTask JSON message as produced by queue_toptask_survey_form.
+
+    Args:
+        rng: Random number generator
+        min_words: Minimum number of words in each comment
+        max_words: Maximum number of words in each comment
+
+    Returns:
+        JSON queue message
+    """
+    return json.dumps(toptask_fields(rng, min_words, max_words), indent=2)
+
+
+def toptask_delimited_message(
+    rng: random.Random, min_words: int = 0, max_words: int = 40
+) -> str:
+    """
+    Generate a 24-field TopTask message as produced by the survey email.
+
+    Args:
+        rng: Random number generator
+        min_words: Minimum number of words in each comment
+        max_words: Maximum number of words in each comment
+
+    Returns:
+        ~!~ separated queue message wrapped in the email HTML envelope
+    """
+    f = toptask_fields(rng, min_words, max_words)
+    fields = [
+        f["dateTime"],
+        f["surveyReferrer"],
+        f["language"],
+        f["device"],
+        f["screener"],
+        f["dept1"],
+        f["theme1"],
+        f["themeOther1"],
+        f["grouping1"],
+        f["task1"],
+        f["taskOther1"],
+        f["dept2"],
+        f["theme2"],
+        f["grouping2"],
+        f["task2"],
+        f["taskOther2"],
+        f["satisfaction"],
+        f["ease"],
+        f["completion"],
+        f["improve"],
+        f["improveComment"],
+        f["whyNot"],
+        f["whyNotComment"],
+        f["sampling"],
+    ]
+    return "<html><body><pre>" + "~!~".join(fields) + "</pre></body></html>"
+
+
+GENERATORS = {
+    "problem_widget": problem_widget_message,
+    "problem_email": problem_email_message,
+    "toptask_json": toptask_json_message,
+    "toptask_delimited": toptask_delimited_message,
+}
+
+
+def generate(kind: str, count: int, seed: Optional[int] = None, **kwargs) -> List[str]:
+    """
+    Generate a list of synthetic messages of one kind.
+
+    Args:
+        kind: One of the GENERATORS keys
+        count: Number of messages to generate
+        seed: Optional random seed for reproducible runs
+
+    Returns:
+        List of queue message bodies
+    """
+    rng = random.Random(seed)
+    generator = GENERATORS[kind]
+    return [generator(rng, **kwargs) for _ in range(count)]
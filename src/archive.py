@@ -0,0 +1,318 @@
+"""
+Cold archive for the originalproblem collection.
+
+`originalproblem` keeps an unmodified copy of every problem and is almost
+never read. The archive job moves documents inserted more than
+ARCHIVE_AFTER_DAYS ago (by _id time, so the scan walks the _id index) into
+compressed JSONL blobs partitioned by problem date:
+
+    <ARCHIVE_LOCATION>/originalproblem/problemDate=2024-03-01/part-<first _id>.jsonl.gz
+
+Documents are deleted from the cluster only after their blob is written, so
+an interrupted run never loses data; a re-run rewrites the same blob key for
+the same documents. Blobs use MongoDB extended JSON, so _id and dates
+round-trip exactly. `restore` rehydrates a problem-date range.
+
+Usage:
+    python archive.py archive --dry-run
+    python archive.py restore --from 2024-03-01 --to 2024-03-31 [--collection originalproblem_restored]
+"""
+
+import gzip
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+from bson import ObjectId, json_util
+from pymongo import ASCENDING
+from pymongo.database import Database
+from commit_scheduler import has_time_remaining
+from db_utils import MongoDBConnection, insert_many_unordered
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Archive configuration
+ARCHIVE_LOCATION = os.environ.get("ARCHIVE_LOCATION", "")  # s3://bucket/prefix or a local directory
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "5000"))
+ARCHIVE_COMPRESSION = os.environ.get("ARCHIVE_COMPRESSION", "gzip")  # gzip or zstd
+
+ARCHIVE_COLLECTION = "originalproblem"
+DATE_FIELD = "problemDate"
+EXTENSIONS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+
+def require_zstandard() -> Any:
+    """Import zstandard, which is only needed for zstd blobs (not in requirements.txt)."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compression requires zstandard (pip install zstandard)")
+    return zstandard
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    """Compress a blob (zstd needs the zstandard package)."""
+    if compression == "zstd":
+        return require_zstandard().ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress(data: bytes, key: str) -> bytes:
+    """Decompress a blob according to its extension."""
+    if key.endswith(".zst"):
+        return require_zstandard().ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+class ArchiveStore:
+    """Blob store rooted at s3://bucket/prefix or a local directory."""
+
+    def __init__(self, location: str):
+        if not location:
+            raise ValueError("ARCHIVE_LOCATION is not set")
+        self.location = location.rstrip("/")
+        self.is_s3 = location.startswith("s3://")
+        if self.is_s3:
+            import boto3
+
+            self.bucket, _, self.prefix = self.location[len("s3://"):].partition("/")
+            self._s3 = boto3.client("s3")
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}/{name}" if self.is_s3 and self.prefix else name
+
+    def put(self, name: str, data: bytes) -> None:
+        if self.is_s3:
+            self._s3.put_object(Bucket=self.bucket, Key=self._key(name), Body=data)
+            return
+        path = os.path.join(self.location, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as handle:
+            handle.write(data)
+        os.replace(path + ".tmp", path)
+
+    def get(self, name: str) -> bytes:
+        if self.is_s3:
+            return self._s3.get_object(Bucket=self.bucket, Key=self._key(name))["Body"].read()
+        with open(os.path.join(self.location, name), "rb") as handle:
+            return handle.read()
+
+    def list(self, directory: str) -> List[str]:
+        """Names of the blobs in one partition directory."""
+        if self.is_s3:
+            prefix = self._key(directory) + "/"
+            names = []
+            paginator = self._s3.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+                for item in page.get("Contents", []):
+                    names.append(f"{directory}/{item['Key'][len(prefix):]}")
+            return sorted(names)
+        path = os.path.join(self.location, directory)
+        if not os.path.isdir(path):
+            return []
+        return sorted(f"{directory}/{name}" for name in os.listdir(path) if not name.endswith(".tmp"))
+
+
+def partition(document: Dict[str, Any]) -> str:
+    """Partition directory for a document, from its problem date."""
+    day = str(document.get(DATE_FIELD) or "")[:10]
+    try:
+        datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        day = "unknown"
+    return f"{ARCHIVE_COLLECTION}/{DATE_FIELD}={day}"
+
+
+def to_blob(documents: List[Dict[str, Any]], compression: str) -> bytes:
+    """Compressed extended-JSON lines for a group of documents."""
+    lines = "".join(json_util.dumps(document) + "\n" for document in documents)
+    return compress(lines.encode("utf-8"), compression)
+
+
+def archive(
+    database: Database,
+    store: ArchiveStore,
+    after_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    compression: str = ARCHIVE_COMPRESSION,
+    dry_run: bool = False,
+    context: Any = None,
+) -> Dict[str, Any]:
+    """
+    Move originalproblem documents older than the cutoff to the archive.
+
+    Each batch is grouped by problem date, one blob per group is written and
+    only then are the batch's documents deleted.
+
+    Args:
+        database: Database instance
+        store: Archive store
+        after_days: Archive documents inserted more than this many days ago
+        batch_size: Documents per batch
+        compression: gzip or zstd
+        dry_run: Count documents that would be archived without writing
+        context: Lambda context; the run stops between batches when time runs low
+
+    Returns:
+        Archive statistics
+    """
+    if compression not in EXTENSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    if compression == "zstd":
+        # Fail before anything is read, not on the first blob
+        require_zstandard()
+
+    collection = database[ARCHIVE_COLLECTION]
+    cutoff = ObjectId.from_datetime(datetime.utcnow() - timedelta(days=after_days))
+    stats: Dict[str, Any] = {"archived": 0, "blobs": 0, "batches": 0, "complete": False}
+    if dry_run:
+        stats["archivable"] = collection.count_documents({"_id": {"$lt": cutoff}})
+        return stats
+
+    while has_time_remaining(context):
+        documents = list(
+            collection.find({"_id": {"$lt": cutoff}}).sort("_id", ASCENDING).limit(batch_size)
+        )
+        if not documents:
+            stats["complete"] = True
+            break
+
+        groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for document in documents:
+            groups[partition(document)].append(document)
+        for directory, group in groups.items():
+            store.put(f"{directory}/part-{group[0]['_id']}{EXTENSIONS[compression]}", to_blob(group, compression))
+
+        result = collection.delete_many({"_id": {"$in": [document["_id"] for document in documents]}})
+        stats["archived"] += result.deleted_count
+        stats["blobs"] += len(groups)
+        stats["batches"] += 1
+        logger.info(f"Archived {result.deleted_count} document(s) into {len(groups)} blob(s)")
+
+    return stats
+
+
+def read_blob(store: ArchiveStore, name: str) -> Iterator[Dict[str, Any]]:
+    """Documents stored in one blob."""
+    for line in decompress(store.get(name), name).decode("utf-8").splitlines():
+        if line.strip():
+            yield json_util.loads(line)
+
+
+def restore(
+    database: Database,
+    store: ArchiveStore,
+    start: str,
+    end: str,
+    collection: str = ARCHIVE_COLLECTION,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Rehydrate archived documents for an inclusive problem-date range.
+
+    Documents keep their _id, so restoring twice (or restoring documents
+    that were never deleted) only reports duplicates. Documents restored
+    into originalproblem are archived again by the next run once past the
+    cutoff; restore into another collection to keep them.
+
+    Args:
+        database: Database instance
+        store: Archive store
+        start: First problem date (YYYY-MM-DD)
+        end: Last problem date (YYYY-MM-DD)
+        collection: Target collection
+        batch_size: Documents per insert
+
+    Returns:
+        Restore statistics
+    """
+    target = database[collection]
+    stats = {"collection": collection, "blobs": 0, "restored": 0, "duplicates": 0, "failed": 0}
+
+    def flush(batch: List[Dict[str, Any]]) -> None:
+        failed, duplicates = insert_many_unordered(target, batch)
+        stats["restored"] += len(batch) - len(failed) - len(duplicates)
+        stats["duplicates"] += len(duplicates)
+        stats["failed"] += len(failed)
+
+    day = datetime.strptime(start, "%Y-%m-%d")
+    last = datetime.strptime(end, "%Y-%m-%d")
+    batch: List[Dict[str, Any]] = []
+    while day <= last:
+        for name in store.list(f"{ARCHIVE_COLLECTION}/{DATE_FIELD}={day:%Y-%m-%d}"):
+            stats["blobs"] += 1
+            for document in read_blob(store, name):
+                batch.append(document)
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+        day += timedelta(days=1)
+    if batch:
+        flush(batch)
+
+    logger.info(f"Restored {start}..{end}: {stats}")
+    return stats
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for the archive job (scheduled) and restores.
+
+    Args:
+        event: {} or {"action": "archive", "dry_run": ...} to archive;
+               {"action": "restore", "from": ..., "to": ..., "collection": ...} to restore
+        context: Lambda context
+
+    Returns:
+        Response with archive or restore statistics
+    """
+    try:
+        database = MongoDBConnection.get_database()
+        store = ArchiveStore(event.get("location") or ARCHIVE_LOCATION)
+        if event.get("action", "archive") == "restore":
+            stats = restore(
+                database,
+                store,
+                event["from"],
+                event.get("to") or event["from"],
+                collection=event.get("collection") or ARCHIVE_COLLECTION,
+            )
+        else:
+            stats = archive(database, store, dry_run=bool(event.get("dry_run", False)), context=context)
+        return {"statusCode": 200, "body": json.dumps(stats)}
+    except Exception as e:
+        logger.error(f"Archive job failed: {str(e)}", exc_info=True)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archive or restore originalproblem documents")
+    parser.add_argument("action", choices=["archive", "restore"])
+    parser.add_argument("--location", default=ARCHIVE_LOCATION, help="s3://bucket/prefix or a directory")
+    parser.add_argument("--from", dest="start", help="first problem date to restore, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="last problem date to restore, YYYY-MM-DD")
+    parser.add_argument("--collection", help="restore target (default: originalproblem)")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if args.action == "restore" and not args.start:
+        parser.error("restore needs --from")
+
+    response = lambda_handler(
+        {
+            "action": args.action,
+            "location": args.location,
+            "from": args.start,
+            "to": args.end,
+            "collection": args.collection,
+            "dry_run": args.dry_run,
+        },
+        None,
+    )
+    print(json.dumps(json.loads(response["body"]), indent=2))
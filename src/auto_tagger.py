@@ -0,0 +1,258 @@
+"""
+Keyword auto-tagging for the commit Lambda functions.
+
+A keyword dictionary (English and French keywords per tag, optionally scoped
+to institutions and themes) is loaded once per warm container and compiled
+into a single Aho-Corasick automaton. Each comment in a batch is scanned
+once, so matching cost is linear in the text length however many keywords
+the dictionary holds. Matched tags and `autoTagProcessed` are written with
+the batch insert, replacing the separate tagging pass.
+
+Text and keywords are compared case- and accent-insensitively ("Réservation"
+matches "reservation") and only on whole words.
+
+Dictionary format (TAG_KEYWORDS_PATH, a local path or s3://bucket/key):
+    {
+      "tags": [
+        {
+          "tag": "Sign-in",
+          "institutions": ["CRA"],          # optional, all when empty
+          "themes": [],                     # optional, all when empty
+          "keywords": {"en": ["sign in", "password"], "fr": ["connexion"]}
+        }
+      ]
+    }
+"""
+
+import json
+import logging
+import os
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+from models import processed_value
+
+logger = logging.getLogger()
+
+# Tagging configuration
+AUTO_TAG_ENABLED = os.environ.get("AUTO_TAG_ENABLED", "false").lower() == "true"
+TAG_KEYWORDS_PATH = os.environ.get(
+    "TAG_KEYWORDS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "tag_keywords.json"),
+)
+
+FLAG_FIELD = "autoTagProcessed"
+TAGS_FIELD = "tags"
+
+# Comment fields and the institution field per collection
+TAG_TEXT_FIELDS = {
+    "problem": ("problemDetails",),
+    "toptasksurvey": ("taskImproveComment", "taskWhyNotComment"),
+}
+INSTITUTION_FIELDS = {"problem": "institution", "toptasksurvey": "dept"}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Case-fold, strip accents and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _WHITESPACE.sub(" ", stripped.casefold()).strip()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over normalized keywords."""
+
+    def __init__(self, keywords: Iterable[Tuple[str, int]]):
+        """
+        Args:
+            keywords: (keyword, payload) pairs; the payload is reported on a match
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (payload, keyword length) per state, including matches reached via fail links
+        self._output: List[List[Tuple[int, int]]] = [[]]
+
+        for keyword, payload in keywords:
+            keyword = normalize(keyword)
+            if keyword:
+                self._add(keyword, payload)
+        self._link()
+
+    def _add(self, keyword: str, payload: int) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((payload, len(keyword)))
+
+    def _link(self) -> None:
+        """Compute failure links breadth first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def search(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        Find every keyword occurrence in normalized text.
+
+        Yields:
+            (start, end, payload) with end exclusive
+        """
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for payload, length in self._output[state]:
+                yield position + 1 - length, position + 1, payload
+
+
+@dataclass(frozen=True)
+class TagRule:
+    """A tag and the institutions / themes it applies to (all when empty)."""
+
+    tag: str
+    institutions: FrozenSet[str] = frozenset()
+    themes: FrozenSet[str] = frozenset()
+
+    def applies_to(self, institution: str, theme: str) -> bool:
+        return (not self.institutions or institution in self.institutions) and (
+            not self.themes or theme in self.themes
+        )
+
+
+class Tagger:
+    """Compiled keyword dictionary."""
+
+    def __init__(self, dictionary: Dict[str, Any]):
+        self.rules: List[TagRule] = []
+        keywords: List[Tuple[str, int]] = []
+        for entry in dictionary.get("tags", []):
+            rule = TagRule(
+                tag=entry["tag"],
+                institutions=frozenset(normalize(value) for value in entry.get("institutions", [])),
+                themes=frozenset(normalize(value) for value in entry.get("themes", [])),
+            )
+            index = len(self.rules)
+            self.rules.append(rule)
+            for language_keywords in entry.get("keywords", {}).values():
+                keywords.extend((keyword, index) for keyword in language_keywords)
+
+        self.keyword_count = len(keywords)
+        self._automaton = KeywordAutomaton(keywords)
+
+    def tags_for(self, text: str, institution: str = "", theme: str = "") -> List[str]:
+        """
+        Tags whose keywords occur as whole words in the text.
+
+        Args:
+            text: Comment text
+            institution: Document institution, for scoped rules
+            theme: Document theme, for scoped rules
+
+        Returns:
+            Sorted list of tags
+        """
+        normalized = normalize(text)
+        if not normalized:
+            return []
+        institution, theme = normalize(institution), normalize(theme)
+
+        matched = set()
+        for start, end, index in self._automaton.search(normalized):
+            if index in matched:
+                continue
+            if start > 0 and normalized[start - 1].isalnum():
+                continue
+            if end < len(normalized) and normalized[end].isalnum():
+                continue
+            if self.rules[index].applies_to(institution, theme):
+                matched.add(index)
+        return sorted({self.rules[index].tag for index in matched})
+
+
+def read_dictionary(path: str) -> Dict[str, Any]:
+    """Read the keyword dictionary from a local path or s3://bucket/key."""
+    if path.startswith("s3://"):
+        import boto3
+
+        bucket, _, key = path[len("s3://"):].partition("/")
+        response = boto3.client("s3").get_object(Bucket=bucket, Key=key)
+        return json.loads(response["Body"].read())
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+_tagger: Optional[Tagger] = None
+_tagger_loaded = False
+
+
+def get_tagger() -> Optional[Tagger]:
+    """
+    Tagger for this container, loaded on first use. Returns None (and does
+    not retry until the next cold start) when tagging is disabled or the
+    dictionary cannot be loaded, leaving documents to the tagging pass.
+    """
+    global _tagger, _tagger_loaded
+    if _tagger_loaded or not AUTO_TAG_ENABLED:
+        return _tagger
+    _tagger_loaded = True
+    try:
+        _tagger = Tagger(read_dictionary(TAG_KEYWORDS_PATH))
+        logger.info(
+            f"Loaded {len(_tagger.rules)} tag(s), {_tagger.keyword_count} keyword(s) "
+            f"from {TAG_KEYWORDS_PATH}"
+        )
+    except Exception as e:
+        logger.error(f"Failed to load tag keywords from {TAG_KEYWORDS_PATH}: {str(e)}")
+    return _tagger
+
+
+def tag_batch(documents: Iterable[Dict[str, Any]], collection: str) -> int:
+    """
+    Tag a batch in place and mark it processed, when tagging is enabled.
+
+    Args:
+        documents: Documents about to be inserted
+        collection: Collection name (selects the text fields)
+
+    Returns:
+        Number of documents given at least one tag
+    """
+    tagger = get_tagger()
+    if tagger is None:
+        return 0
+
+    fields = TAG_TEXT_FIELDS.get(collection, ())
+    institution_field = INSTITUTION_FIELDS.get(collection, "institution")
+    tagged = 0
+    for document in documents:
+        text = "\n".join(str(document.get(field) or "") for field in fields)
+        tags = tagger.tags_for(
+            text, document.get(institution_field, ""), document.get("theme", "")
+        )
+        if tags:
+            existing = document.get(TAGS_FIELD) or []
+            document[TAGS_FIELD] = sorted(set(existing) | set(tags))
+            tagged += 1
+        document[FLAG_FIELD] = processed_value(document, FLAG_FIELD)
+
+    logger.info(f"Auto-tagged {tagged} {collection} document(s)")
+    return tagged
@@ -0,0 +1,296 @@
+"""
+Bulk import of historical feedback messages.
+
+Loads files of raw queue message bodies (one per line; the legacy 15-field
+and 9-field problem layouts, `~!~`-delimited or JSON TopTask messages, or
+schema records) without going through SQS. Lines are parsed across a
+process pool with the commit Lambdas' own parsers (schema.py) and go
+through the same dedup, URL enrichment, PII scrubbing and tagging steps,
+then are written with unordered `insert_many` - one batch at a time, while
+at most IMPORT_MAX_IN_FLIGHT further batches are being parsed.
+
+Progress (lines committed per file) is checkpointed after every batch, so an
+interrupted import resumes where it stopped. Only lines with a free-text
+comment carry a contentHash, so do not import the same file twice outside
+the checkpoint. Daily rollups are not updated - rebuild the imported date
+range afterwards (rollups.py).
+
+Runs from a workstation or bastion host; process pools are not available
+in Lambda.
+
+Usage:
+    python bulk_import.py problem exports/azure/problem-*.txt
+    python bulk_import.py toptask toptask-2019.txt.gz --workers 8 --rejects rejected.txt
+"""
+
+import glob
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+from db_utils import MongoDBConnection, insert_many_unordered
+from models import OriginalProblem
+from schema import parse_problem_message, parse_toptask_message
+from dedup import drop_duplicates, remember
+from url_enrichment import enrich_batch
+from pii import scrub_batch
+from auto_tagger import tag_batch
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Import configuration
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", str(os.cpu_count() or 2)))
+IMPORT_MAX_IN_FLIGHT = int(os.environ.get("IMPORT_MAX_IN_FLIGHT", str(2 * IMPORT_WORKERS)))
+DEFAULT_CHECKPOINT = "bulk_import_checkpoint.json"
+
+COLLECTIONS = {"problem": "problem", "toptask": "toptasksurvey"}
+
+# (documents, original problem documents, rejected lines) for one batch
+ParsedBatch = Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[str]]
+
+
+def init_worker() -> None:
+    """Keep the parsers' per-message info logging out of the worker output."""
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def parse_batch(source: str, lines: List[str]) -> ParsedBatch:
+    """
+    Parse raw message lines into documents ready to insert (runs in a worker).
+
+    Args:
+        source: "problem" or "toptask"
+        lines: Raw message bodies
+
+    Returns:
+        Documents, the original problem documents aligned with them
+        (problem only) and the lines that could not be parsed
+    """
+    parse_message = parse_problem_message if source == "problem" else parse_toptask_message
+    collection = COLLECTIONS[source]
+    parsed = []
+    rejected = []
+    for line in lines:
+        try:
+            item = parse_message(line)
+        except Exception:
+            item = None
+        if item is None:
+            rejected.append(line)
+        elif source == "problem" and not (item.problem_details or "").strip():
+            # Dropped by the commit Lambda as well
+            continue
+        else:
+            parsed.append(item)
+
+    documents = drop_duplicates([item.to_dict() for item in parsed], collection)
+    kept = [(item, document) for item, document in zip(parsed, documents) if document is not None]
+    remember([document for _, document in kept], collection)
+
+    documents = [document for _, document in kept]
+    enrich_batch(documents, collection)
+    scrub_batch(documents, collection)
+    tag_batch(documents, collection)
+
+    originals = []
+    if source == "problem":
+        originals = [OriginalProblem.from_problem(item).to_dict() for item, _ in kept]
+    return documents, originals, rejected
+
+
+def open_lines(path: str) -> Iterator[str]:
+    """Non-empty lines of a text file (gzip if the name ends in .gz)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.rstrip("\r\n")
+            if line.strip():
+                yield line
+
+
+def read_batches(path: str, skip: int) -> Iterator[Tuple[int, List[str]]]:
+    """Yield (lines read so far, batch) after skipping `skip` already committed lines."""
+    batch: List[str] = []
+    position = 0
+    for line in open_lines(path):
+        position += 1
+        if position <= skip:
+            continue
+        batch.append(line)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            yield position, batch
+            batch = []
+    if batch:
+        yield position, batch
+
+
+class Checkpoint:
+    """Lines committed per input file, persisted as JSON after every batch."""
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = source
+        self.state: Dict[str, Any] = {"source": source, "files": {}}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as handle:
+                self.state = json.load(handle)
+            if self.state.get("source") != source:
+                raise ValueError(f"{path} is a checkpoint for a {self.state.get('source')} import")
+
+    def committed(self, file_path: str) -> int:
+        return self.state["files"].get(os.path.abspath(file_path), {}).get("lines", 0)
+
+    def is_complete(self, file_path: str) -> bool:
+        return self.state["files"].get(os.path.abspath(file_path), {}).get("complete", False)
+
+    def save(self, file_path: str, lines: int, complete: bool = False) -> None:
+        self.state["files"][os.path.abspath(file_path)] = {
+            "lines": lines,
+            "complete": complete,
+            "updatedAt": datetime.utcnow().isoformat(),
+        }
+        # Replace atomically so an interruption never leaves a torn checkpoint
+        with open(self.path + ".tmp", "w", encoding="utf-8") as handle:
+            json.dump(self.state, handle, indent=2)
+        os.replace(self.path + ".tmp", self.path)
+
+
+def write_batch(
+    database: Database, source: str, parsed: ParsedBatch, stats: Dict[str, int]
+) -> None:
+    """Insert one parsed batch and its original records, updating the statistics."""
+    documents, originals, rejected = parsed
+    stats["rejected"] += len(rejected)
+
+    failed, duplicates = insert_many_unordered(database[COLLECTIONS[source]], documents)
+    failed, duplicates = set(failed), set(duplicates)
+    stats["inserted"] += len(documents) - len(failed) - len(duplicates)
+    stats["duplicates"] += len(duplicates)
+    stats["failed"] += len(failed)
+
+    if originals:
+        saved = [
+            original
+            for i, original in enumerate(originals)
+            if i not in failed and i not in duplicates
+        ]
+        orig_failed, _ = insert_many_unordered(database["originalproblem"], saved)
+        if orig_failed:
+            logger.error(f"Failed to save {len(orig_failed)} original record(s)")
+
+
+def import_files(
+    database: Database,
+    source: str,
+    paths: List[str],
+    checkpoint: Checkpoint,
+    workers: int = IMPORT_WORKERS,
+    max_in_flight: int = IMPORT_MAX_IN_FLIGHT,
+    rejects_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Import message files through a pool of parser processes.
+
+    Batches are written in file order, so the checkpoint is always the end of
+    the last batch written.
+
+    Args:
+        database: Database instance
+        source: "problem" or "toptask"
+        paths: Input files
+        checkpoint: Checkpoint to resume from and update
+        workers: Parser processes
+        max_in_flight: Batches submitted to the pool but not yet written
+        rejects_path: Optional file to append unparseable lines to
+
+    Returns:
+        Import statistics
+    """
+    stats = {"files": 0, "lines": 0, "inserted": 0, "duplicates": 0, "failed": 0, "rejected": 0}
+    start_time = time.time()
+    rejects = open(rejects_path, "a", encoding="utf-8") if rejects_path else None
+
+    # spawn: workers must not inherit the parent's MongoDB client
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker) as pool:
+            for path in paths:
+                if checkpoint.is_complete(path):
+                    logger.info(f"Skipping {path} (already imported)")
+                    continue
+                skip = checkpoint.committed(path)
+                if skip:
+                    logger.info(f"Resuming {path} after line {skip}")
+
+                in_flight: Deque[Tuple[int, int, Future]] = deque()
+
+                def write_oldest() -> None:
+                    position, count, future = in_flight.popleft()
+                    parsed = future.result()
+                    write_batch(database, source, parsed, stats)
+                    if rejects is not None and parsed[2]:
+                        rejects.write("\n".join(parsed[2]) + "\n")
+                        rejects.flush()
+                    stats["lines"] += count
+                    checkpoint.save(path, position)
+
+                for position, lines in read_batches(path, skip):
+                    in_flight.append((position, len(lines), pool.submit(parse_batch, source, lines)))
+                    if len(in_flight) >= max_in_flight:
+                        write_oldest()
+                while in_flight:
+                    write_oldest()
+
+                checkpoint.save(path, checkpoint.committed(path), complete=True)
+                stats["files"] += 1
+                logger.info(f"Imported {path}: {stats}")
+    finally:
+        if rejects is not None:
+            rejects.close()
+
+    elapsed = time.time() - start_time
+    stats["elapsed_seconds"] = round(elapsed, 1)
+    stats["lines_per_second"] = round(stats["lines"] / elapsed, 1) if elapsed else 0
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk import historical feedback messages")
+    parser.add_argument("source", choices=sorted(COLLECTIONS))
+    parser.add_argument("files", nargs="+", help="files of raw message bodies, one per line (.gz ok)")
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS)
+    parser.add_argument("--max-in-flight", type=int, default=IMPORT_MAX_IN_FLIGHT)
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--rejects", help="append unparseable lines to this file")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.files for path in glob.glob(pattern)})
+    if not paths:
+        parser.error("no input files match")
+
+    try:
+        result = import_files(
+            MongoDBConnection.get_database(),
+            args.source,
+            paths,
+            Checkpoint(args.checkpoint, args.source),
+            workers=args.workers,
+            max_in_flight=max(1, args.max_in_flight),
+            rejects_path=args.rejects,
+        )
+    except (PyMongoError, ValueError) as e:
+        logger.error(f"Import failed: {str(e)}")
+        raise SystemExit(1)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,476 @@
+"""
+Commit pipeline shared by the commit Lambdas.
+
+Every queue goes through the same steps: parse, drop repeat submissions,
+enrich / scrub / tag, dispose of rejected messages, bulk insert, then
+update rollups, publish to the outbox and dequeue. What differs per queue
+(parser, target collection, rollup, original records) is a `CommitSource`
+entry in SOURCES, so problem_commit, top_task_survey_commit, commit_worker
+and the DLQ replay all commit through the one path below.
+
+This module creates no AWS clients; callers pass their SQS client and queue URL.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+from models import OriginalProblem
+from schema import (
+    decode_problem_body,
+    decode_toptask_body,
+    parse_problem_message,
+    parse_toptask_message,
+)
+from db_utils import MongoDBConnection, insert_many_unordered, prime_connections
+from dedup import drop_duplicates, remember
+from url_enrichment import enrich_batch
+from pii import scrub_batch
+from auto_tagger import tag_batch
+from rollups import PROBLEM_ROLLUP, TOPTASK_ROLLUP, Rollup, get_rollups, update_rollups
+from outbox import get_outbox, publish
+from quarantine import (
+    REASON_INVALID_JSON,
+    REASON_PARSE_FAILED,
+    back_off,
+    classify_exception,
+    classify_unparsed,
+    dispose_rejected,
+    get_quarantine,
+)
+from indexes import ensure_indexes_once
+from commit_scheduler import (
+    QueueDepth,
+    chain_if_backlog,
+    get_queue_depth,
+    has_time_remaining,
+    invoke_workers,
+    is_warmup_event,
+    plan_run,
+)
+from queue_poller import LongPoller
+from visibility_manager import BATCH_VISIBILITY_TIMEOUT, VisibilityManager
+
+logger = logging.getLogger()
+
+# Messages received per run when the queue depth cannot be read
+TIMES_TO_LOOP = 100
+
+
+def problem_rejection_reason(message_body: str) -> Tuple[str, str]:
+    """
+    Classify a problem message body that parse_problem_message rejected.
+
+    Args:
+        message_body: Raw SQS message body
+
+    Returns:
+        Tuple of (reason code, detail)
+    """
+    return classify_unparsed(decode_problem_body(message_body), ";", (15, 9))
+
+
+def toptask_rejection_reason(message_body: str) -> Tuple[str, str]:
+    """
+    Classify a TopTask message body that parse_toptask_message rejected.
+
+    Args:
+        message_body: Raw SQS message body
+
+    Returns:
+        Tuple of (reason code, detail)
+    """
+    decoded_string = decode_toptask_body(message_body)
+    try:
+        json.loads(decoded_string)
+        # Valid JSON that schema.parse_toptask_json rejected
+        return REASON_PARSE_FAILED, "JSON submission could not be parsed"
+    except json.JSONDecodeError as e:
+        if decoded_string.lstrip().startswith("{"):
+            return REASON_INVALID_JSON, str(e)
+    return classify_unparsed(decoded_string, "~!~", (24,))
+
+
+def has_no_comment(problem: Any) -> bool:
+    """True for problems without a comment; they are dequeued without being written."""
+    return not problem.problem_details or problem.problem_details.strip() == ""
+
+
+def prepare_documents(documents: List[Dict[str, Any]], collection: str) -> Dict[int, Exception]:
+    """
+    Enrich, scrub and tag documents in place before the insert.
+
+    The steps run over the whole batch first; if one raises, they are re-run
+    document by document (each step only fills blanks, masks or adds tags, so
+    repeating it is harmless) to find the documents that fail.
+
+    Args:
+        documents: Documents about to be inserted
+        collection: Collection name
+
+    Returns:
+        Error per index of the documents that could not be prepared
+    """
+    # Canonical URL and blank institution/theme from the URL map (tag rules use them),
+    # PII masked before the write (PII_SCRUB_ENABLED), tags in the same write (AUTO_TAG_ENABLED)
+    steps = (enrich_batch, scrub_batch, tag_batch)
+    try:
+        for step in steps:
+            step(documents, collection)
+        return {}
+    except Exception as e:
+        logger.warning(f"Preparing {collection} batch failed, retrying per document: {str(e)}")
+
+    errors: Dict[int, Exception] = {}
+    for i, document in enumerate(documents):
+        try:
+            for step in steps:
+                step([document], collection)
+        except Exception as e:
+            logger.error(f"Error preparing {collection} document: {str(e)}", exc_info=True)
+            errors[i] = e
+    return errors
+
+
+@dataclass
+class CommitSource:
+    """What the commit pipeline needs to know about one queue's records."""
+
+    # Quarantine and outbox source name
+    name: str
+    # Target collection (also the dedup / enrichment / PII / tagging key)
+    collection: str
+    # Raw message body -> model, or None when the body cannot be parsed
+    parse: Callable[[str], Any]
+    # Raw message body -> (reason code, detail) for bodies parse rejected
+    rejection_reason: Callable[[str], Tuple[str, str]]
+    rollup: Rollup
+    # Collection receiving an unmodified copy of every record written, if any
+    originals: Optional[str] = None
+    original: Optional[Callable[[Any], Dict[str, Any]]] = None
+    # Records dequeued without being written
+    discard: Optional[Callable[[Any], bool]] = None
+
+
+SOURCES: Dict[str, CommitSource] = {
+    "problem": CommitSource(
+        name="problem",
+        collection="problem",
+        parse=parse_problem_message,
+        rejection_reason=problem_rejection_reason,
+        rollup=PROBLEM_ROLLUP,
+        originals="originalproblem",
+        original=lambda problem: OriginalProblem.from_problem(problem).to_dict(),
+        discard=has_no_comment,
+    ),
+    "toptask": CommitSource(
+        name="toptask",
+        collection="toptasksurvey",
+        parse=parse_toptask_message,
+        rejection_reason=toptask_rejection_reason,
+        rollup=TOPTASK_ROLLUP,
+    ),
+}
+
+
+def commit_batch(
+    source: CommitSource,
+    messages: List[Dict[str, Any]],
+    collection: Collection,
+    visibility: VisibilityManager,
+    originals: Optional[Collection] = None,
+    quarantine: Optional[Collection] = None,
+    rollups: Optional[Collection] = None,
+    outbox: Optional[Collection] = None,
+) -> int:
+    """
+    Parse a batch of queue messages and write them with one bulk insert per collection.
+
+    Failures are classified: permanent ones (unparseable messages, documents
+    that cannot be enriched, scrubbed or tagged) are quarantined when a
+    quarantine collection is given and released back to the
+    queue immediately otherwise; transient ones (database errors) are made
+    visible again after an exponential backoff.
+
+    Args:
+        source: Source of the messages
+        messages: SQS messages from one receive
+        collection: Target collection
+        visibility: Visibility manager tracking the batch
+        originals: Collection for the original records (sources with `originals` only)
+        quarantine: Optional quarantine collection for poison messages
+        rollups: Optional daily rollup collection updated with the inserted records
+        outbox: Optional outbox collection receiving a change record for the inserted records
+
+    Returns:
+        Number of messages processed and dequeued
+    """
+    by_receipt = {message["ReceiptHandle"]: message for message in messages}
+    records = []
+    rejected = []
+    to_delete = []
+
+    for message in messages:
+        receipt_handle = message["ReceiptHandle"]
+        try:
+            record = source.parse(message["Body"])
+
+            if not record:
+                rejected.append((message, *source.rejection_reason(message["Body"])))
+            elif source.discard and source.discard(record):
+                logger.info(f"{source.name} has no comment and will be disregarded.")
+                to_delete.append(receipt_handle)
+            else:
+                records.append((receipt_handle, record))
+
+        except Exception as e:
+            logger.error(f"Error processing message: {str(e)}", exc_info=True)
+            rejected.append((message, classify_exception(e), str(e)))
+
+    pending = []
+    if records:
+        documents = drop_duplicates(
+            [record.to_dict() for _, record in records], source.collection
+        )
+        # Repeat submissions are dequeued without being written
+        to_delete.extend(
+            receipt_handle
+            for (receipt_handle, _), document in zip(records, documents)
+            if document is None
+        )
+        pending = [
+            (receipt_handle, record, document)
+            for (receipt_handle, record), document in zip(records, documents)
+            if document is not None
+        ]
+
+        # A document that cannot be prepared is rejected alone; the rest are committed
+        errors = prepare_documents([document for _, _, document in pending], source.collection)
+        for i, error in errors.items():
+            rejected.append((by_receipt[pending[i][0]], classify_exception(error), str(error)))
+        pending = [item for i, item in enumerate(pending) if i not in errors]
+
+    to_delete.extend(dispose_rejected(rejected, quarantine, visibility, source.name))
+
+    if pending:
+        try:
+            failed, duplicates = insert_many_unordered(
+                collection, [document for _, _, document in pending]
+            )
+            failed, duplicates = set(failed), set(duplicates)
+            saved = [
+                item
+                for i, item in enumerate(pending)
+                if i not in failed and i not in duplicates
+            ]
+            logger.info(f"Records saved: {len(saved)} {source.name}(s)")
+            if duplicates:
+                logger.info(f"{len(duplicates)} {source.name}(s) were already stored")
+
+            if originals is not None and source.original:
+                orig_failed, _ = insert_many_unordered(
+                    originals, [source.original(record) for _, record, _ in saved]
+                )
+                if orig_failed:
+                    logger.error(f"Failed to save {len(orig_failed)} original record(s)")
+
+            update_rollups(rollups, source.rollup, [document for _, _, document in saved])
+            publish(outbox, source.name, [document for _, _, document in saved])
+
+            remember(
+                [document for i, (_, _, document) in enumerate(pending) if i not in failed],
+                source.collection,
+            )
+            to_delete.extend(
+                receipt_handle
+                for i, (receipt_handle, _, _) in enumerate(pending)
+                if i not in failed
+            )
+            back_off(visibility, [by_receipt[pending[i][0]] for i in failed])
+
+        except PyMongoError as e:
+            logger.error(f"MongoDB error: {str(e)}", exc_info=True)
+            back_off(visibility, [by_receipt[handle] for handle, _, _ in pending])
+
+    deleted = visibility.complete(to_delete)
+    logger.info(f"{deleted} {source.name} message(s) have been dequeued.")
+    return deleted
+
+
+def batch_committer(
+    source: CommitSource, database: Any
+) -> Callable[[List[Dict[str, Any]], VisibilityManager], int]:
+    """
+    Bind commit_batch to a source and a database's collections for a commit loop.
+
+    Args:
+        source: Source of the messages
+        database: Database instance
+
+    Returns:
+        Function committing one received batch: (messages, visibility) -> messages dequeued
+    """
+    collection = database[source.collection]
+    originals = database[source.originals] if source.originals else None
+    quarantine = get_quarantine(database)
+    rollups = get_rollups(database, source.rollup)
+    outbox = get_outbox(database)
+
+    def commit(messages: List[Dict[str, Any]], visibility: VisibilityManager) -> int:
+        return commit_batch(
+            source,
+            messages,
+            collection,
+            visibility,
+            originals=originals,
+            quarantine=quarantine,
+            rollups=rollups,
+            outbox=outbox,
+        )
+
+    return commit
+
+
+def process_queue_messages(
+    source: CommitSource,
+    sqs: Any,
+    queue_url: str,
+    max_messages: int = TIMES_TO_LOOP,
+    context: Any = None,
+) -> tuple:
+    """
+    Process messages from one SQS queue and write them to MongoDB.
+
+    Args:
+        source: Source of the queue's messages
+        sqs: SQS client
+        queue_url: Queue URL
+        max_messages: Maximum number of messages to receive in this run
+        context: Lambda context, used to stop before the invocation times out
+
+    Returns:
+        Tuple of (messages_processed, elapsed_time_ms)
+    """
+    start_time = time.time()
+    times_looped = 0
+
+    # Get MongoDB database using singleton connection
+    database = MongoDBConnection.get_database()
+    logger.info("MongoDB connection initialized...")
+    ensure_indexes_once(database)
+
+    commit = batch_committer(source, database)
+
+    poller = LongPoller(sqs, queue_url, visibility_timeout=BATCH_VISIBILITY_TIMEOUT)
+    messages_received = 0
+
+    try:
+        with VisibilityManager(sqs, queue_url) as visibility:
+            while messages_received < max_messages:
+                if not has_time_remaining(context):
+                    logger.info("Approaching Lambda timeout, stopping early")
+                    break
+
+                # Long-poll the queue; only give up after several empty receives
+                messages = poller.receive(max_messages - messages_received)
+
+                if not messages:
+                    if poller.exhausted:
+                        logger.info("No more messages in queue")
+                        break
+                    continue
+
+                messages_received += len(messages)
+                visibility.track(messages)
+
+                times_looped += commit(messages, visibility)
+
+    except Exception as e:
+        logger.error(f"Error in process_queue_messages: {str(e)}", exc_info=True)
+        raise
+
+    elapsed_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+    return times_looped, elapsed_time
+
+
+def handle_commit_event(
+    function_name: str,
+    source: CommitSource,
+    sqs: Any,
+    queue_url: str,
+    event: Dict[str, Any],
+    context: Any,
+) -> Dict[str, Any]:
+    """
+    Lambda handler body of a single-queue commit function.
+
+    Args:
+        function_name: Function name used in the logs
+        source: Source of the queue's messages
+        sqs: SQS client
+        queue_url: Queue URL
+        event: EventBridge scheduled event, SQS trigger, self-chained invocation
+               or warm-up event
+        context: Lambda context
+
+    Returns:
+        Response with processing statistics
+    """
+    try:
+        if is_warmup_event(event):
+            primed = prime_connections(sqs, queue_url, force=True)
+            return {"statusCode": 200, "body": json.dumps({"warmup": True, "primed": primed})}
+
+        logger.info(f"Starting {function_name} processing...")
+
+        # Size the run from the queue depth; skip idle polls entirely
+        depth = get_queue_depth(sqs, queue_url)
+        if depth is not None and depth.visible == 0:
+            logger.info("Queue is empty. Nothing to process.")
+            return {
+                "statusCode": 200,
+                "body": json.dumps(
+                    {"messages_processed": 0, "elapsed_time_ms": 0, "queue_depth": 0}
+                ),
+            }
+
+        plan = plan_run(depth or QueueDepth(visible=TIMES_TO_LOOP), event)
+        logger.info(
+            f"Queue depth: {plan.queue_depth}, processing up to {plan.max_messages} "
+            f"messages, starting {plan.workers_to_start} worker(s)"
+        )
+
+        # Fan out parallel workers for large backlogs
+        workers_started = invoke_workers(
+            context, plan.workers_to_start, plan.chain_depth + 1
+        )
+
+        times_looped, elapsed_ms = process_queue_messages(
+            source, sqs, queue_url, plan.max_messages, context
+        )
+
+        logger.info("-------------------------------")
+        logger.info(f"Time elapsed for {times_looped} entries: {elapsed_ms}ms")
+
+        # Keep draining if the backlog is still over the threshold
+        if chain_if_backlog(sqs, queue_url, context, plan):
+            workers_started += 1
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {
+                    "messages_processed": times_looped,
+                    "elapsed_time_ms": elapsed_ms,
+                    "queue_depth": plan.queue_depth,
+                    "workers_started": workers_started,
+                }
+            ),
+        }
+
+    except Exception as e:
+        logger.error(f"Error in {function_name}: {str(e)}", exc_info=True)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
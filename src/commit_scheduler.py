@@ -0,0 +1,234 @@
+"""
+Adaptive scheduling for the commit Lambda functions.
+Sizes each run from the queue depth and self-chains extra invocations
+when the backlog is over a threshold, up to a concurrency cap.
+
+The scheduled (EventBridge) invocation is the root of a run. When the backlog
+is large and no other workers are active it fans out parallel workers, and
+every worker re-invokes itself once on exit while the backlog remains. A root
+that starts while other workers are active (messages in flight) drains one
+run and does not chain, so only one set of chains is ever alive and the
+number of concurrent workers stays at or below MAX_COMMIT_CONCURRENCY.
+Reserved concurrency on the functions enforces the same cap.
+"""
+
+import json
+import logging
+import math
+import os
+import boto3
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger()
+
+# Scheduling configuration
+SELF_CHAIN_ENABLED = os.environ.get("SELF_CHAIN_ENABLED", "true").lower() == "true"
+SELF_CHAIN_THRESHOLD = int(os.environ.get("SELF_CHAIN_THRESHOLD", "200"))
+MAX_COMMIT_CONCURRENCY = int(os.environ.get("MAX_COMMIT_CONCURRENCY", "4"))
+MAX_CHAIN_DEPTH = int(os.environ.get("MAX_CHAIN_DEPTH", "50"))
+MESSAGES_PER_RUN = int(os.environ.get("MESSAGES_PER_RUN", "1000"))
+TIME_SAFETY_MARGIN_MS = int(os.environ.get("TIME_SAFETY_MARGIN_MS", "30000"))
+
+CHAIN_EVENT_SOURCE = "feedback.commit-scheduler"
+WARMUP_EVENT_SOURCE = "feedback.warmup"
+
+_lambda_client = None
+
+
+def get_lambda_client():
+    """Get or create the Lambda client used for self-invocation."""
+    global _lambda_client
+    if _lambda_client is None:
+        _lambda_client = boto3.client("lambda")
+    return _lambda_client
+
+
+@dataclass
+class QueueDepth:
+    """Approximate queue depth as reported by SQS."""
+
+    visible: int = 0
+    in_flight: int = 0
+
+
+@dataclass
+class RunPlan:
+    """How much work a single commit invocation should do."""
+
+    queue_depth: int
+    max_messages: int
+    workers_to_start: int
+    chain_depth: int
+    # False for a root started while other workers are active
+    may_chain: bool = True
+
+
+def get_queue_depth(sqs: Any, queue_url: str) -> Optional[QueueDepth]:
+    """
+    Read the approximate number of visible and in-flight messages.
+
+    Args:
+        sqs: SQS client
+        queue_url: Queue URL
+
+    Returns:
+        QueueDepth, or None if the attributes could not be read
+    """
+    try:
+        response = sqs.get_queue_attributes(
+            QueueUrl=queue_url,
+            AttributeNames=[
+                "ApproximateNumberOfMessages",
+                "ApproximateNumberOfMessagesNotVisible",
+            ],
+        )
+        attributes = response.get("Attributes", {})
+        return QueueDepth(
+            visible=int(attributes.get("ApproximateNumberOfMessages", 0)),
+            in_flight=int(attributes.get("ApproximateNumberOfMessagesNotVisible", 0)),
+        )
+    except Exception as e:
+        logger.warning(f"Failed to read queue depth: {str(e)}")
+        return None
+
+
+def is_chained_event(event: Dict[str, Any]) -> bool:
+    """Check whether an event was sent by a previous commit invocation."""
+    return isinstance(event, dict) and event.get("source") == CHAIN_EVENT_SOURCE
+
+
+def is_warmup_event(event: Dict[str, Any]) -> bool:
+    """Check whether an event only asks the function to warm up."""
+    return isinstance(event, dict) and (
+        event.get("source") == WARMUP_EVENT_SOURCE or event.get("warmup") is True
+    )
+
+
+def plan_run(depth: QueueDepth, event: Dict[str, Any]) -> RunPlan:
+    """
+    Size the current invocation and decide how many parallel workers to start.
+
+    Only the root (scheduled) invocation fans out, and only when no other
+    workers appear to be active (no in-flight messages). Chained workers keep
+    the pool at its current size by re-invoking themselves on exit; a root
+    that finds workers active leaves the chaining to them.
+
+    Args:
+        depth: Current queue depth
+        event: Lambda event
+
+    Returns:
+        RunPlan for this invocation
+    """
+    chained = is_chained_event(event)
+    chain_depth = int(event.get("chainDepth", 0)) if chained else 0
+    max_messages = max(1, min(depth.visible, MESSAGES_PER_RUN))
+
+    workers_to_start = 0
+    if (
+        SELF_CHAIN_ENABLED
+        and not chained
+        and depth.visible > SELF_CHAIN_THRESHOLD
+        and depth.in_flight == 0
+    ):
+        wanted = math.ceil(depth.visible / MESSAGES_PER_RUN) - 1
+        workers_to_start = max(0, min(MAX_COMMIT_CONCURRENCY - 1, wanted))
+
+    return RunPlan(
+        queue_depth=depth.visible,
+        max_messages=max_messages,
+        workers_to_start=workers_to_start,
+        chain_depth=chain_depth,
+        may_chain=chained or depth.in_flight == 0,
+    )
+
+
+def invoke_workers(context: Any, count: int, chain_depth: int) -> int:
+    """
+    Asynchronously invoke the current function `count` times.
+
+    Args:
+        context: Lambda context (provides the function name)
+        count: Number of invocations
+        chain_depth: Chain depth to record in the invocation payload
+
+    Returns:
+        Number of invocations successfully started
+    """
+    if count <= 0 or not SELF_CHAIN_ENABLED or context is None:
+        return 0
+
+    payload = json.dumps({"source": CHAIN_EVENT_SOURCE, "chainDepth": chain_depth})
+    started = 0
+    for _ in range(count):
+        try:
+            get_lambda_client().invoke(
+                FunctionName=context.function_name,
+                InvocationType="Event",
+                Payload=payload,
+            )
+            started += 1
+        except Exception as e:
+            logger.error(f"Failed to invoke commit worker: {str(e)}")
+            break
+
+    logger.info(f"Started {started} commit worker(s) at chain depth {chain_depth}")
+    return started
+
+
+def can_chain(plan: RunPlan) -> bool:
+    """Check whether the invocation may start a follow-up, logging why not."""
+    if not plan.may_chain:
+        logger.info("Other commit workers are active, leaving the backlog to them")
+        return False
+    if plan.chain_depth >= MAX_CHAIN_DEPTH:
+        logger.info("Maximum chain depth reached, waiting for next scheduled run")
+        return False
+    return True
+
+
+def chain_if_backlog(sqs: Any, queue_url: str, context: Any, plan: RunPlan) -> bool:
+    """
+    Re-invoke the current function once if the backlog is still over the threshold.
+
+    Args:
+        sqs: SQS client
+        queue_url: Queue URL
+        context: Lambda context
+        plan: Plan the current invocation ran with
+
+    Returns:
+        True if a follow-up invocation was started
+    """
+    # Checked before the depth read so runs that cannot chain skip the SQS call
+    if not can_chain(plan):
+        return False
+    return chain_for_depth(get_queue_depth(sqs, queue_url), context, plan)
+
+
+def chain_for_depth(depth: Optional[QueueDepth], context: Any, plan: RunPlan) -> bool:
+    """
+    Re-invoke the current function once if a backlog just read is over the threshold.
+
+    Args:
+        depth: Remaining depth (None if it could not be read)
+        context: Lambda context
+        plan: Plan the current invocation ran with
+
+    Returns:
+        True if a follow-up invocation was started
+    """
+    if not can_chain(plan):
+        return False
+    if depth is None or depth.visible <= SELF_CHAIN_THRESHOLD:
+        return False
+
+    return invoke_workers(context, 1, plan.chain_depth + 1) == 1
+
+
+def has_time_remaining(context: Any) -> bool:
+    """Check whether the invocation has time left for another message."""
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return True
+    return context.get_remaining_time_in_millis() > TIME_SAFETY_MARGIN_MS
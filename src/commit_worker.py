@@ -0,0 +1,267 @@
+"""
+CommitWorker Lambda Function
+Drains the problem and TopTask queues in a single invocation.
+
+Trigger: EventBridge (scheduled) or self-chained invocation
+Output: MongoDB problem / originalproblem / toptasksurvey collections
+
+Replaces the two separately scheduled commit loops: one cold start, one SSM
+fetch and one DocumentDB connection pool serve both queues. Each queue commits
+through the shared pipeline (commit_pipeline.py) for its source, while
+the invocation's message and time budgets are shared. Receives are
+interleaved with a smooth weighted round robin, weighted by each queue's
+remaining depth, so a backlog in one queue uses the capacity the other
+leaves idle. A queue drops out of the rotation once its poller is exhausted.
+
+problem_commit and top_task_survey_commit keep their own handlers for
+single-queue runs and the DLQ replay tool.
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from db_utils import MongoDBConnection, prime_connections
+from indexes import ensure_indexes_once
+from commit_scheduler import (
+    QueueDepth,
+    can_chain,
+    chain_for_depth,
+    get_queue_depth,
+    has_time_remaining,
+    invoke_workers,
+    is_warmup_event,
+    plan_run,
+)
+from queue_poller import LongPoller
+from visibility_manager import BATCH_VISIBILITY_TIMEOUT, VisibilityManager
+import problem_commit
+import top_task_survey_commit
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Queues drained by this worker, in rotation order
+COMMIT_WORKER_QUEUES = os.environ.get("COMMIT_WORKER_QUEUES", "problem,toptask")
+# Assumed depth when a queue's attributes cannot be read
+DEFAULT_QUEUE_DEPTH = 100
+
+
+@dataclass
+class CommitQueue:
+    """A queue drained by the worker and the commit path for its messages."""
+
+    name: str
+    sqs: Any
+    queue_url: str
+    # database -> (messages, visibility) -> messages dequeued
+    committer: Callable[[Any], Callable[[List[Dict[str, Any]], VisibilityManager], int]]
+
+
+def commit_queues() -> List[CommitQueue]:
+    """The configured queues, bound to their commit modules' clients."""
+    available = {
+        "problem": CommitQueue(
+            "problem", problem_commit.sqs, problem_commit.QUEUE_URL, problem_commit.batch_committer
+        ),
+        "toptask": CommitQueue(
+            "toptask",
+            top_task_survey_commit.sqs,
+            top_task_survey_commit.QUEUE_URL,
+            top_task_survey_commit.batch_committer,
+        ),
+    }
+    names = [name.strip() for name in COMMIT_WORKER_QUEUES.split(",") if name.strip()]
+    return [available[name] for name in names]
+
+
+class WeightedScheduler:
+    """
+    Smooth weighted round robin: every pick adds each queue's weight to its
+    credit and takes the queue with the most credit, so picks interleave in
+    proportion to the weights instead of arriving in bursts.
+    """
+
+    def __init__(self, weights: Dict[str, int]):
+        self.weights = {name: max(1, weight) for name, weight in weights.items()}
+        self.credit = {name: 0 for name in self.weights}
+
+    def next(self) -> Optional[str]:
+        """Name of the queue to receive from next, or None when none are left."""
+        if not self.weights:
+            return None
+        total = sum(self.weights.values())
+        for name, weight in self.weights.items():
+            self.credit[name] += weight
+        chosen = max(self.credit, key=self.credit.get)
+        self.credit[chosen] -= total
+        return chosen
+
+    def consumed(self, name: str, count: int) -> None:
+        """Lower a queue's weight by the messages just received from it."""
+        if name in self.weights:
+            self.weights[name] = max(1, self.weights[name] - count)
+
+    def remove(self, name: str) -> None:
+        self.weights.pop(name, None)
+        self.credit.pop(name, None)
+
+
+def process_queues(
+    queues: List[CommitQueue],
+    depths: Dict[str, int],
+    max_messages: int,
+    context: Any = None,
+) -> Dict[str, int]:
+    """
+    Drain several queues with one database connection and one budget.
+
+    Args:
+        queues: Queues to drain
+        depths: Visible messages per queue name; queues at 0 are skipped
+        max_messages: Maximum number of messages to receive across all queues
+        context: Lambda context, used to stop before the invocation times out
+
+    Returns:
+        Messages processed per queue name
+    """
+    processed = {queue.name: 0 for queue in queues}
+    active = [queue for queue in queues if depths.get(queue.name, 0) > 0]
+    if not active:
+        return processed
+
+    database = MongoDBConnection.get_database()
+    logger.info("MongoDB connection initialized...")
+    ensure_indexes_once(database)
+
+    by_name = {queue.name: queue for queue in active}
+    commits = {queue.name: queue.committer(database) for queue in active}
+    pollers = {
+        queue.name: LongPoller(queue.sqs, queue.queue_url, visibility_timeout=BATCH_VISIBILITY_TIMEOUT)
+        for queue in active
+    }
+    scheduler = WeightedScheduler({queue.name: depths[queue.name] for queue in active})
+    messages_received = 0
+
+    with ExitStack() as stack:
+        visibility = {
+            name: stack.enter_context(VisibilityManager(queue.sqs, queue.queue_url))
+            for name, queue in by_name.items()
+        }
+        while messages_received < max_messages:
+            if not has_time_remaining(context):
+                logger.info("Approaching Lambda timeout, stopping early")
+                break
+
+            name = scheduler.next()
+            if name is None:
+                logger.info("No more messages in any queue")
+                break
+
+            poller = pollers[name]
+            messages = poller.receive(max_messages - messages_received)
+            if not messages:
+                if poller.exhausted:
+                    logger.info(f"No more messages in {name} queue")
+                    scheduler.remove(name)
+                continue
+
+            messages_received += len(messages)
+            scheduler.consumed(name, len(messages))
+            visibility[name].track(messages)
+            processed[name] += commits[name](messages, visibility[name])
+
+    return processed
+
+
+def read_depths(queues: List[CommitQueue]) -> Dict[str, Optional[QueueDepth]]:
+    """Queue depth per queue name (None where it could not be read)."""
+    return {queue.name: get_queue_depth(queue.sqs, queue.queue_url) for queue in queues}
+
+
+def total_depth(depths: Dict[str, Optional[QueueDepth]]) -> QueueDepth:
+    """Combined depth; unreadable queues count as DEFAULT_QUEUE_DEPTH visible."""
+    total = QueueDepth()
+    for depth in depths.values():
+        depth = depth or QueueDepth(visible=DEFAULT_QUEUE_DEPTH)
+        total.visible += depth.visible
+        total.in_flight += depth.in_flight
+    return total
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for CommitWorker function.
+
+    Args:
+        event: EventBridge scheduled event, self-chained invocation or warm-up event
+        context: Lambda context
+
+    Returns:
+        Response with processing statistics
+    """
+    try:
+        queues = commit_queues()
+        if is_warmup_event(event):
+            primed = all(
+                [prime_connections(queue.sqs, queue.queue_url, force=True) for queue in queues]
+            )
+            return {"statusCode": 200, "body": json.dumps({"warmup": True, "primed": primed})}
+
+        logger.info("Starting CommitWorker processing...")
+        start_time = time.time()
+
+        # Size the run from the combined depth; skip idle polls entirely
+        depths = read_depths(queues)
+        total = total_depth(depths)
+        visible = {
+            name: depth.visible if depth else DEFAULT_QUEUE_DEPTH for name, depth in depths.items()
+        }
+        if total.visible == 0:
+            logger.info("Queues are empty. Nothing to process.")
+            return {
+                "statusCode": 200,
+                "body": json.dumps(
+                    {"messages_processed": 0, "elapsed_time_ms": 0, "queue_depth": visible}
+                ),
+            }
+
+        plan = plan_run(total, event)
+        logger.info(
+            f"Queue depth: {visible}, processing up to {plan.max_messages} "
+            f"messages, starting {plan.workers_to_start} worker(s)"
+        )
+
+        # Fan out parallel workers for large backlogs
+        workers_started = invoke_workers(context, plan.workers_to_start, plan.chain_depth + 1)
+
+        processed = process_queues(queues, visible, plan.max_messages, context)
+        elapsed_ms = (time.time() - start_time) * 1000
+
+        logger.info("-------------------------------")
+        logger.info(f"Time elapsed for {sum(processed.values())} entries: {elapsed_ms}ms {processed}")
+
+        # Keep draining if the combined backlog is still over the threshold
+        if can_chain(plan) and chain_for_depth(total_depth(read_depths(queues)), context, plan):
+            workers_started += 1
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {
+                    "messages_processed": sum(processed.values()),
+                    "by_queue": processed,
+                    "elapsed_time_ms": elapsed_ms,
+                    "queue_depth": visible,
+                    "workers_started": workers_started,
+                }
+            ),
+        }
+
+    except Exception as e:
+        logger.error(f"Error in CommitWorker: {str(e)}", exc_info=True)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
@@ -2,14 +2,39 @@
 MongoDB connection utilities for Lambda functions.
 Provides singleton connection pooling for efficient database operations.
 Fetches credentials securely from SSM Parameter Store.
+
+Also provides the work-queue claim API used by downstream processors
+(AirTable sync, PII scrub, auto-tagging): documents whose processing flag is
+still unset are claimed under a time-limited lease, then completed or released.
 """
 
+import logging
 import os
+import time
+import uuid
 import boto3
-from typing import Optional
+import pymongo
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import quote_plus
-from pymongo import MongoClient
+from pymongo import ASCENDING, MongoClient, ReturnDocument
+from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger()
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Connection priming during Lambda init (commit Lambdas)
+PRIME_CONNECTIONS = os.environ.get("PRIME_CONNECTIONS", "true").lower() == "true"
+PRIME_TIMEOUT_SECONDS = float(os.environ.get("PRIME_TIMEOUT_SECONDS", "5"))
+
+# Claim configuration
+CLAIM_LEASE_SECONDS = int(os.environ.get("CLAIM_LEASE_SECONDS", "300"))
+
+# Unprocessed flag values: legacy string documents and typed-storage documents
+UNPROCESSED_VALUES = (False, "false")
 
 
 def get_mongo_credentials():
@@ -63,6 +88,7 @@ class MongoDBConnection:
 
     _client: Optional[MongoClient] = None
     _database: Optional[Database] = None
+    _primed: bool = False
 
     @classmethod
     def get_client(cls) -> MongoClient:
@@ -130,6 +156,30 @@ class MongoDBConnection:
         except Exception as e:
             raise Exception(f"Failed to get database instance: {str(e)}")
 
+    @classmethod
+    def prime(cls, timeout: float = PRIME_TIMEOUT_SECONDS) -> bool:
+        """
+        Build the client and run a ping, so the credential fetch, DNS, TLS
+        handshake and authentication are done before the first query.
+        Never raises: on failure the next get_database() call retries.
+
+        Args:
+            timeout: Seconds to wait for the ping
+
+        Returns:
+            True if the database answered the ping
+        """
+        if cls._primed:
+            return True
+        try:
+            database = cls.get_database()
+            with pymongo.timeout(timeout):
+                database.command("ping")
+            cls._primed = True
+        except Exception as e:
+            logger.warning(f"MongoDB priming failed: {str(e)}")
+        return cls._primed
+
     @classmethod
     def close(cls):
         """Close MongoDB connection."""
@@ -137,3 +187,246 @@ class MongoDBConnection:
             cls._client.close()
             cls._client = None
             cls._database = None
+            cls._primed = False
+
+
+def prime_connections(sqs: Any = None, queue_url: str = "", force: bool = False) -> bool:
+    """
+    Open the MongoDB and SQS connections ahead of the first batch.
+
+    Called at module load, so the work happens in the Lambda init phase
+    instead of on the billed invoke path. Without `force` it only runs inside
+    Lambda and when PRIME_CONNECTIONS is on, so CLI tools and bulk-import
+    workers that import a commit module do not connect. Failures are logged
+    and left to the first invocation.
+
+    Args:
+        sqs: Optional SQS client to open a connection for
+        queue_url: Queue the client reads from
+        force: Prime regardless of the environment (warm-up events)
+
+    Returns:
+        True if MongoDB is primed
+    """
+    if not force and not (PRIME_CONNECTIONS and os.environ.get("AWS_LAMBDA_FUNCTION_NAME")):
+        return False
+
+    start_time = time.time()
+    primed = MongoDBConnection.prime()
+    if sqs is not None and queue_url:
+        try:
+            sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=["QueueArn"])
+        except Exception as e:
+            logger.warning(f"SQS priming failed: {str(e)}")
+    logger.info(f"Connections primed in {(time.time() - start_time) * 1000:.0f}ms (MongoDB: {primed})")
+    return primed
+
+
+def insert_many_unordered(
+    collection: Collection, documents: List[Dict[str, Any]]
+) -> Tuple[List[int], List[int]]:
+    """
+    Insert documents with a single unordered bulk insert.
+    One bad document does not prevent the rest of the batch from being written.
+
+    Args:
+        collection: Target collection
+        documents: Documents to insert
+
+    Returns:
+        Tuple of (failed, duplicates): indexes (into documents) of the documents
+        that failed to insert, and of those rejected by a unique index because
+        an identical document is already stored
+
+    Raises:
+        PyMongoError: For failures other than per-document write errors
+    """
+    if not documents:
+        return [], []
+
+    try:
+        collection.insert_many(documents, ordered=False)
+        return [], []
+    except BulkWriteError as e:
+        if e.details.get("writeConcernErrors"):
+            raise
+        failed = set()
+        duplicates = set()
+        for error in e.details.get("writeErrors", []):
+            if error.get("code") == DUPLICATE_KEY_ERROR:
+                duplicates.add(error["index"])
+            else:
+                failed.add(error["index"])
+        return sorted(failed), sorted(duplicates)
+
+
+def lease_field(flag: str) -> str:
+    """Name of the lease-expiry field for a processing flag."""
+    return f"{flag}LeaseUntil"
+
+
+def claim_field(flag: str) -> str:
+    """Name of the claim-token field for a processing flag."""
+    return f"{flag}ClaimToken"
+
+
+def _claimable_filter(flag: str, value: Any, now: datetime) -> Dict[str, Any]:
+    # Equality on the flag lets the planner use the partial index for `value`
+    return {flag: value, lease_field(flag): {"$not": {"$gt": now}}}
+
+
+def claim_one(
+    collection: Collection, flag: str, lease_seconds: int = CLAIM_LEASE_SECONDS
+) -> Optional[Dict[str, Any]]:
+    """
+    Atomically claim the oldest unprocessed document for a flag.
+
+    Args:
+        collection: Collection to claim from
+        flag: Processing flag (e.g. "autoTagProcessed")
+        lease_seconds: How long the claim is held before it can be reclaimed
+
+    Returns:
+        The claimed document (with its claim token), or None if nothing is claimable
+    """
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    for value in UNPROCESSED_VALUES:
+        document = collection.find_one_and_update(
+            _claimable_filter(flag, value, now),
+            {
+                "$set": {
+                    lease_field(flag): now + timedelta(seconds=lease_seconds),
+                    claim_field(flag): token,
+                }
+            },
+            sort=[("_id", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if document is not None:
+            return document
+    return None
+
+
+def claim_batch(
+    collection: Collection,
+    flag: str,
+    limit: int,
+    lease_seconds: int = CLAIM_LEASE_SECONDS,
+) -> List[Dict[str, Any]]:
+    """
+    Claim up to `limit` unprocessed documents for a flag.
+
+    Candidates are read from the partial index, then claimed with a single
+    update_many that re-checks the lease, so concurrent workers never claim
+    the same document. Documents lost to another worker are simply skipped.
+
+    Args:
+        collection: Collection to claim from
+        flag: Processing flag (e.g. "personalInfoProcessed")
+        limit: Maximum number of documents to claim
+        lease_seconds: How long the claims are held before they can be reclaimed
+
+    Returns:
+        Claimed documents; all share one claim token (see claim_field)
+    """
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    claimed: List[Dict[str, Any]] = []
+
+    for value in UNPROCESSED_VALUES:
+        remaining = limit - len(claimed)
+        if remaining <= 0:
+            break
+
+        claimable = _claimable_filter(flag, value, now)
+        candidate_ids = [
+            document["_id"]
+            for document in collection.find(claimable, {"_id": 1})
+            .sort("_id", ASCENDING)
+            .limit(remaining)
+        ]
+        if not candidate_ids:
+            continue
+
+        collection.update_many(
+            {"_id": {"$in": candidate_ids}, **claimable},
+            {
+                "$set": {
+                    lease_field(flag): now + timedelta(seconds=lease_seconds),
+                    claim_field(flag): token,
+                }
+            },
+        )
+        claimed.extend(
+            collection.find({"_id": {"$in": candidate_ids}, claim_field(flag): token})
+        )
+
+    return claimed
+
+
+def complete_claims(
+    collection: Collection,
+    flag: str,
+    document_ids: List[Any],
+    token: str,
+    value: Optional[Any] = None,
+) -> int:
+    """
+    Mark claimed documents as processed and clear their lease.
+    Documents whose lease expired and were reclaimed by another worker are not touched.
+
+    Args:
+        collection: Collection the documents were claimed from
+        flag: Processing flag
+        document_ids: _id values of the processed documents
+        token: Claim token returned with the documents
+        value: Processed value to store (defaults to each document's own
+            representation, see models.processed_value: True where the flag
+            is a boolean, "true" otherwise, so a partial migration stays consistent)
+
+    Returns:
+        Number of documents marked as processed
+    """
+    if not document_ids:
+        return 0
+
+    claimed = {"_id": {"$in": document_ids}, claim_field(flag): token}
+    unset = {lease_field(flag): "", claim_field(flag): ""}
+    if value is not None:
+        result = collection.update_many(claimed, {"$set": {flag: value}, "$unset": unset})
+        return result.modified_count
+
+    # One update per stored representation (no pipeline updates on DocumentDB)
+    typed = collection.update_many(
+        {**claimed, flag: {"$type": "bool"}}, {"$set": {flag: True}, "$unset": unset}
+    )
+    legacy = collection.update_many(
+        {**claimed, flag: {"$not": {"$type": "bool"}}}, {"$set": {flag: "true"}, "$unset": unset}
+    )
+    return typed.modified_count + legacy.modified_count
+
+
+def release_claims(
+    collection: Collection, flag: str, document_ids: List[Any], token: str
+) -> int:
+    """
+    Release claims without processing so the documents can be claimed again immediately.
+
+    Args:
+        collection: Collection the documents were claimed from
+        flag: Processing flag
+        document_ids: _id values to release
+        token: Claim token returned with the documents
+
+    Returns:
+        Number of documents released
+    """
+    if not document_ids:
+        return 0
+
+    result = collection.update_many(
+        {"_id": {"$in": document_ids}, claim_field(flag): token},
+        {"$unset": {lease_field(flag): "", claim_field(flag): ""}},
+    )
+    return result.modified_count
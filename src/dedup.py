@@ -0,0 +1,204 @@
+"""
+Content-hash deduplication for the commit Lambda functions.
+
+Double-clicked submits and repeated widget emails produce identical feedback
+documents. Each document with a free-text comment gets a `contentHash` over
+its normalized content fields plus a short time-of-day window. Repeats are
+dropped before they reach MongoDB using a bounded in-memory LRU, which
+survives warm invocations. The unique `contentHash` index catches repeats
+seen by other containers.
+
+Submissions without a comment are never hashed: identical answers from two
+respondents are expected (survey choices, a bare "not helpful") and must
+both be counted.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger()
+
+# Deduplication configuration
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_CACHE_SIZE = int(os.environ.get("DEDUP_CACHE_SIZE", "10000"))
+DEDUP_WINDOW_MINUTES = int(os.environ.get("DEDUP_WINDOW_MINUTES", "5"))
+
+HASH_FIELD = "contentHash"
+
+# Fields that identify a submission; flags, origin and timestamps are excluded
+CONTENT_FIELDS = {
+    "problem": [
+        "url",
+        "title",
+        "institution",
+        "section",
+        "problem",
+        "problemDetails",
+        "yesno",
+    ],
+    "toptasksurvey": [
+        "surveyReferrer",
+        "language",
+        "screener",
+        "dept",
+        "theme",
+        "themeOther",
+        "grouping",
+        "task",
+        "taskOther",
+        "taskSatisfaction",
+        "taskEase",
+        "taskCompletion",
+        "taskImprove",
+        "taskImproveComment",
+        "taskWhyNot",
+        "taskWhyNotComment",
+        "taskSampling",
+    ],
+}
+
+# Free-text fields; only submissions with one of these filled in are deduplicated
+COMMENT_FIELDS = {
+    "problem": ["problemDetails"],
+    "toptasksurvey": ["taskImproveComment", "taskWhyNotComment"],
+}
+
+WINDOW_FIELDS = {
+    "problem": ("problemDate", "timeStamp"),
+    "toptasksurvey": ("dateTime", "timeStamp"),
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RecentHashes:
+    """Bounded LRU set of recently committed content hashes."""
+
+    def __init__(self, max_size: int = DEDUP_CACHE_SIZE):
+        self.max_size = max(1, max_size)
+        self._hashes: "OrderedDict[str, None]" = OrderedDict()
+
+    def __contains__(self, content_hash: str) -> bool:
+        if content_hash in self._hashes:
+            self._hashes.move_to_end(content_hash)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add(self, content_hash: str) -> None:
+        self._hashes[content_hash] = None
+        self._hashes.move_to_end(content_hash)
+        while len(self._hashes) > self.max_size:
+            self._hashes.popitem(last=False)
+
+
+# One cache per collection, kept across warm invocations
+_recent: Dict[str, RecentHashes] = {}
+
+
+def get_recent_hashes(collection: str) -> RecentHashes:
+    """Get the per-container hash cache for a collection."""
+    if collection not in _recent:
+        _recent[collection] = RecentHashes()
+    return _recent[collection]
+
+
+def normalize(value: Any) -> str:
+    """Case-fold and collapse whitespace so trivial differences hash the same."""
+    return _WHITESPACE.sub(" ", str(value or "")).strip().casefold()
+
+
+def window_bucket(date_str: str, time_str: str) -> str:
+    """
+    Time-window key for a submission: the date plus the index of the
+    DEDUP_WINDOW_MINUTES bucket within the day. Windows of 1440 minutes or
+    more collapse to the date.
+    """
+    if DEDUP_WINDOW_MINUTES >= 1440:
+        return date_str
+    try:
+        hours, minutes = time_str.split(":")[:2]
+        minute_of_day = int(hours) * 60 + int(minutes)
+    except (ValueError, AttributeError):
+        return date_str
+    return f"{date_str}/{minute_of_day // max(1, DEDUP_WINDOW_MINUTES)}"
+
+
+def has_comment(document: Dict[str, Any], collection: str) -> bool:
+    """Whether a document carries free text, which makes a repeat a duplicate."""
+    return any(normalize(document.get(name)) for name in COMMENT_FIELDS[collection])
+
+
+def content_hash(document: Dict[str, Any], collection: str) -> str:
+    """
+    Hash the normalized content fields and time-window bucket of a document.
+
+    Args:
+        document: Document as produced by the model's to_dict()
+        collection: Collection name (problem or toptasksurvey)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    date_field, time_field = WINDOW_FIELDS[collection]
+    parts = [window_bucket(document.get(date_field, ""), document.get(time_field, ""))]
+    parts.extend(normalize(document.get(name)) for name in CONTENT_FIELDS[collection])
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def drop_duplicates(
+    documents: List[Dict[str, Any]], collection: str
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Stamp documents with their content hash and drop repeats.
+
+    A document is a repeat if its hash is in the container's recent-hash cache
+    or appears earlier in the same batch. Documents without a comment are kept
+    unhashed.
+
+    Args:
+        documents: Documents to be inserted (modified in place)
+        collection: Collection name
+
+    Returns:
+        The documents, with repeats replaced by None (positions are preserved)
+    """
+    if not DEDUP_ENABLED:
+        return list(documents)
+
+    recent = get_recent_hashes(collection)
+    seen_in_batch = set()
+    kept: List[Optional[Dict[str, Any]]] = []
+
+    for document in documents:
+        if not has_comment(document, collection):
+            kept.append(document)
+            continue
+        digest = content_hash(document, collection)
+        if digest in recent or digest in seen_in_batch:
+            kept.append(None)
+            continue
+        seen_in_batch.add(digest)
+        document[HASH_FIELD] = digest
+        kept.append(document)
+
+    dropped = kept.count(None)
+    if dropped:
+        logger.info(f"Dropped {dropped} duplicate {collection} submission(s)")
+    return kept
+
+
+def remember(documents: List[Dict[str, Any]], collection: str) -> None:
+    """Record the hashes of committed (or already stored) documents."""
+    if not DEDUP_ENABLED:
+        return
+    recent = get_recent_hashes(collection)
+    for document in documents:
+        if document.get(HASH_FIELD):
+            recent.add(document[HASH_FIELD])
@@ -0,0 +1,240 @@
+"""
+Dead-letter queue replay.
+Drains problem_queue_dlq / toptask_queue_dlq in batches, re-parses each
+message with the current parsers, bulk-writes the good records through the
+regular commit path, and quarantines poison messages with a reason code.
+
+Usage:
+    python dlq_replay.py --queue problem --dry-run
+    python dlq_replay.py --queue toptask --rate 500 --max-messages 20000
+
+Lambda event:
+    {"queue": "problem", "dry_run": false, "rate": 0, "max_messages": 50000}
+"""
+
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from pymongo.database import Database
+from commit_pipeline import SOURCES, commit_batch
+from commit_scheduler import has_time_remaining
+from db_utils import MongoDBConnection
+from indexes import ensure_indexes_once
+from queue_poller import LongPoller
+from sqs_utils import get_sqs_client
+from quarantine import QUARANTINE_COLLECTION, classify_exception
+from rollups import get_rollups
+from outbox import get_outbox
+from visibility_manager import BATCH_VISIBILITY_TIMEOUT, VisibilityManager
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Replay configuration
+PROBLEM_DLQ_URL = os.environ.get("PROBLEM_DLQ_URL", "")
+TOPTASK_DLQ_URL = os.environ.get("TOPTASK_DLQ_URL", "")
+REPLAY_BATCH_SIZE = int(os.environ.get("REPLAY_BATCH_SIZE", "100"))
+REPLAY_MAX_EMPTY_POLLS = 2
+
+# Dry runs hold every received message invisible until the end of the run,
+# so the same messages are not counted twice
+DRY_RUN_VISIBILITY_TIMEOUT = 900
+
+DLQ_URLS = {"problem": PROBLEM_DLQ_URL, "toptask": TOPTASK_DLQ_URL}
+
+
+def parse_for_dry_run(queue: str, body: str) -> Optional[str]:
+    """
+    Parse a message body with the current parser.
+
+    Returns:
+        None if the message would be committed, otherwise its reason code
+    """
+    source = SOURCES[queue]
+    try:
+        record = source.parse(body)
+    except Exception as e:
+        return classify_exception(e)
+    return None if record else source.rejection_reason(body)[0]
+
+
+def commit_messages(
+    queue: str,
+    messages: List[Dict[str, Any]],
+    database: Database,
+    visibility: VisibilityManager,
+) -> int:
+    """Commit a batch through the regular commit path, quarantining poison messages."""
+    source = SOURCES[queue]
+    return commit_batch(
+        source,
+        messages,
+        database[source.collection],
+        visibility,
+        originals=database[source.originals] if source.originals else None,
+        quarantine=database[QUARANTINE_COLLECTION],
+        rollups=get_rollups(database, source.rollup),
+        outbox=get_outbox(database),
+    )
+
+
+def replay(
+    queue: str,
+    queue_url: Optional[str] = None,
+    max_messages: Optional[int] = None,
+    rate: float = 0,
+    batch_size: int = REPLAY_BATCH_SIZE,
+    dry_run: bool = False,
+    context: Any = None,
+) -> Dict[str, Any]:
+    """
+    Drain a dead-letter queue.
+
+    Args:
+        queue: "problem" or "toptask"
+        queue_url: DLQ URL override (defaults to PROBLEM_DLQ_URL / TOPTASK_DLQ_URL)
+        max_messages: Optional cap on messages received
+        rate: Maximum messages per second (0 for unlimited)
+        batch_size: Messages accumulated per bulk write
+        dry_run: Parse and report only; messages are made visible again at the end
+        context: Lambda context, used to stop before the invocation times out
+
+    Returns:
+        Replay statistics
+    """
+    if queue not in DLQ_URLS:
+        raise ValueError(f"Unknown queue: {queue}")
+    queue_url = queue_url or DLQ_URLS[queue]
+    if not queue_url:
+        raise ValueError(f"No dead-letter queue URL configured for {queue}")
+
+    sqs = get_sqs_client(queue_url)
+    database = None
+    if not dry_run:
+        database = MongoDBConnection.get_database()
+        ensure_indexes_once(database)
+    visibility_timeout = DRY_RUN_VISIBILITY_TIMEOUT if dry_run else BATCH_VISIBILITY_TIMEOUT
+    poller = LongPoller(
+        sqs,
+        queue_url,
+        visibility_timeout=visibility_timeout,
+        max_empty_polls=REPLAY_MAX_EMPTY_POLLS,
+    )
+
+    start_time = time.time()
+    received = 0
+    dequeued = 0
+    reasons: Counter = Counter()
+    inspected: List[str] = []
+
+    with VisibilityManager(sqs, queue_url) as visibility:
+        while not poller.exhausted and (max_messages is None or received < max_messages):
+            if not has_time_remaining(context):
+                logger.info("Approaching Lambda timeout, stopping early")
+                break
+
+            # Accumulate one bulk-write batch
+            batch: List[Dict[str, Any]] = []
+            while len(batch) < batch_size and not poller.exhausted:
+                limit = batch_size - len(batch)
+                if max_messages is not None:
+                    limit = min(limit, max_messages - received - len(batch))
+                if limit <= 0:
+                    break
+                messages = poller.receive(limit)
+                if not dry_run:
+                    visibility.track(messages)
+                batch.extend(messages)
+
+            if not batch:
+                continue
+            received += len(batch)
+
+            if dry_run:
+                for message in batch:
+                    reasons[parse_for_dry_run(queue, message["Body"]) or "ok"] += 1
+                    inspected.append(message["ReceiptHandle"])
+            else:
+                dequeued += commit_messages(queue, batch, database, visibility)
+
+            logger.info(f"Replayed {received} message(s) from {queue} DLQ")
+
+            # Rate limit: hold the average at or below `rate` messages per second
+            if rate > 0:
+                ahead = received / rate - (time.time() - start_time)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+        # Dry run leaves the queue as it found it
+        visibility.release_many(inspected)
+
+    stats: Dict[str, Any] = {
+        "queue": queue,
+        "dry_run": dry_run,
+        "received": received,
+        "elapsed_time_ms": (time.time() - start_time) * 1000,
+    }
+    if dry_run:
+        stats["results"] = dict(reasons)
+    else:
+        stats["dequeued"] = dequeued
+        stats["left_in_queue"] = received - dequeued
+    return stats
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler to replay a dead-letter queue.
+
+    Args:
+        event: {"queue": ..., "queue_url": ..., "max_messages": ..., "rate": ...,
+                "batch_size": ..., "dry_run": ...}
+        context: Lambda context
+
+    Returns:
+        Response with replay statistics
+    """
+    try:
+        max_messages = event.get("max_messages")
+        stats = replay(
+            event.get("queue", "problem"),
+            queue_url=event.get("queue_url"),
+            max_messages=int(max_messages) if max_messages else None,
+            rate=float(event.get("rate", 0)),
+            batch_size=int(event.get("batch_size", REPLAY_BATCH_SIZE)),
+            dry_run=bool(event.get("dry_run", False)),
+            context=context,
+        )
+        return {"statusCode": 200, "body": json.dumps(stats)}
+    except Exception as e:
+        logger.error(f"Error replaying dead-letter queue: {str(e)}", exc_info=True)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a dead-letter queue")
+    parser.add_argument("--queue", required=True, choices=sorted(DLQ_URLS))
+    parser.add_argument("--queue-url", help="override the configured DLQ URL")
+    parser.add_argument("--max-messages", type=int)
+    parser.add_argument("--rate", type=float, default=0, help="messages per second")
+    parser.add_argument("--batch-size", type=int, default=REPLAY_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    response = lambda_handler(
+        {
+            "queue": args.queue,
+            "queue_url": args.queue_url,
+            "max_messages": args.max_messages,
+            "rate": args.rate,
+            "batch_size": args.batch_size,
+            "dry_run": args.dry_run,
+        },
+        None,
+    )
+    print(json.dumps(json.loads(response["body"]), indent=2))
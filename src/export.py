@@ -0,0 +1,398 @@
+"""
+Streaming bulk export of problem and TopTask feedback.
+
+Streams one source for a date range / institution (the feedback API
+filters) from a single cursor with a projection and a tuned batch size, and
+writes it as numbered part files of at most EXPORT_CHUNK_ROWS rows in CSV,
+JSONL or Parquet (needs pyarrow), to a local directory or an S3-compatible
+bucket. Memory stays constant: rows go straight to the open part file, and
+S3 parts are staged on local disk and uploaded (multipart) when complete.
+
+Documents are read in (date, _id) order on the (institution,) date, _id
+indexes. After each part a `_manifest.json` next to the parts records the
+parts written and the (date, _id) of the last exported document; running
+the same export again resumes from there, so an interrupted export (or a
+Lambda that runs out of time) only redoes the unfinished part.
+
+Usage:
+    python export.py problem ./exports/cra-jan --institution CRA --from 2025-01-01 --to 2025-01-31
+    python export.py toptask s3://bucket/exports/2025 --format parquet --from 2025-01-01
+"""
+
+import csv
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, ReadPreference
+from pymongo.database import Database
+from commit_scheduler import has_time_remaining
+from db_utils import MongoDBConnection
+from feedback_api import SOURCES, RequestError, Source, build_filter, serialize
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Export configuration
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "2000"))
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "500000"))
+# For S3-compatible stores other than AWS S3 (MinIO, LocalStack, ...)
+EXPORT_S3_ENDPOINT_URL = os.environ.get("EXPORT_S3_ENDPOINT_URL")
+
+FORMATS = {"csv": ".csv", "jsonl": ".jsonl", "parquet": ".parquet"}
+FILTER_PARAMS = ("institution", "url", "theme", "language", "from", "to")
+MANIFEST_NAME = "_manifest.json"
+
+
+def export_fields(source: Source, fields_param: str) -> List[str]:
+    """
+    Columns to export: the requested allow-listed fields, or all of them.
+
+    Raises:
+        RequestError: If a requested field is not allowed
+    """
+    if not fields_param:
+        return ["_id"] + list(source.fields)
+    requested = [name.strip() for name in fields_param.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in source.fields]
+    if unknown:
+        raise RequestError(f"Unknown field(s): {', '.join(unknown)}")
+    return ["_id"] + requested
+
+
+def cell(value: Any) -> Any:
+    """Flatten a serialized value for CSV / Parquet (lists and objects as JSON)."""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+class PartWriter:
+    """Writes rows of one part file in CSV or JSONL."""
+
+    def __init__(self, path: str, export_format: str, fields: List[str]):
+        self.path = path
+        self.fields = fields
+        self.rows = 0
+        self._handle = open(path, "w", encoding="utf-8", newline="")
+        self._csv = None
+        if export_format == "csv":
+            self._csv = csv.DictWriter(self._handle, fieldnames=fields, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self._csv is not None:
+            self._csv.writerow({key: cell(value) for key, value in row.items()})
+        else:
+            self._handle.write(json.dumps(row, ensure_ascii=False, default=str))
+            self._handle.write("\n")
+        self.rows += 1
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def require_pyarrow() -> Any:
+    """Import pyarrow, which is only needed for Parquet exports."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise RequestError("Parquet export requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+class ParquetPartWriter(PartWriter):
+    """Writes rows of one part file in Parquet, one row group per EXPORT_BATCH_SIZE rows."""
+
+    def __init__(self, path: str, export_format: str, fields: List[str]):
+        pyarrow = require_pyarrow()
+        import pyarrow.parquet
+
+        self.path = path
+        self.fields = fields
+        self.rows = 0
+        self._pyarrow = pyarrow
+        # Stored values are strings (or lists serialized to JSON); a fixed
+        # schema keeps every part readable as one dataset
+        self._schema = pyarrow.schema([(name, pyarrow.string()) for name in fields])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+        self._buffer: List[Dict[str, Any]] = []
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._buffer.append(
+            {name: None if row.get(name) is None else str(cell(row[name])) for name in self.fields}
+        )
+        self.rows += 1
+        if len(self._buffer) >= EXPORT_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffer:
+            table = self._pyarrow.Table.from_pylist(self._buffer, schema=self._schema)
+            self._writer.write_table(table)
+            self._buffer = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+class Destination:
+    """Local directory or s3://bucket/prefix receiving the parts and manifest."""
+
+    def __init__(self, location: str):
+        self.location = location.rstrip("/")
+        self.is_s3 = location.startswith("s3://")
+        if self.is_s3:
+            import boto3
+
+            self.bucket, _, self.prefix = self.location[len("s3://"):].partition("/")
+            self._s3 = boto3.client("s3", endpoint_url=EXPORT_S3_ENDPOINT_URL)
+        else:
+            os.makedirs(self.location, exist_ok=True)
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def read_manifest(self) -> Optional[Dict[str, Any]]:
+        if self.is_s3:
+            try:
+                response = self._s3.get_object(Bucket=self.bucket, Key=self._key(MANIFEST_NAME))
+            except self._s3.exceptions.NoSuchKey:
+                return None
+            return json.loads(response["Body"].read())
+        path = os.path.join(self.location, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def write_manifest(self, manifest: Dict[str, Any]) -> None:
+        body = json.dumps(manifest, indent=2)
+        if self.is_s3:
+            self._s3.put_object(
+                Bucket=self.bucket,
+                Key=self._key(MANIFEST_NAME),
+                Body=body.encode("utf-8"),
+                ContentType="application/json",
+            )
+            return
+        # Replace atomically so an interruption never leaves a torn manifest
+        path = os.path.join(self.location, MANIFEST_NAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as handle:
+            handle.write(body)
+        os.replace(path + ".tmp", path)
+
+    def staging_path(self, name: str, staging_dir: str) -> str:
+        """Where a part is written while open (final path for local exports)."""
+        return os.path.join(staging_dir if self.is_s3 else self.location, name)
+
+    def store(self, staged_path: str, name: str) -> None:
+        """Publish a completed part (S3: multipart upload, then remove the staged file)."""
+        if self.is_s3:
+            self._s3.upload_file(staged_path, self.bucket, self._key(name))
+            os.remove(staged_path)
+
+
+def resume_filter(source: Source, last: Optional[Tuple[str, str]]) -> Dict[str, Any]:
+    """Filter continuing strictly after the last exported (date, _id)."""
+    if not last:
+        return {}
+    date_value, document_id = last[0], ObjectId(last[1])
+    return {
+        "$or": [
+            {source.date_field: {"$gt": date_value}},
+            {source.date_field: date_value, "_id": {"$gt": document_id}},
+        ]
+    }
+
+
+def stream_documents(
+    database: Database,
+    source: Source,
+    params: Dict[str, str],
+    fields: List[str],
+    last: Optional[Tuple[str, str]],
+) -> Iterator[Dict[str, Any]]:
+    """Stream matching documents in (date, _id) order after `last`."""
+    query = build_filter(source, {key: params[key] for key in FILTER_PARAMS if params.get(key)})
+    after = resume_filter(source, last)
+    if after:
+        query = {"$and": [query, after]} if query else after
+
+    # Pin the index whose order matches the sort; otherwise a selective url
+    # or theme index could be chosen and force an in-memory sort
+    hint = [(source.date_field, ASCENDING), ("_id", ASCENDING)]
+    if params.get("institution"):
+        hint.insert(0, (source.institution_field, ASCENDING))
+
+    projection = {name: 1 for name in fields}
+    projection[source.date_field] = 1
+    collection = database[source.collection].with_options(
+        read_preference=ReadPreference.SECONDARY_PREFERRED
+    )
+    return (
+        collection.find(query, projection)
+        .sort([(source.date_field, ASCENDING), ("_id", ASCENDING)])
+        .hint(hint)
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+
+
+def export(
+    database: Database,
+    source_name: str,
+    location: str,
+    params: Dict[str, str],
+    export_format: str = "csv",
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+    context: Any = None,
+) -> Dict[str, Any]:
+    """
+    Export (or resume exporting) one source to part files.
+
+    Args:
+        database: Database instance
+        source_name: "problem" or "toptask"
+        location: Local directory or s3://bucket/prefix
+        params: Filters (institution, url, theme, language, from, to) and fields
+        export_format: csv, jsonl or parquet
+        chunk_rows: Maximum rows per part file
+        context: Lambda context; the export stops after the current part when time runs low
+
+    Returns:
+        Manifest (complete is False if the export stopped early; run it again to resume)
+
+    Raises:
+        RequestError: For an unknown source, format or field, or a location
+            holding a different export
+    """
+    source = SOURCES.get(source_name)
+    if source is None:
+        raise RequestError(f"Unknown source '{source_name}'")
+    if export_format not in FORMATS:
+        raise RequestError(f"Unknown format '{export_format}'")
+    if export_format == "parquet":
+        require_pyarrow()
+    fields = export_fields(source, params.get("fields", ""))
+    request = {
+        "source": source_name,
+        "format": export_format,
+        "fields": fields,
+        "filters": {key: params[key] for key in FILTER_PARAMS if params.get(key)},
+    }
+    # Validate the filters before any output is written
+    build_filter(source, request["filters"])
+
+    destination = Destination(location)
+    manifest = destination.read_manifest()
+    if manifest is None:
+        manifest = dict(request, parts=[], rows=0, last=None, complete=False)
+    elif {key: manifest.get(key) for key in request} != request:
+        raise RequestError(f"{location} holds a different export; choose another location")
+    elif manifest["complete"]:
+        return manifest
+    else:
+        logger.info(f"Resuming export after {manifest['last']} ({manifest['rows']} rows)")
+
+    writer_class = ParquetPartWriter if export_format == "parquet" else PartWriter
+    staging_dir = tempfile.mkdtemp(prefix="export-")
+    writer: Optional[PartWriter] = None
+    name = ""
+    last_document: Optional[Dict[str, Any]] = None
+
+    def finish_part() -> None:
+        writer.close()
+        destination.store(writer.path, name)
+        manifest["parts"].append({"name": name, "rows": writer.rows})
+        manifest["rows"] += writer.rows
+        manifest["last"] = [last_document.get(source.date_field), str(last_document["_id"])]
+        manifest["updatedAt"] = datetime.utcnow().isoformat()
+        destination.write_manifest(manifest)
+        logger.info(f"Exported {name}: {writer.rows} rows ({manifest['rows']} total)")
+
+    try:
+        for document in stream_documents(database, source, params, fields, manifest["last"]):
+            if writer is None:
+                name = f"{source_name}-part-{len(manifest['parts']):05d}{FORMATS[export_format]}"
+                writer = writer_class(destination.staging_path(name, staging_dir), export_format, fields)
+            writer.write(serialize(document))
+            last_document = document
+
+            if writer.rows >= chunk_rows:
+                finish_part()
+                writer = None
+            elif writer.rows % EXPORT_BATCH_SIZE == 0 and not has_time_remaining(context):
+                # Close a short part rather than lose it to the timeout
+                logger.info("Approaching Lambda timeout, stopping after this part")
+                finish_part()
+                writer = None
+                return manifest
+
+        if writer is not None:
+            finish_part()
+            writer = None
+        manifest["complete"] = True
+        manifest["updatedAt"] = datetime.utcnow().isoformat()
+        destination.write_manifest(manifest)
+        return manifest
+    finally:
+        if writer is not None:
+            # Unfinished part: discarded here and rewritten on resume
+            writer.close()
+            if os.path.exists(writer.path):
+                os.remove(writer.path)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for bulk exports.
+
+    Args:
+        event: {"source": ..., "location": ..., "format": ..., "chunk_rows": ...,
+                "institution": ..., "url": ..., "theme": ..., "language": ...,
+                "from": ..., "to": ..., "fields": ...}
+        context: Lambda context
+
+    Returns:
+        Response with the export manifest; invoke again with the same event
+        while "complete" is false
+    """
+    try:
+        manifest = export(
+            MongoDBConnection.get_database(),
+            event.get("source", ""),
+            event["location"],
+            {key: str(value) for key, value in event.items() if value is not None},
+            export_format=event.get("format", "csv"),
+            chunk_rows=int(event.get("chunk_rows", EXPORT_CHUNK_ROWS)),
+            context=context,
+        )
+        return {"statusCode": 200, "body": json.dumps(manifest)}
+    except RequestError as e:
+        return {"statusCode": 400, "body": json.dumps({"error": str(e)})}
+    except Exception as e:
+        logger.error(f"Error exporting feedback: {str(e)}", exc_info=True)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export feedback to CSV, JSONL or Parquet files")
+    parser.add_argument("source", choices=sorted(SOURCES))
+    parser.add_argument("location", help="local directory or s3://bucket/prefix")
+    parser.add_argument("--format", default="csv", choices=sorted(FORMATS))
+    parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    for name in FILTER_PARAMS + ("fields",):
+        parser.add_argument(f"--{name}", default="")
+    args = parser.parse_args()
+
+    event = {key: value for key, value in vars(args).items() if value}
+    response = lambda_handler(event, None)
+    print(json.dumps(json.loads(response["body"]), indent=2))
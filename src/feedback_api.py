@@ -0,0 +1,406 @@
+"""
+FeedbackApi Lambda Function
+Serves filtered problem and TopTask feedback to dashboards and other consumers.
+
+Trigger: API Gateway (GET /feedback/{source}, source = problem | toptask)
+Output: JSON page of documents plus an opaque cursor for the next page
+
+Pages are read newest first with keyset (cursor) pagination on the indexed
+(date, _id) pair, so page N costs the same as page 1 - there is no `skip`.
+Filters are equality or prefix matches on indexed fields, the projection is
+limited to an allow-list and every page is capped by document count and by
+serialized size.
+
+Query parameters:
+    institution   Exact institution (problem) or department (toptask)
+    url           URL prefix (problem url / toptask surveyReferrer)
+    theme         Exact theme
+    language      Exact language (en / fr)
+    from, to      Inclusive date range, YYYY-MM-DD
+    fields        Comma-separated subset of the allowed fields
+    limit         Page size (default PAGE_SIZE, at most MAX_PAGE_SIZE)
+    cursor        nextCursor from the previous page
+"""
+
+import base64
+import binascii
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING, ReadPreference
+from pymongo.errors import PyMongoError
+from db_utils import MongoDBConnection
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# API configuration
+PAGE_SIZE = int(os.environ.get("FEEDBACK_API_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.environ.get("FEEDBACK_API_MAX_PAGE_SIZE", "500"))
+# Lambda proxy responses are limited to 6 MB; stay well below it
+MAX_RESPONSE_BYTES = int(os.environ.get("FEEDBACK_API_MAX_RESPONSE_BYTES", "1000000"))
+QUERY_TIMEOUT_MS = int(os.environ.get("FEEDBACK_API_QUERY_TIMEOUT_MS", "5000"))
+
+
+class RequestError(ValueError):
+    """Raised for invalid query parameters; reported as a 400."""
+
+
+@dataclass(frozen=True)
+class Source:
+    """Queryable collection and the document fields the filters map to."""
+
+    collection: str
+    date_field: str
+    institution_field: str
+    url_field: str
+    fields: Tuple[str, ...]
+    default_fields: Tuple[str, ...]
+    # Stored upper-cased by the form edge (schema.PROBLEM_FORM_FIELDS)
+    institution_upper: bool = False
+
+
+SOURCES: Dict[str, Source] = {
+    "problem": Source(
+        collection="problem",
+        date_field="problemDate",
+        institution_field="institution",
+        url_field="url",
+        fields=(
+            "problemDate",
+            "timeStamp",
+            "url",
+            "canonicalUrl",
+            "language",
+            "oppositeLang",
+            "title",
+            "institution",
+            "theme",
+            "section",
+            "problem",
+            "problemDetails",
+            "yesno",
+            "deviceType",
+            "browser",
+            "dataOrigin",
+            "tags",
+        ),
+        default_fields=(
+            "problemDate",
+            "timeStamp",
+            "url",
+            "language",
+            "institution",
+            "theme",
+            "section",
+            "problem",
+            "problemDetails",
+            "tags",
+        ),
+        institution_upper=True,
+    ),
+    "toptask": Source(
+        collection="toptasksurvey",
+        date_field="dateTime",
+        institution_field="dept",
+        url_field="surveyReferrer",
+        fields=(
+            "dateTime",
+            "surveyReferrer",
+            "canonicalUrl",
+            "language",
+            "device",
+            "screener",
+            "dept",
+            "theme",
+            "themeOther",
+            "grouping",
+            "task",
+            "taskOther",
+            "taskSatisfaction",
+            "taskEase",
+            "taskCompletion",
+            "taskImprove",
+            "taskImproveComment",
+            "taskWhyNot",
+            "taskWhyNotComment",
+            "taskSampling",
+            "tags",
+        ),
+        default_fields=(
+            "dateTime",
+            "surveyReferrer",
+            "language",
+            "dept",
+            "theme",
+            "task",
+            "taskSatisfaction",
+            "taskEase",
+            "taskCompletion",
+        ),
+    ),
+}
+
+
+def parse_date(value: str, name: str) -> datetime:
+    """Parse a YYYY-MM-DD query parameter."""
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d")
+    except ValueError:
+        raise RequestError(f"'{name}' must be a date (YYYY-MM-DD)")
+
+
+def encode_cursor(date_value: Any, document_id: ObjectId) -> str:
+    """Encode the sort key of the last returned document as an opaque cursor."""
+    raw = json.dumps([date_value, str(document_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ObjectId]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        RequestError: If the cursor is malformed
+    """
+    try:
+        date_value, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return date_value, ObjectId(document_id)
+    except (ValueError, TypeError, binascii.Error, InvalidId):
+        raise RequestError("Invalid cursor")
+
+
+def build_filter(source: Source, params: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Build the query filter from the request parameters.
+
+    Dates are stored as strings ("YYYY-MM-DD" for problems, ISO date-times for
+    surveys), so the range compares strings: `to` is made inclusive by bounding
+    on the following day.
+
+    Args:
+        source: Queried source
+        params: Query string parameters
+
+    Returns:
+        MongoDB filter
+    """
+    query: Dict[str, Any] = {}
+
+    if params.get("institution"):
+        institution = params["institution"].strip()
+        query[source.institution_field] = (
+            institution.upper() if source.institution_upper else institution
+        )
+    if params.get("theme"):
+        query["theme"] = params["theme"].strip()
+    if params.get("language"):
+        query["language"] = params["language"].strip().lower()
+    if params.get("url"):
+        # An anchored, case-sensitive prefix regex can use the index bounds
+        query[source.url_field] = {"$regex": "^" + re.escape(params["url"].strip())}
+
+    date_range: Dict[str, str] = {}
+    if params.get("from"):
+        date_range["$gte"] = parse_date(params["from"], "from").strftime("%Y-%m-%d")
+    if params.get("to"):
+        day_after = parse_date(params["to"], "to") + timedelta(days=1)
+        date_range["$lt"] = day_after.strftime("%Y-%m-%d")
+    if date_range:
+        query[source.date_field] = date_range
+
+    if params.get("cursor"):
+        date_value, document_id = decode_cursor(params["cursor"])
+        # Newest first: continue strictly after the last (date, _id) returned
+        query["$or"] = [
+            {source.date_field: {"$lt": date_value}},
+            {source.date_field: date_value, "_id": {"$lt": document_id}},
+        ]
+
+    return query
+
+
+def build_projection(source: Source, fields_param: str) -> Dict[str, int]:
+    """
+    Build the projection from the `fields` parameter.
+
+    The sort field is always returned because the next cursor is built from it.
+
+    Raises:
+        RequestError: If a requested field is not allowed
+    """
+    if fields_param:
+        requested = [name.strip() for name in fields_param.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in source.fields]
+        if unknown:
+            raise RequestError(f"Unknown field(s): {', '.join(unknown)}")
+    else:
+        requested = list(source.default_fields)
+
+    projection = {name: 1 for name in requested}
+    projection[source.date_field] = 1
+    return projection
+
+
+def page_size(limit_param: str) -> int:
+    """Parse the `limit` parameter, clamped to MAX_PAGE_SIZE."""
+    if not limit_param:
+        return min(PAGE_SIZE, MAX_PAGE_SIZE)
+    try:
+        limit = int(limit_param)
+    except ValueError:
+        raise RequestError("'limit' must be an integer")
+    if limit < 1:
+        raise RequestError("'limit' must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def serialize(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Make a document JSON-serializable (ObjectId and datetime become strings)."""
+    item = dict(document)
+    item["_id"] = str(item["_id"])
+    for key, value in item.items():
+        if isinstance(value, datetime):
+            item[key] = value.isoformat()
+    return item
+
+
+def build_query(
+    source: Source, params: Dict[str, str]
+) -> Tuple[Dict[str, Any], Dict[str, int], int]:
+    """
+    Validate the request parameters and build (filter, projection, page size).
+
+    Raises:
+        RequestError: If a parameter is invalid
+    """
+    return (
+        build_filter(source, params),
+        build_projection(source, params.get("fields", "")),
+        page_size(params.get("limit", "")),
+    )
+
+
+def query_page(
+    database: Any,
+    source: Source,
+    query: Dict[str, Any],
+    projection: Dict[str, int],
+    limit: int,
+) -> Dict[str, Any]:
+    """
+    Run one page of a feedback query.
+
+    Args:
+        database: Database instance
+        source: Queried source
+        query: Filter from build_query
+        projection: Projection from build_query
+        limit: Maximum number of documents in the page
+
+    Returns:
+        Dictionary with items, count and nextCursor (None on the last page)
+    """
+    # Reads go to a replica when one is available, keeping load off the writer
+    collection = database[source.collection].with_options(
+        read_preference=ReadPreference.SECONDARY_PREFERRED
+    )
+    cursor = (
+        collection.find(query, projection)
+        .sort([(source.date_field, DESCENDING), ("_id", DESCENDING)])
+        .limit(limit + 1)
+        .max_time_ms(QUERY_TIMEOUT_MS)
+    )
+
+    items: List[Dict[str, Any]] = []
+    last: Optional[Dict[str, Any]] = None
+    size = 0
+    has_more = False
+    for document in cursor:
+        if len(items) == limit:
+            has_more = True
+            break
+        item = serialize(document)
+        item_size = len(json.dumps(item, default=str))
+        if items and size + item_size > MAX_RESPONSE_BYTES:
+            # Size cap reached: the rest comes with the next page
+            has_more = True
+            break
+        items.append(item)
+        size += item_size
+        last = document
+
+    next_cursor = None
+    if has_more and last is not None:
+        next_cursor = encode_cursor(last.get(source.date_field), last["_id"])
+
+    return {"items": items, "count": len(items), "nextCursor": next_cursor}
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for FeedbackApi function.
+
+    Args:
+        event: API Gateway event (path parameter `source`, query string filters)
+        context: Lambda context
+
+    Returns:
+        API Gateway response
+    """
+    try:
+        path_parameters = event.get("pathParameters") or {}
+        params = event.get("queryStringParameters") or {}
+        source_name = path_parameters.get("source") or params.get("source", "")
+
+        source = SOURCES.get(source_name)
+        if source is None:
+            return {
+                "statusCode": 404,
+                "body": json.dumps({"error": f"Unknown source '{source_name}'"}),
+            }
+
+        # Reject bad parameters before touching the database
+        query, projection, limit = build_query(source, params)
+
+        database = MongoDBConnection.get_database()
+        page = query_page(database, source, query, projection, limit)
+        logger.info(f"Served {page['count']} {source_name} document(s)")
+
+        return {"statusCode": 200, "body": json.dumps(page, default=str)}
+
+    except RequestError as e:
+        return {"statusCode": 400, "body": json.dumps({"error": str(e)})}
+    except PyMongoError as e:
+        logger.error(f"Feedback query failed: {str(e)}", exc_info=True)
+        return {"statusCode": 503, "body": json.dumps({"error": "Query failed"})}
+    except Exception as e:
+        logger.error(f"Error serving feedback: {str(e)}", exc_info=True)
+        return {
+            "statusCode": 500,
+            "body": json.dumps({"error": "Internal server error"}),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query feedback one page at a time")
+    parser.add_argument("source", choices=sorted(SOURCES))
+    for name in ("institution", "url", "theme", "language", "from", "to", "fields", "limit", "cursor"):
+        parser.add_argument(f"--{name}", default="")
+    args = parser.parse_args()
+
+    query_params = {k: v for k, v in vars(args).items() if k != "source" and v}
+    response = lambda_handler(
+        {"pathParameters": {"source": args.source}, "queryStringParameters": query_params},
+        None,
+    )
+    print(json.dumps(json.loads(response["body"]), indent=2))
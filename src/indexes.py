@@ -0,0 +1,382 @@
+"""
+Index management for the feedback collections.
+
+Declares the indexes downstream jobs rely on and creates any that are
+missing, including the partial indexes behind the db_utils claim API. Safe
+to run repeatedly: existing indexes (matched by name, or by key pattern and
+partial filter) are left alone. Indexes are built by the entry points below,
+which the deployment invokes after every code change (the indexes Lambda).
+The commit Lambdas only check, once per container, that nothing is missing;
+ENSURE_INDEXES=true makes them build missing indexes instead.
+
+Usage:
+    python indexes.py            # create missing indexes
+    python indexes.py --report   # list missing, unused and undeclared indexes
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ASCENDING, IndexModel
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+from db_utils import UNPROCESSED_VALUES, MongoDBConnection
+from models import FLAG_FIELDS
+from outbox import OUTBOX_COLLECTION, OUTBOX_RETENTION_DAYS
+from quarantine import QUARANTINE_COLLECTION
+from rollups import PROBLEM_ROLLUP, TOPTASK_ROLLUP
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+ENSURE_INDEXES = os.environ.get("ENSURE_INDEXES", "false").lower() == "true"
+
+
+@dataclass
+class IndexSpec:
+    """Declared index on one collection."""
+
+    collection: str
+    keys: List[Tuple[str, int]]
+    name: str
+    unique: bool = False
+    sparse: bool = False
+    partial_filter: Optional[Dict[str, Any]] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    def to_model(self) -> IndexModel:
+        kwargs = dict(self.options)
+        kwargs["name"] = self.name
+        if self.unique:
+            kwargs["unique"] = True
+        if self.sparse:
+            kwargs["sparse"] = True
+        if self.partial_filter:
+            kwargs["partialFilterExpression"] = self.partial_filter
+        return IndexModel(self.keys, **kwargs)
+
+
+INDEX_SPECS: List[IndexSpec] = [
+    # problem
+    IndexSpec("problem", [("problemDate", ASCENDING)], "problemDate_1"),
+    IndexSpec("problem", [("url", ASCENDING)], "url_1"),
+    IndexSpec(
+        "problem",
+        [("processed", ASCENDING), ("problemDate", ASCENDING)],
+        "processed_1_problemDate_1",
+    ),
+    # (filter, date, _id) serves the feedback API's keyset pages; it also
+    # covers everything the old institution_1_problemDate_1 index did
+    IndexSpec(
+        "problem",
+        [("institution", ASCENDING), ("problemDate", ASCENDING), ("_id", ASCENDING)],
+        "institution_1_problemDate_1__id_1",
+    ),
+    IndexSpec(
+        "problem",
+        [("problemDate", ASCENDING), ("_id", ASCENDING)],
+        "problemDate_1__id_1",
+    ),
+    IndexSpec(
+        "problem",
+        [("autoTagProcessed", ASCENDING), ("personalInfoProcessed", ASCENDING)],
+        "autoTagProcessed_1_personalInfoProcessed_1",
+    ),
+    IndexSpec("problem", [("submittedAt", ASCENDING)], "submittedAt_1", sparse=True),
+    IndexSpec(
+        "problem",
+        [("canonicalUrl", ASCENDING), ("problemDate", ASCENDING)],
+        "canonicalUrl_1_problemDate_1",
+        sparse=True,
+    ),
+    IndexSpec(
+        "problem",
+        [("contentHash", ASCENDING)],
+        "contentHash_1_unique",
+        unique=True,
+        sparse=True,
+    ),
+    # originalproblem
+    IndexSpec("originalproblem", [("problemDate", ASCENDING)], "problemDate_1"),
+    IndexSpec(
+        "originalproblem", [("submittedAt", ASCENDING)], "submittedAt_1", sparse=True
+    ),
+    # toptasksurvey
+    IndexSpec(
+        "toptasksurvey",
+        [("dateTime", ASCENDING), ("surveyReferrer", ASCENDING)],
+        "dateTime_1_surveyReferrer_1",
+    ),
+    IndexSpec(
+        "toptasksurvey",
+        [("dept", ASCENDING), ("dateTime", ASCENDING), ("_id", ASCENDING)],
+        "dept_1_dateTime_1__id_1",
+    ),
+    IndexSpec(
+        "toptasksurvey",
+        [("dateTime", ASCENDING), ("_id", ASCENDING)],
+        "dateTime_1__id_1",
+    ),
+    IndexSpec(
+        "toptasksurvey",
+        [("processed", ASCENDING), ("dateTime", ASCENDING)],
+        "processed_1_dateTime_1",
+    ),
+    IndexSpec(
+        "toptasksurvey",
+        [("autoTagProcessed", ASCENDING), ("personalInfoProcessed", ASCENDING)],
+        "autoTagProcessed_1_personalInfoProcessed_1",
+    ),
+    IndexSpec(
+        "toptasksurvey", [("submittedAt", ASCENDING)], "submittedAt_1", sparse=True
+    ),
+    IndexSpec(
+        "toptasksurvey",
+        [("canonicalUrl", ASCENDING), ("dateTime", ASCENDING)],
+        "canonicalUrl_1_dateTime_1",
+        sparse=True,
+    ),
+    IndexSpec(
+        "toptasksurvey",
+        [("contentHash", ASCENDING)],
+        "contentHash_1_unique",
+        unique=True,
+        sparse=True,
+    ),
+    # quarantine
+    IndexSpec(
+        QUARANTINE_COLLECTION,
+        [("messageId", ASCENDING)],
+        "messageId_1_unique",
+        unique=True,
+        sparse=True,
+    ),
+    IndexSpec(
+        QUARANTINE_COLLECTION,
+        [("source", ASCENDING), ("reason", ASCENDING), ("quarantinedAt", ASCENDING)],
+        "source_1_reason_1_quarantinedAt_1",
+    ),
+    # outbox: consumers read one source in _id order; entries expire by TTL
+    IndexSpec(OUTBOX_COLLECTION, [("source", ASCENDING), ("_id", ASCENDING)], "source_1__id_1"),
+    IndexSpec(
+        OUTBOX_COLLECTION,
+        [("createdAt", ASCENDING)],
+        "createdAt_1_ttl",
+        options={"expireAfterSeconds": OUTBOX_RETENTION_DAYS * 86400},
+    ),
+]
+
+
+def _claim_index_specs() -> List[IndexSpec]:
+    """
+    Partial indexes covering only the unprocessed documents for each flag, one
+    per stored representation (False with typed storage, "false" otherwise).
+    Claims scan O(batch) index entries regardless of collection size.
+    """
+    specs = []
+    for collection, flags in FLAG_FIELDS.items():
+        for flag in flags:
+            for value in UNPROCESSED_VALUES:
+                suffix = "str" if isinstance(value, str) else "bool"
+                specs.append(
+                    IndexSpec(
+                        collection,
+                        [(flag, ASCENDING), ("_id", ASCENDING)],
+                        f"{flag}_1__id_1_unprocessed_{suffix}",
+                        partial_filter={flag: value},
+                    )
+                )
+    return specs
+
+
+def _rollup_index_specs() -> List[IndexSpec]:
+    """Unique (day, dimensions...) key for each rollup; also serves day-range reads."""
+    return [
+        IndexSpec(
+            rollup.collection,
+            [(key, ASCENDING) for key in ("day",) + rollup.dimensions],
+            rollup.index_name,
+            unique=True,
+        )
+        for rollup in (PROBLEM_ROLLUP, TOPTASK_ROLLUP)
+    ]
+
+
+INDEX_SPECS.extend(_claim_index_specs())
+INDEX_SPECS.extend(_rollup_index_specs())
+
+_indexes_ensured = False
+
+
+def _signature(keys, partial_filter: Optional[Dict[str, Any]]) -> Tuple:
+    """Index identity: key pattern plus partial filter."""
+    normalized = tuple(
+        (key, direction if isinstance(direction, str) else int(direction))
+        for key, direction in keys
+    )
+    return normalized, repr(sorted((partial_filter or {}).items()))
+
+
+def _existing_indexes(database: Database, collection: str) -> Dict[str, Tuple]:
+    """Map existing index names to their signatures."""
+    return {
+        name: _signature(info["key"], info.get("partialFilterExpression"))
+        for name, info in database[collection].index_information().items()
+    }
+
+
+def find_missing(database: Database, specs: List[IndexSpec] = INDEX_SPECS) -> List[IndexSpec]:
+    """
+    Return declared indexes that do not exist (by name, or by key pattern and partial filter).
+
+    Args:
+        database: Database instance
+        specs: Declared indexes
+
+    Returns:
+        List of missing IndexSpec
+    """
+    missing = []
+    cache: Dict[str, Dict[str, Tuple]] = {}
+    for spec in specs:
+        if spec.collection not in cache:
+            cache[spec.collection] = _existing_indexes(database, spec.collection)
+        existing = cache[spec.collection]
+        signature = _signature(spec.keys, spec.partial_filter)
+        if spec.name not in existing and signature not in existing.values():
+            missing.append(spec)
+    return missing
+
+
+def ensure_indexes(database: Database, specs: List[IndexSpec] = INDEX_SPECS) -> List[str]:
+    """
+    Create any declared indexes that are missing.
+
+    Args:
+        database: Database instance
+        specs: Declared indexes
+
+    Returns:
+        Names of the indexes created
+    """
+    created = []
+    by_collection: Dict[str, List[IndexSpec]] = {}
+    for spec in find_missing(database, specs):
+        by_collection.setdefault(spec.collection, []).append(spec)
+
+    for collection, collection_specs in by_collection.items():
+        names = database[collection].create_indexes(
+            [spec.to_model() for spec in collection_specs]
+        )
+        logger.info(f"Created indexes on {collection}: {', '.join(names)}")
+        created.extend(f"{collection}.{name}" for name in names)
+
+    return created
+
+
+def ensure_indexes_once(database: Database) -> None:
+    """
+    Check the declared indexes once per container; with ENSURE_INDEXES=true,
+    build the missing ones instead. Building a unique or partial index on a
+    large collection is a deploy step, not something to do inside an
+    invocation that holds leased messages, so by default missing indexes are
+    only logged. Failures are logged, never raised, so a permissions or build
+    problem cannot block message processing.
+    """
+    global _indexes_ensured
+    if _indexes_ensured:
+        return
+    try:
+        if ENSURE_INDEXES:
+            ensure_indexes(database)
+        else:
+            missing = find_missing(database)
+            if missing:
+                logger.error(
+                    f"Missing indexes: {', '.join(f'{spec.collection}.{spec.name}' for spec in missing)}"
+                    " - run indexes.py or the indexes Lambda"
+                )
+    except PyMongoError as e:
+        logger.error(f"Failed to check indexes: {str(e)}")
+    # Don't retry on every invocation; the next cold start or the entry point will
+    _indexes_ensured = True
+
+
+def report_indexes(database: Database, specs: List[IndexSpec] = INDEX_SPECS) -> Dict[str, Any]:
+    """
+    Report missing, unused and undeclared indexes per collection.
+
+    Unused indexes are those with zero recorded accesses in $indexStats
+    (counters reset when the server restarts).
+
+    Args:
+        database: Database instance
+        specs: Declared indexes
+
+    Returns:
+        Dictionary keyed by collection name
+    """
+    report: Dict[str, Any] = {}
+    missing = find_missing(database, specs)
+
+    for collection in sorted({spec.collection for spec in specs}):
+        declared = [spec for spec in specs if spec.collection == collection]
+        declared_signatures = {_signature(spec.keys, spec.partial_filter) for spec in declared}
+        existing = _existing_indexes(database, collection)
+
+        unused: Optional[List[str]] = []
+        try:
+            for stats in database[collection].aggregate([{"$indexStats": {}}]):
+                if stats["name"] != "_id_" and int(stats["accesses"]["ops"]) == 0:
+                    unused.append(stats["name"])
+        except PyMongoError as e:
+            logger.warning(f"$indexStats unavailable for {collection}: {str(e)}")
+            unused = None
+
+        report[collection] = {
+            "missing": [spec.name for spec in missing if spec.collection == collection],
+            "unused": sorted(unused) if unused is not None else None,
+            "undeclared": sorted(
+                name
+                for name, signature in existing.items()
+                if name != "_id_" and signature not in declared_signatures
+            ),
+        }
+
+    return report
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler to create missing indexes and return an index report.
+
+    Args:
+        event: Optional {"report_only": true} to skip index creation
+        context: Lambda context
+
+    Returns:
+        Response with created indexes and the index report
+    """
+    try:
+        database = MongoDBConnection.get_database()
+        created = [] if event.get("report_only") else ensure_indexes(database)
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"created": created, "report": report_indexes(database)}),
+        }
+    except Exception as e:
+        logger.error(f"Error managing indexes: {str(e)}", exc_info=True)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage feedback collection indexes")
+    parser.add_argument("--report", action="store_true", help="report only, create nothing")
+    args = parser.parse_args()
+
+    response = lambda_handler({"report_only": args.report}, None)
+    print(json.dumps(json.loads(response["body"]), indent=2))
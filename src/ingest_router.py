@@ -0,0 +1,109 @@
+"""
+IngestRouter Lambda Function
+Single entry point for the four ingest handlers.
+
+Trigger: SNS (problem / TopTask inbound email topics) and API Gateway (form POSTs)
+Output: SQS queue message, via the handler for the route or topic
+
+Dispatches on the SNS topic ARN or the API Gateway route to the existing
+handler logic, so one warm container pool serves the busy form endpoints
+and the rarely used email paths alike. All four handler modules are
+imported at init and share one SQS client (sqs_utils.get_sqs_client
+creates one per endpoint). The individual handlers keep
+their own entry points and can still be deployed or invoked on their own.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Optional
+import queue_problem
+import queue_problem_form
+import queue_toptask
+import queue_toptask_survey_form
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Topics whose notifications are routed to the email handlers
+PROBLEM_TOPIC_ARN = os.environ.get("PROBLEM_TOPIC_ARN", "")
+TOPTASK_TOPIC_ARN = os.environ.get("TOPTASK_TOPIC_ARN", "")
+
+Handler = Callable[[Dict[str, Any], Any], Dict[str, Any]]
+
+# API Gateway routes; the email paths are direct POSTs used for local testing
+ROUTES: Dict[str, Handler] = {
+    "/problem/form": queue_problem_form.lambda_handler,
+    "/problem/email": queue_problem.lambda_handler,
+    "/toptask/survey/form": queue_toptask_survey_form.lambda_handler,
+    "/toptask/email": queue_toptask.lambda_handler,
+}
+
+TOPICS: Dict[str, Handler] = {
+    arn: handler
+    for arn, handler in (
+        (PROBLEM_TOPIC_ARN, queue_problem.lambda_handler),
+        (TOPTASK_TOPIC_ARN, queue_toptask.lambda_handler),
+    )
+    if arn
+}
+
+
+def event_route(event: Dict[str, Any]) -> str:
+    """
+    Routing key of an event: the SNS topic ARN or the API Gateway path.
+
+    Args:
+        event: SNS or API Gateway (REST or HTTP API) event
+
+    Returns:
+        Topic ARN, request path, or an empty string when neither is present
+    """
+    records = event.get("Records") or []
+    if records and records[0].get("EventSource") == "aws:sns":
+        return records[0].get("Sns", {}).get("TopicArn", "")
+    return event.get("path") or event.get("rawPath") or event.get("resource") or ""
+
+
+def resolve_handler(route: str) -> Optional[Handler]:
+    """
+    Handler for a routing key.
+
+    Paths match on their suffix, so a stage or custom-domain base path in
+    front of the route does not matter.
+
+    Args:
+        route: Topic ARN or request path
+
+    Returns:
+        Handler function, or None when nothing serves the route
+    """
+    if route in TOPICS:
+        return TOPICS[route]
+    path = route.rstrip("/")
+    for suffix, handler in ROUTES.items():
+        if path.endswith(suffix):
+            return handler
+    return None
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for IngestRouter function.
+
+    Args:
+        event: SNS event from an inbound email topic or API Gateway event
+        context: Lambda context
+
+    Returns:
+        Response of the handler serving the route
+    """
+    route = event_route(event)
+    handler = resolve_handler(route)
+    if handler is None:
+        logger.error(f"No ingest handler for route: {route or '<none>'}")
+        return {"statusCode": 404, "body": json.dumps({"error": "Not found"})}
+
+    logger.info(f"Routing {route} to {handler.__module__}")
+    return handler(event, context)
@@ -0,0 +1,170 @@
+"""
+Typed storage migration.
+Backfills existing documents to typed storage: "true"/"false" flag strings
+become native booleans and a `submittedAt` datetime is added from the
+separate date and time strings.
+
+Works in throttled batches ordered by _id, so it can be stopped and resumed
+(--after-id) without rescanning migrated documents.
+
+Usage:
+    python migrate_typed_storage.py --collection problem --dry-run
+    python migrate_typed_storage.py --collection toptasksurvey --batch-size 500 --pause 0.5
+"""
+
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from pymongo.database import Database
+from db_utils import MongoDBConnection
+from models import DATE_FIELDS, FLAG_FIELDS, apply_typed_storage
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PAUSE_SECONDS = 0.2
+
+
+def needs_migration_filter(collection: str) -> Dict[str, Any]:
+    """Filter matching documents that still have string flags or no submittedAt."""
+    conditions = [{flag: {"$type": "string"}} for flag in FLAG_FIELDS.get(collection, [])]
+    conditions.append({"submittedAt": {"$exists": False}})
+    return {"$or": conditions}
+
+
+def migrate_collection(
+    database: Database,
+    collection: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    pause_seconds: float = DEFAULT_PAUSE_SECONDS,
+    after_id: Optional[ObjectId] = None,
+    max_batches: Optional[int] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Migrate one collection to typed storage in throttled batches.
+
+    Args:
+        database: Database instance
+        collection: Collection name (problem, originalproblem or toptasksurvey)
+        batch_size: Documents per bulk write
+        pause_seconds: Sleep between batches to limit cluster load
+        after_id: Resume after this _id
+        max_batches: Optional cap on batches for this run
+        dry_run: Count documents that would change without writing
+
+    Returns:
+        Migration statistics including the last _id processed
+    """
+    if collection not in DATE_FIELDS:
+        raise ValueError(f"Unsupported collection: {collection}")
+
+    date_field, time_field = DATE_FIELDS[collection]
+    projection = {flag: 1 for flag in FLAG_FIELDS.get(collection, [])}
+    projection.update({date_field: 1, time_field: 1, "submittedAt": 1})
+
+    target = database[collection]
+    base_filter = needs_migration_filter(collection)
+    stats = {"collection": collection, "scanned": 0, "modified": 0, "batches": 0}
+    last_id = after_id
+
+    while max_batches is None or stats["batches"] < max_batches:
+        query = dict(base_filter)
+        if last_id is not None:
+            query = {"$and": [base_filter, {"_id": {"$gt": last_id}}]}
+
+        documents = list(
+            target.find(query, projection).sort("_id", ASCENDING).limit(batch_size)
+        )
+        if not documents:
+            break
+
+        operations = []
+        for document in documents:
+            document_id = document.pop("_id")
+            typed = apply_typed_storage(dict(document), collection)
+            changes = {key: value for key, value in typed.items() if document.get(key) != value}
+            if changes:
+                operations.append(UpdateOne({"_id": document_id}, {"$set": changes}))
+            last_id = document_id
+
+        stats["scanned"] += len(documents)
+        stats["batches"] += 1
+
+        if operations and not dry_run:
+            result = target.bulk_write(operations, ordered=False)
+            stats["modified"] += result.modified_count
+        elif dry_run:
+            stats["modified"] += len(operations)
+
+        logger.info(
+            f"{collection}: batch {stats['batches']}, scanned {stats['scanned']}, "
+            f"{'would modify' if dry_run else 'modified'} {stats['modified']}"
+        )
+        time.sleep(pause_seconds)
+
+    stats["last_id"] = str(last_id) if last_id is not None else None
+    return stats
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler to run one bounded migration pass.
+
+    Args:
+        event: {"collection": ..., "batch_size": ..., "pause_seconds": ...,
+                "after_id": ..., "max_batches": ..., "dry_run": ...}
+        context: Lambda context
+
+    Returns:
+        Response with migration statistics (pass last_id back as after_id to resume)
+    """
+    try:
+        after_id = event.get("after_id")
+        stats = migrate_collection(
+            MongoDBConnection.get_database(),
+            event.get("collection", "problem"),
+            batch_size=int(event.get("batch_size", DEFAULT_BATCH_SIZE)),
+            pause_seconds=float(event.get("pause_seconds", DEFAULT_PAUSE_SECONDS)),
+            after_id=ObjectId(after_id) if after_id else None,
+            max_batches=event.get("max_batches"),
+            dry_run=bool(event.get("dry_run", False)),
+        )
+        return {"statusCode": 200, "body": json.dumps(stats)}
+    except Exception as e:
+        logger.error(f"Error migrating to typed storage: {str(e)}", exc_info=True)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill typed storage fields")
+    parser.add_argument(
+        "--collection",
+        required=True,
+        choices=sorted(DATE_FIELDS),
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=DEFAULT_PAUSE_SECONDS)
+    parser.add_argument("--after-id", help="resume after this _id")
+    parser.add_argument("--max-batches", type=int)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    response = lambda_handler(
+        {
+            "collection": args.collection,
+            "batch_size": args.batch_size,
+            "pause_seconds": args.pause,
+            "after_id": args.after_id,
+            "max_batches": args.max_batches,
+            "dry_run": args.dry_run,
+        },
+        None,
+    )
+    print(json.dumps(json.loads(response["body"]), indent=2))
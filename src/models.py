@@ -1,12 +1,121 @@
 """
 Data models for Problem and TopTask feedback collections.
 Converted from C# classes to Python dataclasses for MongoDB storage.
+
+Typed storage (TYPED_STORAGE=true) writes the processing flags as native
+booleans and adds a single BSON datetime field, `submittedAt`, built from the
+separate date and time strings. The legacy date strings are still written so
+existing readers keep working.
 """
 
-from dataclasses import dataclass, field
-from typing import List, Optional
+import os
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
+TYPED_STORAGE = os.environ.get("TYPED_STORAGE", "false").lower() == "true"
+
+FLAG_FIELDS = {
+    "problem": ["processed", "airTableSync", "personalInfoProcessed", "autoTagProcessed"],
+    "toptasksurvey": [
+        "processed",
+        "topTaskAirTableSync",
+        "personalInfoProcessed",
+        "autoTagProcessed",
+    ],
+}
+
+DATE_FIELDS = {
+    "problem": ("problemDate", "timeStamp"),
+    "originalproblem": ("problemDate", "timeStamp"),
+    "toptasksurvey": ("dateTime", "timeStamp"),
+}
+
+
+def to_bool_flag(value: Any) -> bool:
+    """Convert a stored "true"/"false" flag (or a bool) to a bool."""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() == "true"
+
+
+def processed_value(document: Dict[str, Any], flag: str) -> Any:
+    """Value marking a flag processed, in the document's representation (bool when typed)."""
+    return True if isinstance(document.get(flag), bool) else "true"
+
+
+def combine_date_time(date_str: str, time_str: str = "") -> Optional[datetime]:
+    """
+    Combine "YYYY-MM-DD" and "HH:MM" strings into a single UTC datetime.
+
+    Args:
+        date_str: Date string
+        time_str: Optional time string
+
+    Returns:
+        datetime, or None if the date cannot be parsed
+    """
+    try:
+        date_value = datetime.strptime((date_str or "").strip(), "%Y-%m-%d")
+    except ValueError:
+        return None
+
+    try:
+        time_value = datetime.strptime((time_str or "").strip(), "%H:%M")
+        return date_value.replace(hour=time_value.hour, minute=time_value.minute)
+    except ValueError:
+        return date_value
+
+
+def apply_typed_storage(document: Dict[str, Any], collection: str) -> Dict[str, Any]:
+    """
+    Convert a legacy document dictionary to typed storage in place.
+
+    Args:
+        document: Document from to_dict()
+        collection: Collection name (selects flag and date fields)
+
+    Returns:
+        The same document with boolean flags and `submittedAt`
+    """
+    for flag in FLAG_FIELDS.get(collection, []):
+        if flag in document:
+            document[flag] = to_bool_flag(document[flag])
+
+    date_field, time_field = DATE_FIELDS[collection]
+    submitted_at = combine_date_time(
+        document.get(date_field, ""), document.get(time_field, "")
+    )
+    if submitted_at is not None:
+        document["submittedAt"] = submitted_at
+
+    return document
+
+
+# Document key -> attribute name, per model class
+_DOCUMENT_KEYS: Dict[type, Dict[str, str]] = {}
+
+
+def record_to_fields(model_cls: type, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a record keyed by document field names (as written by to_dict) to
+    dataclass keyword arguments. Unknown keys are ignored.
+
+    Args:
+        model_cls: Model dataclass
+        record: Record keyed by document field names
+
+    Returns:
+        Keyword arguments for model_cls
+    """
+    mapping = _DOCUMENT_KEYS.get(model_cls)
+    if mapping is None:
+        # Setting every attribute to its own name shows which key to_dict writes it to
+        probe = model_cls(**{f.name: f.name for f in fields(model_cls)})
+        mapping = dict(probe.to_dict(typed=False))
+        _DOCUMENT_KEYS[model_cls] = mapping
+    return {mapping[key]: value for key, value in record.items() if key in mapping}
+
 
 @dataclass
 class Problem:
@@ -34,9 +143,19 @@ class Problem:
     data_origin: str = ""
     tags: List[str] = field(default_factory=list)
 
-    def to_dict(self):
-        """Convert to dictionary for MongoDB insertion."""
-        return {
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]):
+        """Create Problem from a normalized record keyed by document field names."""
+        return cls(**record_to_fields(cls, record))
+
+    def to_dict(self, typed: Optional[bool] = None):
+        """
+        Convert to dictionary for MongoDB insertion.
+
+        Args:
+            typed: Use typed storage; defaults to the TYPED_STORAGE setting
+        """
+        document = {
             "timeStamp": self.time_stamp,
             "problemDate": self.problem_date,
             "url": self.url,
@@ -59,6 +178,11 @@ class Problem:
             "dataOrigin": self.data_origin,
             "tags": self.tags,
         }
+        if typed is None:
+            typed = TYPED_STORAGE
+        if typed:
+            apply_typed_storage(document, "problem")
+        return document
 
 
 @dataclass
@@ -104,9 +228,14 @@ class OriginalProblem:
             data_origin=problem.data_origin,
         )
 
-    def to_dict(self):
-        """Convert to dictionary for MongoDB insertion."""
-        return {
+    def to_dict(self, typed: Optional[bool] = None):
+        """
+        Convert to dictionary for MongoDB insertion.
+
+        Args:
+            typed: Use typed storage; defaults to the TYPED_STORAGE setting
+        """
+        document = {
             "timeStamp": self.time_stamp,
             "problemDate": self.problem_date,
             "url": self.url,
@@ -124,6 +253,11 @@ class OriginalProblem:
             "contact": self.contact,
             "dataOrigin": self.data_origin,
         }
+        if typed is None:
+            typed = TYPED_STORAGE
+        if typed:
+            apply_typed_storage(document, "originalproblem")
+        return document
 
 
 @dataclass
@@ -161,10 +295,21 @@ class TopTask:
     top_task_air_table_sync: str = "false"
     personal_info_processed: str = "false"
     auto_tag_processed: str = "false"
+    tags: List[str] = field(default_factory=list)
 
-    def to_dict(self):
-        """Convert to dictionary for MongoDB insertion."""
-        return {
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]):
+        """Create TopTask from a normalized record keyed by document field names."""
+        return cls(**record_to_fields(cls, record))
+
+    def to_dict(self, typed: Optional[bool] = None):
+        """
+        Convert to dictionary for MongoDB insertion.
+
+        Args:
+            typed: Use typed storage; defaults to the TYPED_STORAGE setting
+        """
+        document = {
             "dateTime": self.date_time,
             "timeStamp": self.time_stamp,
             "surveyReferrer": self.survey_referrer,
@@ -196,4 +341,10 @@ class TopTask:
             "topTaskAirTableSync": self.top_task_air_table_sync,
             "personalInfoProcessed": self.personal_info_processed,
             "autoTagProcessed": self.auto_tag_processed,
+            "tags": self.tags,
         }
+        if typed is None:
+            typed = TYPED_STORAGE
+        if typed:
+            apply_typed_storage(document, "toptasksurvey")
+        return document
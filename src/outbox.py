@@ -0,0 +1,258 @@
+"""
+Outbox change feed for downstream consumers.
+
+Each commit batch appends one compact change record to the 'outbox'
+collection: the ids and key fields of the documents it inserted. Consumers
+(AirTable sync, ...) read the feed in _id order from a resume token instead
+of polling both feedback collections for unset sync flags.
+
+Entry:
+    {"_id": ObjectId, "source": "problem" | "toptask", "collection": "problem",
+     "createdAt": datetime, "count": 2, "changes": [{"_id": ..., "url": ..., ...}]}
+
+Entries are read only once they are OUTBOX_SETTLE_SECONDS old: ObjectIds are
+generated by the writers, so a slow writer can insert an entry with an id
+slightly below one already visible. Entries expire after
+OUTBOX_RETENTION_DAYS (TTL index), so consumers must not fall further behind.
+
+Consumer usage:
+    consumer = OutboxConsumer(database, "airtable-sync", "problem")
+    entries = consumer.poll()
+    ...sync...
+    consumer.commit(entries)
+
+Usage:
+    python outbox.py --source problem --limit 10            # peek at the feed
+    python outbox.py --source problem --consumer airtable-sync --status
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+from db_utils import MongoDBConnection
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Outbox configuration
+OUTBOX_ENABLED = os.environ.get("OUTBOX_ENABLED", "false").lower() == "true"
+OUTBOX_COLLECTION = os.environ.get("OUTBOX_COLLECTION", "outbox")
+OUTBOX_CURSORS_COLLECTION = "outbox_cursors"
+OUTBOX_SETTLE_SECONDS = int(os.environ.get("OUTBOX_SETTLE_SECONDS", "10"))
+OUTBOX_RETENTION_DAYS = int(os.environ.get("OUTBOX_RETENTION_DAYS", "7"))
+OUTBOX_READ_LIMIT = 100
+
+# Key fields copied into change records, per source
+CHANGE_FIELDS = {
+    "problem": (
+        "problemDate",
+        "timeStamp",
+        "url",
+        "canonicalUrl",
+        "language",
+        "institution",
+        "theme",
+        "section",
+    ),
+    "toptask": (
+        "dateTime",
+        "surveyReferrer",
+        "canonicalUrl",
+        "language",
+        "dept",
+        "theme",
+        "task",
+    ),
+}
+
+SOURCE_COLLECTIONS = {"problem": "problem", "toptask": "toptasksurvey"}
+
+
+def change_record(document: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Compact change for one inserted document: its _id plus key fields."""
+    change = {"_id": document["_id"]}
+    for field in CHANGE_FIELDS[source]:
+        if field in document:
+            change[field] = document[field]
+    return change
+
+
+def publish(
+    outbox: Optional[Collection], source: str, documents: List[Dict[str, Any]]
+) -> Optional[ObjectId]:
+    """
+    Append one change record for a bulk write.
+
+    Failures are logged, never raised: the documents are already stored with
+    their sync flags unset, so a flag-based sweep can still pick them up.
+
+    Args:
+        outbox: Outbox collection, or None when the outbox is disabled
+        source: "problem" or "toptask"
+        documents: Documents inserted by the bulk write (with their _id)
+
+    Returns:
+        _id of the outbox entry, or None if nothing was published
+    """
+    if outbox is None or not documents:
+        return None
+
+    entry = {
+        "source": source,
+        "collection": SOURCE_COLLECTIONS[source],
+        "createdAt": datetime.utcnow(),
+        "count": len(documents),
+        "changes": [change_record(document, source) for document in documents],
+    }
+    try:
+        return outbox.insert_one(entry).inserted_id
+    except PyMongoError as e:
+        ids = ", ".join(str(document["_id"]) for document in documents[:5])
+        logger.error(f"Failed to publish {len(documents)} {source} change(s) ({ids}, ...): {str(e)}")
+        return None
+
+
+def get_outbox(database: Any) -> Optional[Collection]:
+    """Outbox collection for the commit loops, or None when the outbox is disabled."""
+    return database[OUTBOX_COLLECTION] if OUTBOX_ENABLED else None
+
+
+def read_changes(
+    database: Database,
+    source: str,
+    after: Optional[ObjectId] = None,
+    limit: int = OUTBOX_READ_LIMIT,
+    settle_seconds: int = OUTBOX_SETTLE_SECONDS,
+) -> Tuple[List[Dict[str, Any]], Optional[ObjectId]]:
+    """
+    Read settled outbox entries in order.
+
+    Args:
+        database: Database instance
+        source: "problem" or "toptask"
+        after: Resume token (last entry _id already consumed)
+        limit: Maximum entries to return
+        settle_seconds: Only return entries at least this old
+
+    Returns:
+        Tuple of (entries, resume token after them; `after` when none)
+    """
+    id_range: Dict[str, Any] = {
+        "$lt": ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=settle_seconds))
+    }
+    if after is not None:
+        id_range["$gt"] = after
+
+    entries = list(
+        database[OUTBOX_COLLECTION]
+        .find({"source": source, "_id": id_range})
+        .sort("_id", ASCENDING)
+        .limit(limit)
+    )
+    return entries, entries[-1]["_id"] if entries else after
+
+
+class OutboxConsumer:
+    """Named consumer of one outbox source with a stored resume token."""
+
+    def __init__(self, database: Database, name: str, source: str):
+        self.database = database
+        self.source = source
+        self.cursor_id = f"{name}:{source}"
+        self._cursors = database[OUTBOX_CURSORS_COLLECTION]
+
+    def token(self) -> Optional[ObjectId]:
+        """Stored resume token, or None to start from the oldest retained entry."""
+        cursor = self._cursors.find_one({"_id": self.cursor_id})
+        return cursor["token"] if cursor else None
+
+    def poll(self, limit: int = OUTBOX_READ_LIMIT) -> List[Dict[str, Any]]:
+        """Next entries after the stored token (the token is not advanced)."""
+        entries, _ = read_changes(self.database, self.source, self.token(), limit)
+        return entries
+
+    def commit(self, entries: List[Dict[str, Any]]) -> None:
+        """Advance the stored token past entries that were processed."""
+        if not entries:
+            return
+        self._cursors.update_one(
+            {"_id": self.cursor_id},
+            {"$set": {"token": entries[-1]["_id"], "updatedAt": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """Resume token and the number of retained entries not yet consumed."""
+        token = self.token()
+        query: Dict[str, Any] = {"source": self.source}
+        if token is not None:
+            query["_id"] = {"$gt": token}
+        return {
+            "consumer": self.cursor_id,
+            "token": str(token) if token else None,
+            "pending": self.database[OUTBOX_COLLECTION].count_documents(query),
+        }
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler to inspect the outbox.
+
+    Args:
+        event: {"source": ..., "after": ..., "limit": ...} to peek at entries,
+               or {"source": ..., "consumer": ..., "status": true} for consumer lag
+        context: Lambda context
+
+    Returns:
+        Response with entries and the next resume token, or consumer status
+    """
+    try:
+        database = MongoDBConnection.get_database()
+        source = event.get("source", "problem")
+        if event.get("status"):
+            consumer = OutboxConsumer(database, event["consumer"], source)
+            return {"statusCode": 200, "body": json.dumps(consumer.status())}
+
+        after = event.get("after")
+        entries, token = read_changes(
+            database,
+            source,
+            after=ObjectId(after) if after else None,
+            limit=int(event.get("limit", OUTBOX_READ_LIMIT)),
+        )
+        body = {"entries": entries, "next": str(token) if token else None}
+        return {"statusCode": 200, "body": json.dumps(body, default=str)}
+    except Exception as e:
+        logger.error(f"Error reading outbox: {str(e)}", exc_info=True)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect the outbox change feed")
+    parser.add_argument("--source", default="problem", choices=sorted(SOURCE_COLLECTIONS))
+    parser.add_argument("--after", help="resume token (entry _id)")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--consumer", help="consumer name, for --status")
+    parser.add_argument("--status", action="store_true", help="show consumer lag")
+    args = parser.parse_args()
+
+    response = lambda_handler(
+        {
+            "source": args.source,
+            "after": args.after,
+            "limit": args.limit,
+            "consumer": args.consumer,
+            "status": args.status,
+        },
+        None,
+    )
+    print(json.dumps(json.loads(response["body"]), indent=2))
@@ -0,0 +1,109 @@
+"""
+Inline PII scrubbing for the commit Lambda functions.
+
+Free-text comments are scanned for email addresses, phone numbers, SINs and
+postal codes with a single precompiled pattern (one pass per field), matches
+are replaced with a mask and `personalInfoProcessed` is set before the batch
+is inserted. Documents scrubbed here are never claimed by the separate
+personal-information job, which saves one read and one write per document.
+
+Disabled by default (PII_SCRUB_ENABLED=false); the downstream job keeps
+handling documents written with the flag unset.
+"""
+
+import logging
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+from models import processed_value
+
+logger = logging.getLogger()
+
+# Scrubbing configuration
+PII_SCRUB_ENABLED = os.environ.get("PII_SCRUB_ENABLED", "false").lower() == "true"
+PII_MASK = os.environ.get("PII_MASK", "#############")
+
+FLAG_FIELD = "personalInfoProcessed"
+
+# Free-text fields scrubbed per collection
+PII_FIELDS = {
+    "problem": ("problemDetails",),
+    "toptasksurvey": ("taskImproveComment", "taskWhyNotComment"),
+}
+
+# Alternatives are tried left to right at each position: longer digit runs
+# (phone numbers) before shorter ones (SINs). Digit patterns are not allowed
+# to start or end inside a longer number.
+_PII_PATTERN = re.compile(
+    r"(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,})"
+    r"|(?P<phone>(?<![\d-])(?:\+?1[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}(?![\d-]))"
+    r"|(?P<sin>(?<![\d-])\d{3}[\s-]?\d{3}[\s-]?\d{3}(?![\d-]))"
+    r"|(?P<postal>\b[ABCEGHJ-NPRSTVXY]\d[ABCEGHJ-NPRSTV-Z][\s-]?\d[ABCEGHJ-NPRSTV-Z]\d\b)",
+    re.IGNORECASE,
+)
+
+
+def scrub_text(text: str, counts: Optional[Counter] = None) -> str:
+    """
+    Replace PII in a text with PII_MASK.
+
+    Args:
+        text: Free text
+        counts: Optional counter updated with matches per kind
+
+    Returns:
+        Scrubbed text
+    """
+    if not text:
+        return text
+
+    def mask(match: "re.Match[str]") -> str:
+        if counts is not None:
+            counts[match.lastgroup] += 1
+        return PII_MASK
+
+    return _PII_PATTERN.sub(mask, text)
+
+
+def scrub_documents(
+    documents: Iterable[Dict[str, Any]], collection: str
+) -> Tuple[int, Counter]:
+    """
+    Scrub the free-text fields of a batch in place and mark it processed.
+
+    Args:
+        documents: Documents about to be inserted
+        collection: Collection name (selects the fields)
+
+    Returns:
+        Tuple of (documents scrubbed, matches per kind)
+    """
+    counts: Counter = Counter()
+    fields = PII_FIELDS.get(collection, ())
+    scrubbed = 0
+    for document in documents:
+        for field in fields:
+            value = document.get(field)
+            if isinstance(value, str):
+                document[field] = scrub_text(value, counts)
+        document[FLAG_FIELD] = processed_value(document, FLAG_FIELD)
+        scrubbed += 1
+
+    if counts:
+        summary = ", ".join(f"{count} {kind}" for kind, count in sorted(counts.items()))
+        logger.info(f"Masked PII in {collection}: {summary}")
+    return scrubbed, counts
+
+
+def scrub_batch(documents: Iterable[Dict[str, Any]], collection: str) -> int:
+    """
+    Scrub a batch when PII_SCRUB_ENABLED is set; otherwise leave it untouched.
+
+    Returns:
+        Number of documents scrubbed
+    """
+    if not PII_SCRUB_ENABLED:
+        return 0
+    scrubbed, _ = scrub_documents(documents, collection)
+    return scrubbed
@@ -0,0 +1,223 @@
+"""
+Failure classification and quarantine for queue messages.
+
+Failures are classified by reason code as permanent (the message can never be
+parsed: wrong field count, bad encoding, invalid JSON, ...) or transient
+(database or network errors). Permanent failures are stored in the
+'quarantine' collection with the raw body and deleted from the queue, so they
+stop consuming receives. Transient failures are made visible again after an
+exponential backoff based on the receive count.
+"""
+
+import binascii
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+from db_utils import insert_many_unordered
+
+logger = logging.getLogger()
+
+# Quarantine configuration
+QUARANTINE_ENABLED = os.environ.get("QUARANTINE_ENABLED", "true").lower() == "true"
+QUARANTINE_COLLECTION = os.environ.get("QUARANTINE_COLLECTION", "quarantine")
+TRANSIENT_BACKOFF_SECONDS = int(os.environ.get("TRANSIENT_BACKOFF_SECONDS", "30"))
+TRANSIENT_BACKOFF_MAX_SECONDS = int(
+    os.environ.get("TRANSIENT_BACKOFF_MAX_SECONDS", "900")
+)
+
+# Permanent reason codes
+REASON_EMPTY_BODY = "empty_body"
+REASON_BAD_ENCODING = "bad_encoding"
+REASON_WRONG_FIELD_COUNT = "wrong_field_count"
+REASON_INVALID_JSON = "invalid_json"
+REASON_PARSE_FAILED = "parse_failed"
+REASON_PROCESSING_ERROR = "processing_error"
+
+# Transient reason codes
+REASON_DATABASE_ERROR = "database_error"
+REASON_TRANSIENT_ERROR = "transient_error"
+
+PERMANENT_REASONS = {
+    REASON_EMPTY_BODY,
+    REASON_BAD_ENCODING,
+    REASON_WRONG_FIELD_COUNT,
+    REASON_INVALID_JSON,
+    REASON_PARSE_FAILED,
+    REASON_PROCESSING_ERROR,
+}
+
+# Replacement characters and C0 controls (other than tab/newline/CR) only
+# appear when a body was decoded with the wrong encoding
+_BAD_CHARACTERS = re.compile(r"[\ufffd\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# (message, reason, detail)
+Rejected = Tuple[Dict[str, Any], str, str]
+
+
+def is_permanent(reason: str) -> bool:
+    """Check whether a reason code means the message can never succeed."""
+    return reason in PERMANENT_REASONS
+
+
+def classify_exception(error: Exception) -> str:
+    """
+    Map an exception raised while processing a message to a reason code.
+
+    Database and network errors are transient; everything else raised by the
+    parsers is deterministic and will fail the same way on every retry.
+    """
+    if isinstance(error, PyMongoError):
+        return REASON_DATABASE_ERROR
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return REASON_TRANSIENT_ERROR
+    if isinstance(error, (UnicodeError, binascii.Error)):
+        return REASON_BAD_ENCODING
+    if isinstance(error, json.JSONDecodeError):
+        return REASON_INVALID_JSON
+    return REASON_PROCESSING_ERROR
+
+
+def classify_unparsed(
+    decoded: str, delimiter: str, expected_fields: Sequence[int]
+) -> Tuple[str, str]:
+    """
+    Explain why a decoded delimited message body was rejected by its parser.
+
+    Args:
+        decoded: Decoded message text
+        delimiter: Field delimiter
+        expected_fields: Accepted field counts
+
+    Returns:
+        Tuple of (reason code, detail)
+    """
+    if not decoded.strip():
+        return REASON_EMPTY_BODY, "Message body is empty"
+    if _BAD_CHARACTERS.search(decoded):
+        return REASON_BAD_ENCODING, "Message body contains undecodable characters"
+
+    field_count = len(decoded.split(delimiter))
+    if field_count not in expected_fields:
+        expected = " or ".join(str(count) for count in expected_fields)
+        return REASON_WRONG_FIELD_COUNT, f"Got {field_count} fields, expected {expected}"
+
+    return REASON_PARSE_FAILED, "Fields could not be parsed"
+
+
+def backoff_seconds(message: Dict[str, Any]) -> int:
+    """Retry delay for a transient failure: doubles with every receive, capped."""
+    receive_count = int(message.get("Attributes", {}).get("ApproximateReceiveCount", 1))
+    delay = TRANSIENT_BACKOFF_SECONDS * 2 ** max(0, receive_count - 1)
+    return min(delay, TRANSIENT_BACKOFF_MAX_SECONDS)
+
+
+def back_off(visibility: Any, messages: Iterable[Dict[str, Any]]) -> None:
+    """
+    Make messages that failed transiently visible again after their backoff delay.
+
+    Args:
+        visibility: Visibility manager tracking the messages
+        messages: SQS messages to retry later
+    """
+    by_delay: Dict[int, List[str]] = defaultdict(list)
+    for message in messages:
+        by_delay[backoff_seconds(message)].append(message["ReceiptHandle"])
+
+    for delay, receipt_handles in by_delay.items():
+        logger.info(f"Retrying {len(receipt_handles)} message(s) in {delay}s")
+        visibility.release_many(receipt_handles, delay_seconds=delay)
+
+
+def quarantine_record(
+    message: Dict[str, Any], source: str, reason: str, detail: str = ""
+) -> Dict[str, Any]:
+    """
+    Build the quarantine document for a queue message.
+
+    Args:
+        message: SQS message
+        source: Queue the message came from (problem or toptask)
+        reason: Reason code
+        detail: Human-readable detail
+
+    Returns:
+        Quarantine document
+    """
+    attributes = message.get("Attributes", {})
+    return {
+        "messageId": message.get("MessageId", ""),
+        "source": source,
+        "reason": reason,
+        "detail": detail,
+        "body": message.get("Body", ""),
+        "receiveCount": int(attributes.get("ApproximateReceiveCount", 0)),
+        "quarantinedAt": datetime.utcnow(),
+    }
+
+
+def dispose_rejected(
+    rejected: List[Rejected],
+    quarantine: Optional[Collection],
+    visibility: Any,
+    source: str,
+) -> List[str]:
+    """
+    Dispose of messages that could not be processed.
+
+    Permanent failures are quarantined (or released immediately when no
+    quarantine collection is given, or the quarantine write fails); transient
+    failures are backed off.
+
+    Args:
+        rejected: (message, reason, detail) for each rejected message
+        quarantine: Quarantine collection, or None to release instead
+        visibility: Visibility manager tracking the batch
+        source: Queue the messages came from
+
+    Returns:
+        Receipt handles of quarantined messages, safe to delete from the queue
+    """
+    permanent = [item for item in rejected if is_permanent(item[1])]
+    back_off(
+        visibility,
+        [message for message, reason, _ in rejected if not is_permanent(reason)],
+    )
+    if not permanent:
+        return []
+
+    if quarantine is not None:
+        documents = [
+            quarantine_record(message, source, reason, detail)
+            for message, reason, detail in permanent
+        ]
+        try:
+            # Duplicates are messages already quarantined by an earlier attempt
+            failed, _ = insert_many_unordered(quarantine, documents)
+            failed = set(failed)
+            quarantined = [
+                message["ReceiptHandle"]
+                for i, (message, _, _) in enumerate(permanent)
+                if i not in failed
+            ]
+            logger.warning(f"Quarantined {len(quarantined)} {source} message(s)")
+            for i in failed:
+                visibility.release(permanent[i][0]["ReceiptHandle"])
+            return quarantined
+        except PyMongoError as e:
+            logger.error(f"Failed to quarantine messages: {str(e)}")
+
+    for message, reason, detail in permanent:
+        logger.warning(f"Releasing {source} message ({reason}): {detail}")
+        visibility.release(message["ReceiptHandle"])
+    return []
+
+
+def get_quarantine(database: Any) -> Optional[Collection]:
+    """Quarantine collection for the commit loops, or None when quarantine is disabled."""
+    return database[QUARANTINE_COLLECTION] if QUARANTINE_ENABLED else None
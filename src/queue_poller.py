@@ -0,0 +1,107 @@
+"""
+SQS long-polling receive strategy for the commit Lambda functions.
+
+Short polls (WaitTimeSeconds=0) only sample a subset of SQS hosts and can come
+back empty while messages still exist. The poller long-polls instead: a short
+wait on the first receive, doubling waits after empty receives, and only gives
+up after several consecutive empty polls.
+"""
+
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger()
+
+# Receive configuration
+RECEIVE_BATCH_SIZE = int(os.environ.get("RECEIVE_BATCH_SIZE", "10"))
+FIRST_RECEIVE_WAIT_SECONDS = int(os.environ.get("FIRST_RECEIVE_WAIT_SECONDS", "1"))
+MAX_RECEIVE_WAIT_SECONDS = int(os.environ.get("MAX_RECEIVE_WAIT_SECONDS", "5"))
+MAX_EMPTY_POLLS = int(os.environ.get("MAX_EMPTY_POLLS", "3"))
+
+# SQS limits
+SQS_MAX_BATCH_SIZE = 10
+SQS_MAX_WAIT_SECONDS = 20
+
+
+class LongPoller:
+    """
+    Receives message batches with adaptive long-poll waits.
+
+    After a receive that returns messages the wait resets to the first-receive
+    wait; after an empty receive it doubles (up to the maximum). The poller is
+    exhausted after `max_empty_polls` consecutive empty receives.
+    """
+
+    def __init__(
+        self,
+        sqs: Any,
+        queue_url: str,
+        batch_size: int = RECEIVE_BATCH_SIZE,
+        first_wait_seconds: int = FIRST_RECEIVE_WAIT_SECONDS,
+        max_wait_seconds: int = MAX_RECEIVE_WAIT_SECONDS,
+        max_empty_polls: int = MAX_EMPTY_POLLS,
+        visibility_timeout: Optional[int] = None,
+    ):
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        self.batch_size = max(1, min(batch_size, SQS_MAX_BATCH_SIZE))
+        self.first_wait_seconds = max(0, min(first_wait_seconds, SQS_MAX_WAIT_SECONDS))
+        self.max_wait_seconds = max(
+            self.first_wait_seconds, min(max_wait_seconds, SQS_MAX_WAIT_SECONDS)
+        )
+        self.max_empty_polls = max(1, max_empty_polls)
+
+        self.wait_seconds = self.first_wait_seconds
+        self.empty_polls = 0
+        self.receive_calls = 0
+        self.empty_receives = 0
+
+    @property
+    def exhausted(self) -> bool:
+        """True once the consecutive empty-poll threshold has been reached."""
+        return self.empty_polls >= self.max_empty_polls
+
+    def receive(self, max_messages: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Receive up to one batch of messages.
+
+        Args:
+            max_messages: Optional cap below the configured batch size
+
+        Returns:
+            List of SQS messages (possibly empty)
+        """
+        batch_size = self.batch_size
+        if max_messages is not None:
+            batch_size = max(1, min(batch_size, max_messages))
+
+        params = {
+            "QueueUrl": self.queue_url,
+            "MaxNumberOfMessages": batch_size,
+            "WaitTimeSeconds": self.wait_seconds,
+            "AttributeNames": ["ApproximateReceiveCount"],
+        }
+        if self.visibility_timeout is not None:
+            params["VisibilityTimeout"] = self.visibility_timeout
+
+        response = self.sqs.receive_message(**params)
+        self.receive_calls += 1
+        messages = response.get("Messages", [])
+
+        if messages:
+            self.empty_polls = 0
+            self.wait_seconds = self.first_wait_seconds
+        else:
+            self.empty_polls += 1
+            self.empty_receives += 1
+            self.wait_seconds = min(
+                self.max_wait_seconds, max(1, self.wait_seconds * 2)
+            )
+            logger.info(
+                f"Empty receive {self.empty_polls}/{self.max_empty_polls}, "
+                f"next wait {self.wait_seconds}s"
+            )
+
+        return messages
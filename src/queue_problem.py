@@ -4,42 +4,29 @@ Parses SES inbound emails via SNS and queues problem feedback data.
 
 Converted from: QueueProblem/run.csx
 Trigger: SNS (from SES inbound email)
-Output: SQS Queue message
+Output: SQS Queue message (normalized problem record, see schema.py)
 """
 
 import json
 import logging
 import os
 import email
-import boto3
 from typing import Dict, Any, Optional
+from schema import (
+    SCHEMA_PROBLEM,
+    clean_problem_record,
+    encode_message,
+    legacy_problem_record,
+)
+from sqs_utils import get_sqs_client
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize SQS client
-ENVIRONMENT = os.environ.get("ENVIRONMENT", "production")
+# SQS client, shared by every handler in the container
 QUEUE_URL = os.environ.get("PROBLEM_QUEUE_URL", "")
-
-# Configure SQS client with local endpoint for local development
-if ENVIRONMENT == "local":
-    # Extract endpoint from QUEUE_URL for local testing
-    # QUEUE_URL format: http://host.docker.internal:9324/000000000000/problem-queue
-    import re
-
-    match = re.match(r"(https?://[^/]+)", QUEUE_URL)
-    endpoint = match.group(1) if match else "http://localhost:9324"
-
-    sqs = boto3.client(
-        "sqs",
-        endpoint_url=endpoint,
-        region_name="ca-central-1",
-        aws_access_key_id="local",
-        aws_secret_access_key="local",
-    )
-else:
-    sqs = boto3.client("sqs")
+sqs = get_sqs_client(QUEUE_URL)
 
 
 def extract_email_text(sns_message: Dict[str, Any]) -> Optional[str]:
@@ -83,25 +70,26 @@ def extract_email_text(sns_message: Dict[str, Any]) -> Optional[str]:
         return None
 
 
-def sanitize_text(text: str) -> str:
+def build_queue_message(text: str) -> str:
     """
-    Sanitize email text by replacing semicolons after 8th occurrence.
+    Convert an email body into the queue message.
+
+    Semicolon-delimited bodies are parsed once, here, into a normalized
+    problem record; user text is never rewritten. Bodies matching neither
+    legacy layout are queued unchanged so the commit Lambda can quarantine
+    them with their raw content.
 
     Args:
         text: Email text content
 
     Returns:
-        Sanitized text with semicolons replaced after 8th occurrence
+        Queue message body
     """
-    parts = text.split(";", 8)
-
-    if len(parts) >= 9:
-        # Sanitize the part after the 8th semicolon
-        parts[8] = parts[8].replace(";", ":")
-        # Reconstruct the text
-        text = ";".join(parts)
-
-    return text
+    record = legacy_problem_record(text.strip())
+    if record is None:
+        logger.warning("Email body matches no problem layout, queuing as received")
+        return text
+    return encode_message(SCHEMA_PROBLEM, clean_problem_record(record))
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -148,14 +136,13 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             text = body
 
         if text:
-            # Sanitize the text: replace semicolons after the 8th occurrence
-            text = sanitize_text(text)
+            queue_data = build_queue_message(text)
 
-            logger.info(f"Problem Queue Item: {text}")
+            logger.info(f"Problem Queue Item: {queue_data}")
 
             # Send to SQS queue
             try:
-                response = sqs.send_message(QueueUrl=QUEUE_URL, MessageBody=text)
+                response = sqs.send_message(QueueUrl=QUEUE_URL, MessageBody=queue_data)
                 logger.info(
                     f"Data queued successfully. MessageId: {response['MessageId']}"
                 )
@@ -1,6 +1,7 @@
 """
 QueueProblemForm Lambda Function
 Handles POST requests from problem feedback forms with device detection and validation.
+Submissions are normalized with the shared schema and queued as a JSON record.
 
 Converted from: QueueProblemForm/run.csx
 Trigger: API Gateway (POST) - Form submission endpoint
@@ -11,37 +12,20 @@ import json
 import logging
 import os
 import re
-import boto3
 from datetime import datetime
 from typing import Dict, Any, List
 from urllib.parse import parse_qs
+from schema import SCHEMA_PROBLEM, SchemaError, encode_message, normalize_problem_form
+from url_enrichment import enrich_url
+from sqs_utils import get_sqs_client
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize SQS client
-ENVIRONMENT = os.environ.get("ENVIRONMENT", "production")
+# SQS client, shared by every handler in the container
 QUEUE_URL = os.environ.get("PROBLEM_QUEUE_URL", "")
-
-# Configure SQS client with local endpoint for local development
-if ENVIRONMENT == "local":
-    # Extract endpoint from QUEUE_URL for local testing
-    # QUEUE_URL format: http://host.docker.internal:9324/000000000000/problem-queue
-    import re
-
-    match = re.match(r"(https?://[^/]+)", QUEUE_URL)
-    endpoint = match.group(1) if match else "http://localhost:9324"
-
-    sqs = boto3.client(
-        "sqs",
-        endpoint_url=endpoint,
-        region_name="ca-central-1",
-        aws_access_key_id="local",
-        aws_secret_access_key="local",
-    )
-else:
-    sqs = boto3.client("sqs")
+sqs = get_sqs_client(QUEUE_URL)
 
 
 def detect_device_and_browser(user_agent: str) -> tuple:
@@ -103,7 +87,8 @@ def parse_form_data(body: str, content_type: str = "") -> Dict[str, str]:
 
 def extract_theme_from_url(submission_page: str) -> str:
     """
-    Extract theme from submission page URL if it contains /services/.
+    Extract theme from submission page URL if it contains /services/
+    (the segment after it, without `.html`).
 
     Args:
         submission_page: URL of the submission page
@@ -111,13 +96,7 @@ def extract_theme_from_url(submission_page: str) -> str:
     Returns:
         Extracted theme or empty string
     """
-    if "/services/" in submission_page:
-        parts = submission_page.split("/services/")
-        if len(parts) > 1:
-            theme_parts = parts[1].split("/")
-            if len(theme_parts) > 0:
-                return theme_parts[0]
-    return ""
+    return enrich_url(submission_page).services_theme
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -156,64 +135,32 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         payload = parse_form_data(body, content_type)
 
-        # Validate required fields
-        required_fields = [
-            "submissionPage",
-            "pageTitle",
-            "institutionopt",
-            "details",
-            "helpful",
-        ]
-        missing_fields = [field for field in required_fields if field not in payload]
-
-        if missing_fields:
-            logger.warning(f"Missing required fields: {', '.join(missing_fields)}")
-            return {
-                "statusCode": 400,
-                "body": json.dumps(
-                    {"error": f"Missing required fields: {', '.join(missing_fields)}"}
-                ),
-            }
-
-        # Extract and process form data
-        time_stamp = datetime.utcnow().strftime("%H:%M")
-        date = datetime.utcnow().strftime("%Y-%m-%d")
-
-        submission_page = payload.get("submissionPage", "").replace(";", " ")
-        language = payload.get("language", "")
-        page_title = payload.get("pageTitle", "")
-        institutionopt = payload.get("institutionopt", "").upper().strip()
-        themeopt = payload.get("themeopt", "").lower().strip()
-        sectionopt = payload.get("sectionopt", "").lower().strip()
-        problem = payload.get("problem", "")
-        details = payload.get("details", "").replace(";", "")
-        helpful = payload.get("helpful", "")
-        opposite_lang = payload.get("oppositelang", "")
-        contact = payload.get("contact", "")
+        # Validate and normalize against the shared schema
+        try:
+            record = normalize_problem_form(payload, device_type, browser_version)
+        except SchemaError as e:
+            logger.warning(str(e))
+            return {"statusCode": 400, "body": json.dumps({"error": str(e)})}
 
         # Extract theme from URL if submission page contains /services/
-        if submission_page:
-            extracted_theme = extract_theme_from_url(submission_page)
-            if extracted_theme:
-                themeopt = extracted_theme
+        extracted_theme = extract_theme_from_url(record["url"])
+        if extracted_theme:
+            record["theme"] = extracted_theme
 
         # Validate data quality
-        if not details or details.strip() == "":
+        if not record["problemDetails"]:
             logger.warning("Entry has no comment and will be disregarded.")
             return {
                 "statusCode": 200,
                 "body": json.dumps({"message": "Data received..."}),
             }
 
-        if not page_title or not submission_page:
+        if not record["title"] or not record["url"]:
             logger.warning("Bad data...")
             return {"statusCode": 400, "body": json.dumps({"error": "Bad data...."})}
 
-        # Create queue data string
-        queue_data = f"{time_stamp};{date};{submission_page};{language};{opposite_lang};{page_title};{institutionopt};{themeopt};{sectionopt};{problem};{details};{helpful};{device_type};{browser_version};{contact}"
-
-        queue_data_length = len(queue_data.split(";"))
-        logger.info(f"Number of items in queueData: {queue_data_length}")
+        # The normalized record is the queue message
+        queue_data = encode_message(SCHEMA_PROBLEM, record)
         logger.info(queue_data)
 
         # Send to SQS queue
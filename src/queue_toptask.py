@@ -12,32 +12,16 @@ import logging
 import os
 import re
 import email
-import boto3
 from typing import Dict, Any, Optional
+from sqs_utils import get_sqs_client
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize SQS client
-ENVIRONMENT = os.environ.get("ENVIRONMENT", "production")
+# SQS client, shared by every handler in the container
 QUEUE_URL = os.environ.get("TOPTASK_QUEUE_URL", "")
-
-# Configure SQS client with local endpoint for local development
-if ENVIRONMENT == "local":
-    # Extract endpoint from QUEUE_URL for local testing
-    match = re.match(r"(https?://[^/]+)", QUEUE_URL)
-    endpoint = match.group(1) if match else "http://localhost:9324"
-
-    sqs = boto3.client(
-        "sqs",
-        endpoint_url=endpoint,
-        region_name="ca-central-1",
-        aws_access_key_id="local",
-        aws_secret_access_key="local",
-    )
-else:
-    sqs = boto3.client("sqs")
+sqs = get_sqs_client(QUEUE_URL)
 
 
 def detect_device_type(user_agent: str) -> str:
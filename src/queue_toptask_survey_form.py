@@ -1,6 +1,7 @@
 """
 QueueTopTaskSurveyForm Lambda Function
 Handles POST requests from TopTask survey forms and queues data.
+Submissions are normalized with the shared schema and queued as a JSON record.
 
 Converted from: QueueTopTaskSurveyForm/run.csx
 Trigger: API Gateway (POST) - Survey form submission (use API Gateway auth instead of JWT)
@@ -12,35 +13,18 @@ Note: JWT authentication removed - use AWS API Gateway IAM/API Key authenticatio
 import json
 import logging
 import os
-import boto3
 from typing import Dict, Any
 from urllib.parse import parse_qs
+from schema import SCHEMA_TOPTASK, SchemaError, encode_message, normalize_toptask_form
+from sqs_utils import get_sqs_client
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize SQS client
-ENVIRONMENT = os.environ.get("ENVIRONMENT", "production")
+# SQS client, shared by every handler in the container
 QUEUE_URL = os.environ.get("TOPTASK_QUEUE_URL", "")
-
-# Configure SQS client with local endpoint for local development
-if ENVIRONMENT == "local":
-    # Extract endpoint from QUEUE_URL for local testing
-    import re
-
-    match = re.match(r"(https?://[^/]+)", QUEUE_URL)
-    endpoint = match.group(1) if match else "http://localhost:9324"
-
-    sqs = boto3.client(
-        "sqs",
-        endpoint_url=endpoint,
-        region_name="ca-central-1",
-        aws_access_key_id="local",
-        aws_secret_access_key="local",
-    )
-else:
-    sqs = boto3.client("sqs")
+sqs = get_sqs_client(QUEUE_URL)
 
 
 def parse_form_data(body: str, content_type: str = "") -> Dict[str, Any]:
@@ -93,8 +77,15 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Parse form data or JSON
         survey_data = parse_form_data(body, content_type)
 
-        # Convert to JSON string for queue (form submission format)
-        json_data = json.dumps(survey_data, indent=2)
+        # Validate and normalize against the shared schema
+        try:
+            record = normalize_toptask_form(survey_data)
+        except SchemaError as e:
+            logger.warning(str(e))
+            return {"statusCode": 400, "body": json.dumps({"error": "Bad data...."})}
+
+        # The normalized record is the queue message
+        json_data = encode_message(SCHEMA_TOPTASK, record)
         logger.info(json_data)
 
         logger.info("Trying to add to queue")
@@ -0,0 +1,352 @@
+"""
+Daily rollups of problem and TopTask feedback.
+
+The commit Lambdas keep one counter document per day and dimension
+combination up to date as part of each batch write, using `$inc` upserts
+(one per distinct key in the batch):
+
+    problem_daily:  day x institution x url (canonical page) x theme
+                    -> count, yesno.{Yes,No,...}
+    toptask_daily:  day x dept x theme x task
+                    -> count, taskSatisfaction.{...}, taskEase.{...}, taskCompletion.{...}
+
+Dashboards read O(days x keys) counters instead of scanning raw rows. Only
+documents actually inserted are counted (duplicates and failed writes are
+not), so queue retries do not double-count. If a rollup write fails the raw
+data is still committed; rebuild the affected days from the raw collection:
+
+Usage:
+    python rollups.py --source problem --from 2025-01-01 --to 2025-01-31
+    python rollups.py --source toptask            # every day with data
+"""
+
+import json
+import logging
+import os
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pymongo import ASCENDING, DESCENDING, ReplaceOne, UpdateOne
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, PyMongoError
+from db_utils import DUPLICATE_KEY_ERROR, MongoDBConnection
+from url_enrichment import CANONICAL_URL_FIELD, canonicalize_url
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Rollup configuration
+ROLLUPS_ENABLED = os.environ.get("ROLLUPS_ENABLED", "true").lower() == "true"
+# Keeps compound index keys well inside DocumentDB's 2 KB index key limit
+MAX_DIMENSION_LENGTH = 512
+MAX_BUCKET_LENGTH = 100
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """Daily rollup of one raw collection."""
+
+    source: str
+    raw_collection: str
+    collection: str
+    date_field: str
+    dimensions: Tuple[str, ...]
+    distributions: Tuple[str, ...]
+    # Dimensions holding page URLs, counted by canonical page
+    url_dimensions: Tuple[str, ...] = ()
+
+    @property
+    def index_name(self) -> str:
+        return "_".join(f"{key}_1" for key in ("day",) + self.dimensions) + "_unique"
+
+
+PROBLEM_ROLLUP = Rollup(
+    source="problem",
+    raw_collection="problem",
+    collection="problem_daily",
+    date_field="problemDate",
+    dimensions=("institution", "url", "theme"),
+    distributions=("yesno",),
+    url_dimensions=("url",),
+)
+
+TOPTASK_ROLLUP = Rollup(
+    source="toptask",
+    raw_collection="toptasksurvey",
+    collection="toptask_daily",
+    date_field="dateTime",
+    dimensions=("dept", "theme", "task"),
+    distributions=("taskSatisfaction", "taskEase", "taskCompletion"),
+)
+
+ROLLUPS = {rollup.source: rollup for rollup in (PROBLEM_ROLLUP, TOPTASK_ROLLUP)}
+
+# (day, *dimension values)
+RollupKey = Tuple[str, ...]
+
+
+def bucket_name(value: Any) -> str:
+    """Counter field name for a distribution value ('.' and '$' are not allowed in field names)."""
+    name = str(value if value is not None else "").strip()[:MAX_BUCKET_LENGTH]
+    name = name.replace(".", "_").replace("$", "_")
+    return name or "none"
+
+
+def rollup_key(rollup: Rollup, document: Dict[str, Any]) -> Optional[RollupKey]:
+    """Rollup key for a raw document, or None if it has no usable date."""
+    day = str(document.get(rollup.date_field) or "")[:10]
+    if len(day) != 10:
+        return None
+    values = []
+    for field in rollup.dimensions:
+        if field in rollup.url_dimensions:
+            value = document.get(CANONICAL_URL_FIELD) or canonicalize_url(
+                str(document.get(field) or "")
+            )
+        else:
+            value = str(document.get(field) or "").strip()
+        values.append(value[:MAX_DIMENSION_LENGTH])
+    return (day,) + tuple(values)
+
+
+def accumulate(
+    rollup: Rollup, documents: Iterable[Dict[str, Any]]
+) -> Dict[RollupKey, Counter]:
+    """
+    Count raw documents per rollup key.
+
+    Args:
+        rollup: Rollup definition
+        documents: Raw documents (as written by the commit Lambdas)
+
+    Returns:
+        Map of rollup key to counters keyed by field path ("count", "yesno.Yes", ...)
+    """
+    totals: Dict[RollupKey, Counter] = defaultdict(Counter)
+    for document in documents:
+        key = rollup_key(rollup, document)
+        if key is None:
+            continue
+        counters = totals[key]
+        counters["count"] += 1
+        for field in rollup.distributions:
+            counters[f"{field}.{bucket_name(document.get(field))}"] += 1
+    return totals
+
+
+def key_filter(rollup: Rollup, key: RollupKey) -> Dict[str, str]:
+    """Filter matching the rollup document for a key."""
+    return dict(zip(("day",) + rollup.dimensions, key))
+
+
+def _bulk_upsert(collection: Collection, operations: List[Any]) -> None:
+    """
+    Run upserts, retrying once those that lost a concurrent-insert race on the
+    unique key (the document exists now, so the retry updates it).
+    """
+    try:
+        collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        if e.details.get("writeConcernErrors"):
+            raise
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+            raise
+        collection.bulk_write([operations[error["index"]] for error in errors], ordered=False)
+
+
+def update_rollups(
+    collection: Optional[Collection], rollup: Rollup, documents: List[Dict[str, Any]]
+) -> int:
+    """
+    Add newly inserted documents to the daily rollup.
+
+    Failures are logged, never raised: the raw documents are already stored
+    and the affected days can be rebuilt.
+
+    Args:
+        collection: Rollup collection, or None when rollups are disabled
+        rollup: Rollup definition
+        documents: Documents that were inserted into the raw collection
+
+    Returns:
+        Number of rollup documents updated
+    """
+    if collection is None or not documents:
+        return 0
+
+    totals = accumulate(rollup, documents)
+    operations = [
+        UpdateOne(key_filter(rollup, key), {"$inc": dict(counters)}, upsert=True)
+        for key, counters in totals.items()
+    ]
+    try:
+        _bulk_upsert(collection, operations)
+        return len(operations)
+    except PyMongoError as e:
+        days = sorted({key[0] for key in totals})
+        logger.error(
+            f"Failed to update {rollup.collection} for {', '.join(days)} "
+            f"(rebuild these days): {str(e)}"
+        )
+        return 0
+
+
+def get_rollups(database: Any, rollup: Rollup) -> Optional[Collection]:
+    """Rollup collection for the commit loops, or None when rollups are disabled."""
+    return database[rollup.collection] if ROLLUPS_ENABLED else None
+
+
+def to_document(rollup: Rollup, key: RollupKey, counters: Counter) -> Dict[str, Any]:
+    """Build a full rollup document from flat counter paths."""
+    document: Dict[str, Any] = key_filter(rollup, key)
+    for path, value in counters.items():
+        if "." in path:
+            field, bucket = path.split(".", 1)
+            document.setdefault(field, {})[bucket] = value
+        else:
+            document[path] = value
+    return document
+
+
+def date_bounds(database: Database, rollup: Rollup) -> Optional[Tuple[str, str]]:
+    """First and last day with raw data, or None if the collection is empty."""
+    raw = database[rollup.raw_collection]
+    query = {rollup.date_field: {"$gt": ""}}
+    projection = {rollup.date_field: 1, "_id": 0}
+    first = raw.find_one(query, projection, sort=[(rollup.date_field, ASCENDING)])
+    last = raw.find_one(query, projection, sort=[(rollup.date_field, DESCENDING)])
+    if not first or not last:
+        return None
+    return first[rollup.date_field][:10], last[rollup.date_field][:10]
+
+
+def rebuild_day(
+    database: Database, rollup: Rollup, day: datetime, dry_run: bool = False
+) -> int:
+    """
+    Recompute one day of a rollup from the raw collection.
+
+    Rollup documents for the day are replaced with recomputed counters and
+    any left over from keys that no longer occur are deleted. Increments made
+    by a commit Lambda while the day is being rebuilt can be lost, so prefer
+    rebuilding closed days.
+
+    Args:
+        database: Database instance
+        rollup: Rollup definition
+        day: Day to rebuild
+        dry_run: Compute without writing
+
+    Returns:
+        Number of rollup documents for the day
+    """
+    start = day.strftime("%Y-%m-%d")
+    end = (day + timedelta(days=1)).strftime("%Y-%m-%d")
+    fields = (rollup.date_field, CANONICAL_URL_FIELD) + rollup.dimensions + rollup.distributions
+    projection = {field: 1 for field in fields}
+    projection["_id"] = 0
+
+    documents = database[rollup.raw_collection].find(
+        {rollup.date_field: {"$gte": start, "$lt": end}}, projection
+    )
+    totals = accumulate(rollup, documents)
+    if dry_run:
+        return len(totals)
+
+    target = database[rollup.collection]
+    rebuilt_at = datetime.utcnow()
+    if totals:
+        operations = []
+        for key, counters in totals.items():
+            document = to_document(rollup, key, counters)
+            document["rebuiltAt"] = rebuilt_at
+            operations.append(ReplaceOne(key_filter(rollup, key), document, upsert=True))
+        _bulk_upsert(target, operations)
+    target.delete_many({"day": start, "rebuiltAt": {"$ne": rebuilt_at}})
+    return len(totals)
+
+
+def rebuild(
+    database: Database,
+    rollup: Rollup,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Rebuild a rollup day by day over an inclusive date range.
+
+    Args:
+        database: Database instance
+        rollup: Rollup definition
+        start: First day (YYYY-MM-DD); defaults to the first day with data
+        end: Last day (YYYY-MM-DD); defaults to the last day with data
+        dry_run: Compute without writing
+
+    Returns:
+        Rebuild statistics
+    """
+    stats: Dict[str, Any] = {"collection": rollup.collection, "days": 0, "documents": 0}
+    if not start or not end:
+        bounds = date_bounds(database, rollup)
+        if bounds is None:
+            return stats
+        start, end = start or bounds[0], end or bounds[1]
+
+    day = datetime.strptime(start, "%Y-%m-%d")
+    last = datetime.strptime(end, "%Y-%m-%d")
+    while day <= last:
+        count = rebuild_day(database, rollup, day, dry_run=dry_run)
+        stats["days"] += 1
+        stats["documents"] += count
+        logger.info(f"{rollup.collection} {day:%Y-%m-%d}: {count} rollup document(s)")
+        day += timedelta(days=1)
+
+    stats.update({"from": start, "to": end, "dry_run": dry_run})
+    return stats
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler to rebuild daily rollups from the raw collections.
+
+    Args:
+        event: {"source": "problem" | "toptask", "from": ..., "to": ..., "dry_run": ...}
+        context: Lambda context
+
+    Returns:
+        Response with rebuild statistics
+    """
+    try:
+        rollup = ROLLUPS[event.get("source", "problem")]
+        stats = rebuild(
+            MongoDBConnection.get_database(),
+            rollup,
+            start=event.get("from"),
+            end=event.get("to"),
+            dry_run=bool(event.get("dry_run", False)),
+        )
+        return {"statusCode": 200, "body": json.dumps(stats)}
+    except Exception as e:
+        logger.error(f"Error rebuilding rollups: {str(e)}", exc_info=True)
+        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild daily feedback rollups")
+    parser.add_argument("--source", required=True, choices=sorted(ROLLUPS))
+    parser.add_argument("--from", dest="start", help="first day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="last day, YYYY-MM-DD")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    response = lambda_handler(
+        {"source": args.source, "from": args.start, "to": args.end, "dry_run": args.dry_run},
+        None,
+    )
+    print(json.dumps(json.loads(response["body"]), indent=2))
@@ -0,0 +1,689 @@
+"""
+Shared ingest schema for the form Lambda functions.
+
+Form payloads are validated and normalized at the edge (required fields,
+HTML unescaping, control-character removal, length caps, derived fields) and
+the normalized record itself is the queue message. The commit Lambdas then
+only have to build the model from the record and bulk insert it.
+
+Queue message envelope:
+    {"schema": "problem" | "toptask", "version": 1, "record": {...}}
+Record keys are the stored document keys (see models.to_dict()).
+
+The queue message parsers (`parse_problem_message`, `parse_toptask_message`)
+live here too, so the commit Lambdas, the DLQ replay and the bulk import
+workers share them without importing a Lambda module and its AWS clients.
+"""
+
+import base64
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from html import unescape
+from typing import Any, Dict, List, Optional, Tuple
+from models import Problem, TopTask
+from url_enrichment import enrich_url
+
+logger = logging.getLogger()
+
+SCHEMA_VERSION = 1
+SCHEMA_PROBLEM = "problem"
+SCHEMA_TOPTASK = "toptask"
+
+# Length caps
+MAX_FIELD_LENGTH = int(os.environ.get("MAX_FIELD_LENGTH", "500"))
+MAX_URL_LENGTH = int(os.environ.get("MAX_URL_LENGTH", "2048"))
+MAX_COMMENT_LENGTH = int(os.environ.get("MAX_COMMENT_LENGTH", "4000"))
+
+_CONTROL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
+# Task department values that mean "not answered" (" / " once trimmed)
+EMPTY_DEPARTMENTS = ("/", "")
+
+
+class SchemaError(ValueError):
+    """Raised when a payload cannot be normalized into a record."""
+
+
+@dataclass
+class Field:
+    """Maps one form field to one record key."""
+
+    key: str
+    source: str
+    max_length: int = MAX_FIELD_LENGTH
+    required: bool = False
+    case: Optional[str] = None
+
+
+PROBLEM_FORM_FIELDS: List[Field] = [
+    Field("url", "submissionPage", MAX_URL_LENGTH, required=True),
+    Field("language", "language"),
+    Field("oppositeLang", "oppositelang", MAX_URL_LENGTH),
+    Field("title", "pageTitle", required=True),
+    Field("institution", "institutionopt", required=True, case="upper"),
+    Field("theme", "themeopt", case="lower"),
+    Field("section", "sectionopt", case="lower"),
+    Field("problem", "problem"),
+    Field("problemDetails", "details", MAX_COMMENT_LENGTH, required=True),
+    Field("yesno", "helpful", required=True),
+    Field("contact", "contact"),
+]
+
+TOPTASK_FORM_FIELDS: List[Field] = [
+    Field("dateTime", "dateTime", required=True),
+    Field("surveyReferrer", "surveyReferrer", MAX_URL_LENGTH),
+    Field("language", "language"),
+    Field("device", "device"),
+    Field("screener", "screener"),
+    Field("taskSatisfaction", "satisfaction"),
+    Field("taskEase", "ease"),
+    Field("taskCompletion", "completion"),
+    Field("taskImprove", "improve"),
+    Field("taskImproveComment", "improveComment", MAX_COMMENT_LENGTH),
+    Field("taskWhyNot", "whyNot"),
+    Field("taskWhyNotComment", "whyNotComment", MAX_COMMENT_LENGTH),
+    Field("taskSampling", "sampling"),
+]
+
+# Task 1 / task 2 answer fields; themeOther1 is shared by both tasks
+TOPTASK_TASK_FIELDS = {
+    "dept": ("dept1", "dept2"),
+    "theme": ("theme1", "theme2"),
+    "themeOther": ("themeOther1", "themeOther1"),
+    "grouping": ("grouping1", "grouping2"),
+    "task": ("task1", "task2"),
+    "taskOther": ("taskOther1", "taskOther2"),
+}
+
+# A survey must answer at least one of these to be queued
+TOPTASK_ANSWER_FIELDS = ("dept1", "dept2", "task1", "task2", "satisfaction", "ease", "completion")
+
+# Legacy semicolon-delimited problem layouts, in field order
+WIDGET_ALL_FIELDS_LAYOUT = [
+    "timeStamp",
+    "problemDate",
+    "url",
+    "language",
+    "oppositeLang",
+    "title",
+    "institution",
+    "theme",
+    "section",
+    "problem",
+    "problemDetails",
+    "yesno",
+    "deviceType",
+    "browser",
+    "contact",
+]
+EMAIL_VERSION_LAYOUT = [
+    "problemDate",
+    "institution",
+    "theme",
+    "section",
+    "title",
+    "url",
+    "yesno",
+    "problem",
+    "problemDetails",
+]
+# Fields of the widget layout after the free-text problemDetails field
+WIDGET_TRAILING_FIELDS = 4
+
+_TIME_FIELD = re.compile(r"^\s*\d{1,2}:\d{2}\s*$")
+_URL_FIELD = re.compile(r"^\s*https?://", re.IGNORECASE)
+
+SAMPLING_KEYS = [
+    "samplingInvitation",
+    "samplingGC",
+    "samplingCanada",
+    "samplingTheme",
+    "samplingInstitution",
+    "samplingGrouping",
+    "samplingTask",
+]
+
+
+def clean_text(value: Any, max_length: int = MAX_FIELD_LENGTH) -> str:
+    """
+    Normalize one submitted value: HTML-unescape, drop control characters,
+    trim and cap the length.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    text = _CONTROL_CHARACTERS.sub("", unescape(str(value))).strip()
+    return text[:max_length]
+
+
+def clean_field(spec: Field, value: Any) -> str:
+    """Clean a value and apply the field's length cap and case rule."""
+    value = clean_text(value, spec.max_length)
+    if spec.case == "upper":
+        return value.upper()
+    if spec.case == "lower":
+        return value.lower()
+    return value
+
+
+def apply_fields(
+    payload: Dict[str, Any],
+    field_specs: List[Field],
+    record: Dict[str, Any],
+    strict: bool = True,
+) -> None:
+    """
+    Copy and normalize the declared fields of a payload into a record.
+
+    Args:
+        payload: Form fields
+        field_specs: Fields to copy
+        record: Record receiving the normalized values
+        strict: Enforce required fields; otherwise missing fields default to ""
+
+    Raises:
+        SchemaError: If required fields are missing (strict only)
+    """
+    missing = [
+        spec.source
+        for spec in field_specs
+        if strict and spec.required and spec.source not in payload
+    ]
+    if missing:
+        raise SchemaError(f"Missing required fields: {', '.join(missing)}")
+
+    for spec in field_specs:
+        record[spec.key] = clean_field(spec, payload.get(spec.source, ""))
+
+
+def detect_language(url: str, default: str = "") -> str:
+    """
+    Detect the page language from its URL, falling back to `default`.
+
+    The first path segment and the URL map win; otherwise `/en/` or `/fr/`
+    anywhere in the URL decides, as the original parser did (`/fr/` last).
+    """
+    language = enrich_url(url).language
+    if not language:
+        url_lower = (url or "").lower()
+        if "/en/" in url_lower:
+            language = "en"
+        if "/fr/" in url_lower:
+            language = "fr"
+    return language or default
+
+
+def split_sampling(sampling: str) -> Dict[str, str]:
+    """Split the 7-part `:`-separated sampling answer (all empty if malformed)."""
+    parts = sampling.split(":")
+    if len(parts) != len(SAMPLING_KEYS):
+        parts = [""] * len(SAMPLING_KEYS)
+    return dict(zip(SAMPLING_KEYS, parts))
+
+
+def normalize_problem_form(
+    payload: Dict[str, Any],
+    device_type: str = "",
+    browser: str = "",
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Validate and normalize a problem form submission.
+
+    Args:
+        payload: Parsed form fields
+        device_type: Device detected from the User-Agent
+        browser: Browser detected from the User-Agent
+        now: Submission time (defaults to the current UTC time)
+
+    Returns:
+        Problem record keyed by document field names
+
+    Raises:
+        SchemaError: If required fields are missing
+    """
+    now = now or datetime.utcnow()
+    if isinstance(payload, dict) and not clean_text(payload.get("institutionopt", "")):
+        # Fill a missing institution from the URL map before it is required
+        institution = enrich_url(clean_text(payload.get("submissionPage", ""))).institution
+        if institution:
+            payload = dict(payload, institutionopt=institution)
+
+    record: Dict[str, Any] = {
+        "timeStamp": now.strftime("%H:%M"),
+        "problemDate": now.strftime("%Y-%m-%d"),
+    }
+    apply_fields(payload, PROBLEM_FORM_FIELDS, record)
+
+    record["language"] = detect_language(record["url"], record["language"])
+    record["deviceType"] = clean_text(device_type)
+    record["browser"] = clean_text(browser)
+    record["dataOrigin"] = "POST-REQUEST-WIDGET_ALL_FIELDS"
+    return record
+
+
+def split_legacy_problem(text: str) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    Split a legacy semicolon-delimited problem message in one pass.
+
+    Semicolons inside the free-text problemDetails field no longer break the
+    record: extra fields are folded back into problemDetails, but only when
+    the layout is positively identified. The widget layout needs its leading
+    HH:MM time field and at least 15 fields. The email layout needs exactly 9
+    fields, or more with a URL in its url position. Anything else (a widget
+    message with too few fields, say) is not guessed at and is rejected, so
+    it is quarantined instead of stored with shifted fields.
+
+    Args:
+        text: Decoded message text
+
+    Returns:
+        Tuple of (layout, values), or None if no layout is identified
+    """
+    fields = text.split(";")
+    if _TIME_FIELD.match(fields[0]):
+        if len(fields) < len(WIDGET_ALL_FIELDS_LAYOUT):
+            return None
+        details_index = WIDGET_ALL_FIELDS_LAYOUT.index("problemDetails")
+        trailing_start = len(fields) - WIDGET_TRAILING_FIELDS
+        values = (
+            fields[:details_index]
+            + [";".join(fields[details_index:trailing_start])]
+            + fields[trailing_start:]
+        )
+        return WIDGET_ALL_FIELDS_LAYOUT, values
+
+    if len(fields) == len(EMAIL_VERSION_LAYOUT) or (
+        len(fields) > len(EMAIL_VERSION_LAYOUT)
+        and _URL_FIELD.match(fields[EMAIL_VERSION_LAYOUT.index("url")])
+    ):
+        return EMAIL_VERSION_LAYOUT, text.split(";", len(EMAIL_VERSION_LAYOUT) - 1)
+
+    return None
+
+
+def legacy_problem_record(
+    text: str, now: Optional[datetime] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Convert a legacy semicolon-delimited problem message into a record.
+
+    Args:
+        text: Decoded message text
+        now: Submission time for the email layout, which carries no usable
+            timestamp (defaults to the current UTC time)
+
+    Returns:
+        Problem record keyed by document field names, or None if the text
+        matches neither layout
+    """
+    split = split_legacy_problem(text)
+    if split is None:
+        return None
+    layout, values = split
+    record: Dict[str, Any] = dict(zip(layout, values))
+
+    if layout is WIDGET_ALL_FIELDS_LAYOUT:
+        record["dataOrigin"] = "POST-REQUEST-WIDGET_ALL_FIELDS"
+    else:
+        now = now or datetime.utcnow()
+        record["institution"] = record["institution"].upper().strip()
+        record["theme"] = record["theme"].lower().strip()
+        record["section"] = record["section"].lower().strip()
+        record["problemDate"] = now.strftime("%Y-%m-%d")
+        record["timeStamp"] = now.strftime("%H:%M")
+        record["dataOrigin"] = "EMAIL-VERSION-AEM-(OLD)"
+
+    record["language"] = detect_language(record["url"], record.get("language", ""))
+    return record
+
+
+def clean_problem_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply the problem form field rules (cleanup, caps, case) to a record."""
+    for spec in PROBLEM_FORM_FIELDS:
+        record[spec.key] = clean_field(spec, record.get(spec.key, ""))
+    return record
+
+
+def normalize_toptask_form(payload: Dict[str, Any], strict: bool = True) -> Dict[str, Any]:
+    """
+    Validate and normalize a TopTask survey submission.
+
+    Resolves the task 1 / task 2 answers, splits the sampling answer and
+    converts the ISO dateTime into separate date and time strings.
+
+    Args:
+        payload: Parsed survey fields
+        strict: Reject missing required fields and surveys without an answer
+            (the form edge); raw JSON already queued is decoded leniently,
+            with missing fields defaulting to "" as the original parser did
+
+    Returns:
+        TopTask record keyed by document field names
+
+    Raises:
+        SchemaError: If the payload is not a set of survey fields or, when
+            strict, required fields are missing or no task / answer field is
+            filled in
+    """
+    if not isinstance(payload, dict):
+        raise SchemaError("Survey payload must be an object")
+
+    record: Dict[str, Any] = {}
+    apply_fields(payload, TOPTASK_FORM_FIELDS, record, strict)
+    if strict and not any(clean_text(payload.get(source, "")) for source in TOPTASK_ANSWER_FIELDS):
+        raise SchemaError(f"Missing answer: one of {', '.join(TOPTASK_ANSWER_FIELDS)}")
+    record["timeStamp"] = record["dateTime"]
+
+    dept1 = clean_text(payload.get("dept1", ""))
+    dept2 = clean_text(payload.get("dept2", ""))
+    task = 0
+    if dept1 not in EMPTY_DEPARTMENTS and dept2 in EMPTY_DEPARTMENTS:
+        task = 1
+    if dept2 not in EMPTY_DEPARTMENTS:
+        task = 2
+    for key, sources in TOPTASK_TASK_FIELDS.items():
+        record[key] = clean_text(payload.get(sources[task - 1], "")) if task else ""
+
+    record.update(split_sampling(record["taskSampling"]))
+
+    try:
+        submitted = datetime.fromisoformat(record["dateTime"].replace("Z", "+00:00"))
+        record["dateTime"] = submitted.strftime("%Y-%m-%d")
+        record["timeStamp"] = submitted.strftime("%H:%M")
+    except ValueError:
+        pass
+
+    return record
+
+
+def encode_message(schema: str, record: Dict[str, Any]) -> str:
+    """Wrap a normalized record in the versioned queue message envelope."""
+    return json.dumps({"schema": schema, "version": SCHEMA_VERSION, "record": record})
+
+
+def decode_message(message_body: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Unwrap a queue message envelope.
+
+    Returns:
+        Tuple of (schema, record), or None if the body is not an envelope
+        (legacy delimited or raw JSON messages)
+    """
+    try:
+        message = json.loads(message_body)
+    except (TypeError, ValueError):
+        return None
+    if (
+        isinstance(message, dict)
+        and message.get("schema") in (SCHEMA_PROBLEM, SCHEMA_TOPTASK)
+        and isinstance(message.get("record"), dict)
+    ):
+        return message["schema"], message["record"]
+    return None
+
+
+def parse_problem_text(decoded_string: str) -> Optional[Problem]:
+    """
+    Parse a legacy semicolon-delimited problem message (widget or email layout).
+
+    Args:
+        decoded_string: Decoded message text
+
+    Returns:
+        Problem object or None if the text matches neither layout
+    """
+    record = legacy_problem_record(decoded_string)
+    if record is None:
+        logger.warning(f"Unexpected data length: {len(decoded_string.split(';'))}")
+        return None
+
+    logger.info(f"Data origin: {record['dataOrigin']}")
+    return Problem.from_record(record)
+
+
+def decode_problem_body(message_body: str) -> str:
+    """
+    Decode a queue message body (optionally base64 encoded, HTML escaped).
+
+    Args:
+        message_body: Raw SQS message body
+
+    Returns:
+        Decoded message text
+    """
+    # Decode if base64 encoded
+    try:
+        decoded_string = base64.b64decode(message_body).decode("utf-8")
+    except Exception:
+        decoded_string = message_body
+
+    logger.info(f"Before HTML decode: {decoded_string}")
+
+    # HTML decode
+    return unescape(decoded_string)
+
+
+def parse_problem_message(message_body: str) -> Optional[Problem]:
+    """
+    Decode and parse a queue message body: a schema record from the form
+    Lambda, or a legacy semicolon-delimited message.
+
+    Args:
+        message_body: Raw SQS message body
+
+    Returns:
+        Problem object or None if parsing fails
+    """
+    # Normalized record; no decoding or unescaping needed
+    envelope = decode_message(message_body)
+    if envelope is not None and envelope[0] == SCHEMA_PROBLEM:
+        return Problem.from_record(envelope[1])
+
+    return parse_problem_text(decode_problem_body(message_body))
+
+
+def parse_toptask_json(json_data: dict) -> Optional[TopTask]:
+    """
+    Parse TopTask JSON data (from form submission) into TopTask object.
+    Raw form JSON queued before the form Lambda normalized submissions is
+    normalized here with the same shared schema, without the form edge's
+    required-field and answer checks.
+
+    Args:
+        json_data: Dictionary of TopTask field values from form
+
+    Returns:
+        TopTask object or None if parsing fails
+    """
+    try:
+        logger.info("Parsing JSON format (form submission)")
+        return TopTask.from_record(normalize_toptask_form(json_data, strict=False))
+    except Exception as e:
+        logger.error(f"Error parsing JSON TopTask data: {str(e)}", exc_info=True)
+        return None
+
+
+def parse_toptask_delimited(top_task_data: list) -> Optional[TopTask]:
+    """
+    Parse TopTask delimiter-separated data (from email) into TopTask object.
+
+    Args:
+        top_task_data: List of TopTask field values (24 fields)
+
+    Returns:
+        TopTask object or None if parsing fails
+    """
+    data_length = len(top_task_data)
+
+    if data_length != 24:
+        logger.warning(f"Expected data length 24, got {data_length}")
+        return None
+
+    try:
+        toptask = TopTask()
+
+        logger.info("Data retrieved has length of 24.")
+
+        toptask.time_stamp = top_task_data[0]
+        toptask.date_time = top_task_data[0]
+        toptask.survey_referrer = top_task_data[1]
+        toptask.language = top_task_data[2]
+        toptask.device = top_task_data[3]
+        toptask.screener = top_task_data[4]
+
+        # Check if Department is not empty for task 1 and is empty for task 2
+        # Set task 1 data
+        dept_task1 = top_task_data[5]
+        dept_task2 = top_task_data[11]
+
+        if (dept_task1 and dept_task1 not in [" / ", ""]) and (
+            not dept_task2 or dept_task2 in [" / ", ""]
+        ):
+            toptask.dept = top_task_data[5]
+            toptask.theme = top_task_data[6]
+            toptask.theme_other = top_task_data[7]
+            logger.info(f"Theme Other: {toptask.theme_other}")
+            toptask.grouping = top_task_data[8]
+            toptask.task = top_task_data[9]
+            toptask.task_other = top_task_data[10]
+            logger.info("Entry is Task 1")
+
+        # Check if Department is not empty for task 2. Set task 2 data.
+        if dept_task2 and dept_task2 not in [" / ", ""]:
+            toptask.dept = top_task_data[11]
+            toptask.theme = top_task_data[12]
+            toptask.theme_other = top_task_data[7]
+            logger.info(f"Theme Other: {toptask.theme_other}")
+            toptask.grouping = top_task_data[13]
+            toptask.task = top_task_data[14]
+            toptask.task_other = top_task_data[15]
+            logger.info("Entry is Task 2")
+
+        toptask.task_satisfaction = top_task_data[16]
+        toptask.task_ease = top_task_data[17]
+        toptask.task_completion = top_task_data[18]
+        toptask.task_improve = top_task_data[19]
+        toptask.task_improve_comment = top_task_data[20]
+        toptask.task_why_not = top_task_data[21]
+        toptask.task_why_not_comment = top_task_data[22]
+        toptask.task_sampling = top_task_data[23]
+
+        # Parse sampling data
+        top_task_sampling = top_task_data[23].split(":")
+
+        if len(top_task_sampling) == 7:
+            toptask.sampling_invitation = top_task_sampling[0]
+            toptask.sampling_gc = top_task_sampling[1]
+            toptask.sampling_canada = top_task_sampling[2]
+            toptask.sampling_theme = top_task_sampling[3]
+            toptask.sampling_institution = top_task_sampling[4]
+            toptask.sampling_grouping = top_task_sampling[5]
+            toptask.sampling_task = top_task_sampling[6]
+        else:
+            toptask.sampling_invitation = ""
+            toptask.sampling_gc = ""
+            toptask.sampling_canada = ""
+            toptask.sampling_theme = ""
+            toptask.sampling_institution = ""
+            toptask.sampling_grouping = ""
+            toptask.sampling_task = ""
+
+        # Set processing flags
+        toptask.processed = "false"
+        toptask.top_task_air_table_sync = "false"
+        toptask.personal_info_processed = "false"
+        toptask.auto_tag_processed = "false"
+
+        # Format date & timestamps
+        try:
+            # Parse datetime string and format
+            dt = datetime.fromisoformat(toptask.date_time.replace("Z", "+00:00"))
+            toptask.date_time = dt.strftime("%Y-%m-%d")
+            logger.info(f"Date converted to: {toptask.date_time}")
+
+            toptask.time_stamp = dt.strftime("%H:%M")
+            logger.info(f"Timestamp converted to: {toptask.time_stamp}")
+        except Exception as e:
+            logger.warning(f"Error parsing datetime: {str(e)}")
+            # Keep original values if parsing fails
+
+        return toptask
+
+    except Exception as e:
+        logger.error(f"Error parsing TopTask data: {str(e)}", exc_info=True)
+        return None
+
+
+def decode_toptask_body(message_body: str) -> str:
+    """
+    Decode a queue message body (optionally base64 encoded, HTML wrapped and escaped).
+
+    Args:
+        message_body: Raw SQS message body
+
+    Returns:
+        Decoded message text
+    """
+    # Decode if base64 encoded
+    try:
+        decoded_string = base64.b64decode(message_body).decode("utf-8")
+    except Exception:
+        decoded_string = message_body
+
+    # Remove HTML tags
+    decoded_string = decoded_string.replace("<html><body><pre>", "")
+    decoded_string = decoded_string.replace("</pre></body></html>", "")
+
+    # HTML decode
+    decoded_string = unescape(decoded_string)
+
+    logger.info(f"Decoded string: {decoded_string}")
+    return decoded_string
+
+
+def parse_toptask_text(decoded_string: str) -> Optional[TopTask]:
+    """
+    Parse a decoded queue message in either JSON (form) or ~!~ delimited (email) format.
+
+    Args:
+        decoded_string: Decoded message text
+
+    Returns:
+        TopTask object or None if parsing fails
+    """
+    # Try parsing as JSON first (form submission)
+    try:
+        json_data = json.loads(decoded_string)
+        logger.info("Detected JSON format (form submission)")
+        return parse_toptask_json(json_data)
+    except json.JSONDecodeError:
+        # Not JSON, try delimiter-separated format (email)
+        logger.info("Not JSON, trying delimiter format (email)")
+        top_task_data = decoded_string.split("~!~")
+        logger.info(f"Data size: {len(top_task_data)}")
+        return parse_toptask_delimited(top_task_data)
+
+
+def parse_toptask_message(message_body: str) -> Optional[TopTask]:
+    """
+    Parse a queue message body: a schema record from the form Lambda, or a
+    legacy raw JSON / ~!~ delimited message.
+
+    Args:
+        message_body: Raw SQS message body
+
+    Returns:
+        TopTask object or None if parsing fails
+    """
+    # Normalized record; no decoding or unescaping needed
+    envelope = decode_message(message_body)
+    if envelope is not None and envelope[0] == SCHEMA_TOPTASK:
+        return TopTask.from_record(envelope[1])
+
+    return parse_toptask_text(decode_toptask_body(message_body))
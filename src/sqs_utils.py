@@ -0,0 +1,51 @@
+"""
+SQS client shared by the ingest and commit Lambdas.
+
+One client per endpoint for the whole container: handlers imported into the
+same process (ingest_router, commit_worker) share its connection pool.
+Locally (ENVIRONMENT=local) the endpoint comes from the queue URL, e.g.
+http://host.docker.internal:9324/000000000000/problem-queue.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import Any, Optional
+import boto3
+
+ENVIRONMENT = os.environ.get("ENVIRONMENT", "production")
+DEFAULT_LOCAL_ENDPOINT = "http://localhost:9324"
+
+
+def local_endpoint(queue_url: str) -> str:
+    """Scheme and host of a queue URL, or DEFAULT_LOCAL_ENDPOINT when it has none."""
+    match = re.match(r"(https?://[^/]+)", queue_url)
+    return match.group(1) if match else DEFAULT_LOCAL_ENDPOINT
+
+
+@lru_cache(maxsize=None)
+def _client(endpoint: Optional[str]) -> Any:
+    if endpoint is None:
+        return boto3.client("sqs")
+    return boto3.client(
+        "sqs",
+        endpoint_url=endpoint,
+        region_name="ca-central-1",
+        aws_access_key_id="local",
+        aws_secret_access_key="local",
+    )
+
+
+def get_sqs_client(queue_url: str = "") -> Any:
+    """
+    SQS client for a queue, created once per endpoint.
+
+    Args:
+        queue_url: Queue URL; only used locally, to find the endpoint
+
+    Returns:
+        boto3 SQS client
+    """
+    if ENVIRONMENT == "local":
+        return _client(local_endpoint(queue_url))
+    return _client(None)
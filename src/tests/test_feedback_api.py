@@ -0,0 +1,13 @@
+"""Tests for feedback_api: filters match the values the form edge stores."""
+
+from feedback_api import SOURCES, build_filter
+
+
+def test_problem_institution_is_upper_cased():
+    assert build_filter(SOURCES["problem"], {"institution": " cra "}) == {"institution": "CRA"}
+
+
+def test_toptask_dept_is_kept_as_given():
+    assert build_filter(SOURCES["toptask"], {"institution": "Canada Revenue Agency"}) == {
+        "dept": "Canada Revenue Agency"
+    }
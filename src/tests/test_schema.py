@@ -0,0 +1,35 @@
+"""Tests for schema: language detection and TopTask survey normalization."""
+
+import pytest
+from schema import SchemaError, detect_language, normalize_toptask_form, parse_toptask_json
+
+
+def test_language_from_first_segment():
+    assert detect_language("https://www.canada.ca/fr/services.html") == "fr"
+
+
+def test_language_from_nested_segment():
+    assert detect_language("https://www.cra-arc.gc.ca/app/en/x") == "en"
+
+
+def test_language_default_when_unknown():
+    assert detect_language("https://example.com/page", "fr") == "fr"
+
+
+def test_legacy_toptask_json_defaults_missing_fields():
+    toptask = parse_toptask_json(
+        {"dateTime": "2024-05-01T12:30:00Z", "language": "en", "taskSatisfaction": "yes"}
+    )
+    assert toptask is not None
+    assert toptask.survey_referrer == ""
+    assert toptask.date_time == "2024-05-01"
+
+
+def test_toptask_form_without_referrer():
+    record = normalize_toptask_form({"dateTime": "2024-05-01T12:30:00Z", "task1": "Pay"})
+    assert record["surveyReferrer"] == ""
+
+
+def test_toptask_form_requires_answer():
+    with pytest.raises(SchemaError):
+        normalize_toptask_form({"dateTime": "2024-05-01T12:30:00Z"})
@@ -0,0 +1,35 @@
+"""Tests for url_enrichment: malformed URLs skip enrichment instead of failing."""
+
+from schema import normalize_problem_form
+from url_enrichment import UrlInfo, canonicalize_url, enrich_batch, enrich_url
+
+MALFORMED_URL = "http://[bad/page"
+
+
+def test_canonicalize_malformed_url():
+    assert canonicalize_url(MALFORMED_URL) == ""
+
+
+def test_enrich_malformed_url():
+    assert enrich_url(MALFORMED_URL) == UrlInfo()
+
+
+def test_enrich_batch_keeps_malformed_url():
+    document = {"url": MALFORMED_URL, "institution": ""}
+    enrich_batch([document], "problem")
+    assert document["url"] == MALFORMED_URL
+    assert document["canonicalUrl"] == ""
+
+
+def test_problem_form_with_malformed_url():
+    record = normalize_problem_form(
+        {
+            "submissionPage": MALFORMED_URL,
+            "pageTitle": "Page",
+            "institutionopt": "cra",
+            "details": "Broken link",
+            "helpful": "no",
+        }
+    )
+    assert record["url"] == MALFORMED_URL
+    assert record["institution"] == "CRA"
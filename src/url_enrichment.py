@@ -0,0 +1,220 @@
+"""
+URL canonicalization and page enrichment.
+
+URLs are canonicalized (scheme, `www.`, query string, fragment and trailing
+slash dropped, lower-cased) so reporting can group feedback by page without
+regular expressions over raw URLs. Canonical URLs are looked up in a prefix
+trie built once per container from the bundled Canada.ca map (url_map.json):
+each field (institution, theme, section, language) comes from the deepest
+matching prefix that defines it. Lookups are memoized in an LRU cache.
+
+Enrichment never overwrites submitted values; it only fills blanks. The
+commit Lambdas stamp every document with `canonicalUrl`.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger()
+
+# Enrichment configuration
+URL_ENRICHMENT_ENABLED = os.environ.get("URL_ENRICHMENT_ENABLED", "true").lower() == "true"
+URL_ENRICHMENT_CACHE_SIZE = int(os.environ.get("URL_ENRICHMENT_CACHE_SIZE", "4096"))
+URL_MAP_PATH = os.environ.get(
+    "URL_MAP_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "url_map.json"),
+)
+
+CANONICAL_URL_FIELD = "canonicalUrl"
+ENRICHED_FIELDS = ("institution", "theme", "section", "language")
+
+# URL field and field names per collection (document field -> enrichment field)
+URL_FIELDS = {"problem": "url", "toptasksurvey": "surveyReferrer"}
+FILL_FIELDS = {
+    "problem": {
+        "institution": "institution",
+        "theme": "theme",
+        "section": "section",
+        "language": "language",
+    },
+    "toptasksurvey": {"dept": "institution", "theme": "theme", "language": "language"},
+}
+
+LANGUAGES = ("en", "fr")
+
+
+@dataclass(frozen=True)
+class UrlInfo:
+    """Enrichment for one URL; empty strings when unknown."""
+
+    canonical_url: str = ""
+    language: str = ""
+    institution: str = ""
+    theme: str = ""
+    section: str = ""
+    # Segment following /services/ (Canada.ca theme pages), if any
+    services_theme: str = ""
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of a page URL: host and path, lower-cased, without scheme,
+    `www.`, query string, fragment or trailing slash.
+
+    Returns:
+        Canonical URL, or "" for an empty or malformed URL
+    """
+    url = (url or "").strip().lower()
+    if not url:
+        return ""
+    if "://" not in url and not url.startswith("//"):
+        url = "//" + url
+    try:
+        parts = urlsplit(url)
+        hostname = parts.hostname or ""
+    except ValueError:
+        # User-supplied, e.g. an unbalanced "[": skip enrichment, keep the record
+        return ""
+    host = hostname.removeprefix("www.")
+    path = parts.path.rstrip("/")
+    return host + path
+
+
+def url_segments(canonical_url: str) -> List[str]:
+    """Trie key: host followed by the path segments, without `.html`."""
+    return [
+        segment.removesuffix(".html")
+        for segment in canonical_url.split("/")
+        if segment
+    ]
+
+
+class PrefixTrie:
+    """Trie over URL segments storing partial enrichment values per prefix."""
+
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+
+    def add(self, prefix: str, values: Dict[str, str]) -> None:
+        node = self._root
+        for segment in url_segments(canonicalize_url(prefix)):
+            node = node.setdefault(segment, {})
+        node.setdefault("", {}).update(values)
+
+    def lookup(self, segments: List[str]) -> Dict[str, str]:
+        """Merge values along the path; deeper prefixes win."""
+        merged: Dict[str, str] = {}
+        node = self._root
+        for segment in segments:
+            node = node.get(segment)
+            if node is None:
+                break
+            merged.update(node.get("", {}))
+        return merged
+
+
+_trie: Optional[PrefixTrie] = None
+
+
+def load_trie(path: str = URL_MAP_PATH) -> PrefixTrie:
+    """Build the trie from a URL map file."""
+    trie = PrefixTrie()
+    with open(path, encoding="utf-8") as handle:
+        url_map = json.load(handle)
+    for entry in url_map.get("prefixes", []):
+        trie.add(
+            entry["prefix"],
+            {field: entry[field] for field in ENRICHED_FIELDS if entry.get(field)},
+        )
+    return trie
+
+
+def get_trie() -> PrefixTrie:
+    """Trie for this container, built on first use (empty if the map cannot be read)."""
+    global _trie
+    if _trie is None:
+        try:
+            _trie = load_trie()
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load URL map from {URL_MAP_PATH}: {str(e)}")
+            _trie = PrefixTrie()
+    return _trie
+
+
+@lru_cache(maxsize=URL_ENRICHMENT_CACHE_SIZE)
+def enrich_url(url: str) -> UrlInfo:
+    """
+    Canonicalize a URL and look it up in the URL map.
+
+    Args:
+        url: Page URL as submitted
+
+    Returns:
+        UrlInfo (memoized)
+    """
+    canonical = canonicalize_url(url)
+    if not canonical:
+        return UrlInfo()
+
+    segments = url_segments(canonical)
+    values = get_trie().lookup(segments)
+
+    # The path's language segment is authoritative; the map covers other hosts
+    language = segments[1] if len(segments) > 1 and segments[1] in LANGUAGES else ""
+
+    services_theme = ""
+    if "services" in segments[1:-1]:
+        services_theme = segments[segments.index("services", 1) + 1]
+
+    return UrlInfo(
+        canonical_url=canonical,
+        language=language or values.get("language", ""),
+        institution=values.get("institution", ""),
+        theme=values.get("theme", "") or services_theme,
+        section=values.get("section", ""),
+        services_theme=services_theme,
+    )
+
+
+def enrich_document(document: Dict[str, Any], collection: str) -> int:
+    """
+    Stamp `canonicalUrl` and fill blank institution / theme / section /
+    language fields from the URL map, in place.
+
+    Args:
+        document: Document about to be inserted
+        collection: Collection name (selects the URL and field names)
+
+    Returns:
+        Number of blank fields filled
+    """
+    info = enrich_url(str(document.get(URL_FIELDS.get(collection, "url")) or ""))
+    document[CANONICAL_URL_FIELD] = info.canonical_url
+
+    filled = 0
+    for field, source in FILL_FIELDS.get(collection, {}).items():
+        value = getattr(info, source)
+        if value and not str(document.get(field) or "").strip():
+            document[field] = value.upper() if source == "institution" else value
+            filled += 1
+    return filled
+
+
+def enrich_batch(documents: Iterable[Dict[str, Any]], collection: str) -> int:
+    """
+    Enrich a batch in place when URL_ENRICHMENT_ENABLED is set.
+
+    Returns:
+        Number of blank fields filled
+    """
+    if not URL_ENRICHMENT_ENABLED:
+        return 0
+    filled = sum(enrich_document(document, collection) for document in documents)
+    if filled:
+        logger.info(f"Filled {filled} blank field(s) from URLs in {collection}")
+    return filled
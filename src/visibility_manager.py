@@ -0,0 +1,179 @@
+"""
+SQS visibility-timeout management for the commit Lambda functions.
+
+Messages are received with a short visibility window, and a background
+heartbeat extends it (change_message_visibility_batch) while the batch is
+still being processed. A crashed run therefore frees its messages within one
+short window instead of the queue-level 5 minutes, and a long drain never
+lets in-flight messages become visible to another worker.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List
+
+logger = logging.getLogger()
+
+# Visibility configuration
+BATCH_VISIBILITY_TIMEOUT = int(os.environ.get("BATCH_VISIBILITY_TIMEOUT", "60"))
+VISIBILITY_HEARTBEAT_INTERVAL = int(os.environ.get("VISIBILITY_HEARTBEAT_INTERVAL", "20"))
+
+# SQS limit for batch actions
+SQS_MAX_BATCH_SIZE = 10
+
+
+def log_visibility_error(message: str, error: Exception) -> None:
+    """
+    Log a failed visibility change.
+
+    A missing sqs:ChangeMessageVisibility grant is logged as an error: without
+    it no window is ever extended and in-flight messages reappear mid-batch.
+    """
+    code = getattr(error, "response", {}).get("Error", {}).get("Code", "")
+    if "AccessDenied" in code:
+        logger.error(f"{message}: {str(error)} (does the role allow sqs:ChangeMessageVisibility?)")
+    else:
+        logger.warning(f"{message}: {str(error)}")
+
+
+class VisibilityManager:
+    """
+    Tracks in-flight receipt handles and keeps them invisible until they are
+    completed (deleted), released, or forgotten.
+
+    Usage:
+        with VisibilityManager(sqs, queue_url) as visibility:
+            visibility.track(messages)
+            ...
+            visibility.complete(receipt_handles)
+    """
+
+    def __init__(
+        self,
+        sqs: Any,
+        queue_url: str,
+        visibility_timeout: int = BATCH_VISIBILITY_TIMEOUT,
+        heartbeat_interval: int = VISIBILITY_HEARTBEAT_INTERVAL,
+    ):
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        self.heartbeat_interval = max(1, min(heartbeat_interval, visibility_timeout // 2 or 1))
+
+        self._in_flight: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def start(self) -> None:
+        """Start the background heartbeat."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background heartbeat. Untracked messages keep their current window."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def track(self, messages: Iterable[Dict[str, Any]]) -> None:
+        """Start extending visibility for received messages."""
+        with self._lock:
+            for message in messages:
+                self._in_flight[message["ReceiptHandle"]] = message.get("MessageId", "")
+
+    def forget(self, receipt_handles: Iterable[str]) -> None:
+        """Stop extending visibility; the messages reappear when their window expires."""
+        with self._lock:
+            for receipt_handle in receipt_handles:
+                self._in_flight.pop(receipt_handle, None)
+
+    def release(self, receipt_handle: str, delay_seconds: int = 0) -> None:
+        """
+        Make a single message visible again after `delay_seconds` (immediately by default).
+
+        Used for poison records so they reach the redrive policy without
+        waiting out the rest of the batch.
+        """
+        self.forget([receipt_handle])
+        try:
+            self.sqs.change_message_visibility(
+                QueueUrl=self.queue_url,
+                ReceiptHandle=receipt_handle,
+                VisibilityTimeout=delay_seconds,
+            )
+        except Exception as e:
+            log_visibility_error("Failed to release message", e)
+
+    def release_many(self, receipt_handles: List[str], delay_seconds: int = 0) -> None:
+        """Make several messages visible again after `delay_seconds`, in batches."""
+        self.forget(receipt_handles)
+        self._change_visibility(receipt_handles, delay_seconds)
+
+    def complete(self, receipt_handles: List[str]) -> int:
+        """
+        Delete processed messages in batches and stop tracking them.
+
+        Returns:
+            Number of messages successfully deleted
+        """
+        self.forget(receipt_handles)
+        deleted = 0
+        for offset in range(0, len(receipt_handles), SQS_MAX_BATCH_SIZE):
+            chunk = receipt_handles[offset : offset + SQS_MAX_BATCH_SIZE]
+            try:
+                response = self.sqs.delete_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {"Id": str(i), "ReceiptHandle": receipt_handle}
+                        for i, receipt_handle in enumerate(chunk)
+                    ],
+                )
+                deleted += len(response.get("Successful", []))
+                for failure in response.get("Failed", []):
+                    logger.error(f"Failed to delete message: {failure}")
+            except Exception as e:
+                logger.error(f"Failed to delete message batch: {str(e)}")
+        return deleted
+
+    def extend(self) -> None:
+        """Extend the visibility window of every tracked message."""
+        with self._lock:
+            receipt_handles = list(self._in_flight)
+        self._change_visibility(receipt_handles, self.visibility_timeout)
+
+    def _change_visibility(self, receipt_handles: List[str], timeout: int) -> None:
+        for offset in range(0, len(receipt_handles), SQS_MAX_BATCH_SIZE):
+            chunk = receipt_handles[offset : offset + SQS_MAX_BATCH_SIZE]
+            try:
+                response = self.sqs.change_message_visibility_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {
+                            "Id": str(i),
+                            "ReceiptHandle": receipt_handle,
+                            "VisibilityTimeout": timeout,
+                        }
+                        for i, receipt_handle in enumerate(chunk)
+                    ],
+                )
+                for failure in response.get("Failed", []):
+                    logger.warning(f"Failed to change visibility: {failure}")
+            except Exception as e:
+                log_visibility_error("Visibility change failed", e)
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            self.extend()
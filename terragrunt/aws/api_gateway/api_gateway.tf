@@ -51,6 +51,20 @@ resource "aws_api_gateway_resource" "toptask_survey_form" {
   path_part   = "form"
 }
 
+# /feedback resource (read API)
+resource "aws_api_gateway_resource" "feedback" {
+  rest_api_id = aws_api_gateway_rest_api.feedback_api.id
+  parent_id   = aws_api_gateway_rest_api.feedback_api.root_resource_id
+  path_part   = "feedback"
+}
+
+# /feedback/{source} resource
+resource "aws_api_gateway_resource" "feedback_source" {
+  rest_api_id = aws_api_gateway_rest_api.feedback_api.id
+  parent_id   = aws_api_gateway_resource.feedback.id
+  path_part   = "{source}"
+}
+
 # POST /problem/form method
 resource "aws_api_gateway_method" "problem_form_post" {
   rest_api_id   = aws_api_gateway_rest_api.feedback_api.id
@@ -67,6 +81,19 @@ resource "aws_api_gateway_method" "toptask_survey_form_post" {
   authorization = "NONE" # Can be changed to AWS_IAM or API_KEY for security
 }
 
+# GET /feedback/{source} method
+# Feedback contains free-text comments: callers must sign requests (IAM)
+resource "aws_api_gateway_method" "feedback_source_get" {
+  rest_api_id   = aws_api_gateway_rest_api.feedback_api.id
+  resource_id   = aws_api_gateway_resource.feedback_source.id
+  http_method   = "GET"
+  authorization = "AWS_IAM"
+
+  request_parameters = {
+    "method.request.path.source" = true
+  }
+}
+
 # Lambda integrations
 resource "aws_api_gateway_integration" "problem_form_lambda" {
   rest_api_id             = aws_api_gateway_rest_api.feedback_api.id
@@ -74,7 +101,7 @@ resource "aws_api_gateway_integration" "problem_form_lambda" {
   http_method             = aws_api_gateway_method.problem_form_post.http_method
   integration_http_method = "POST"
   type                    = "AWS_PROXY"
-  uri                     = var.queue_problem_form_lambda_invoke_arn
+  uri                     = var.ingest_router_lambda_invoke_arn
 }
 
 resource "aws_api_gateway_integration" "toptask_survey_form_lambda" {
@@ -83,7 +110,16 @@ resource "aws_api_gateway_integration" "toptask_survey_form_lambda" {
   http_method             = aws_api_gateway_method.toptask_survey_form_post.http_method
   integration_http_method = "POST"
   type                    = "AWS_PROXY"
-  uri                     = var.queue_toptask_survey_form_lambda_invoke_arn
+  uri                     = var.ingest_router_lambda_invoke_arn
+}
+
+resource "aws_api_gateway_integration" "feedback_source_lambda" {
+  rest_api_id             = aws_api_gateway_rest_api.feedback_api.id
+  resource_id             = aws_api_gateway_resource.feedback_source.id
+  http_method             = aws_api_gateway_method.feedback_source_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.feedback_api_lambda_invoke_arn
 }
 
 # CORS configuration for web forms
@@ -186,6 +222,7 @@ resource "aws_api_gateway_deployment" "feedback_api" {
     aws_api_gateway_integration.problem_form_options,
     aws_api_gateway_integration.toptask_survey_form_options,
     aws_api_gateway_integration.security_txt_get,
+    aws_api_gateway_integration.feedback_source_lambda,
   ]
 
   lifecycle {
@@ -200,9 +237,14 @@ resource "aws_api_gateway_deployment" "feedback_api" {
       aws_api_gateway_resource.toptask_survey_form.id,
       aws_api_gateway_method.toptask_survey_form_post.id,
       aws_api_gateway_integration.toptask_survey_form_lambda.id,
+      aws_api_gateway_integration.problem_form_lambda.uri,
+      aws_api_gateway_integration.toptask_survey_form_lambda.uri,
       aws_api_gateway_resource.security_txt.id,
       aws_api_gateway_method.security_txt_get.id,
       aws_api_gateway_integration.security_txt_get.id,
+      aws_api_gateway_resource.feedback_source.id,
+      aws_api_gateway_method.feedback_source_get.id,
+      aws_api_gateway_integration.feedback_source_lambda.id,
     ]))
   }
 }
@@ -350,18 +392,19 @@ resource "aws_api_gateway_integration_response" "security_txt_get" {
 }
 
 # Lambda permissions for API Gateway
-resource "aws_lambda_permission" "problem_form_api_gateway" {
+# Both form routes are served by ingest_router
+resource "aws_lambda_permission" "ingest_router_api_gateway" {
   statement_id  = "AllowExecutionFromAPIGateway"
   action        = "lambda:InvokeFunction"
-  function_name = var.queue_problem_form_lambda_name
+  function_name = var.ingest_router_lambda_name
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_api_gateway_rest_api.feedback_api.execution_arn}/*/*"
 }
 
-resource "aws_lambda_permission" "toptask_survey_form_api_gateway" {
+resource "aws_lambda_permission" "feedback_api_api_gateway" {
   statement_id  = "AllowExecutionFromAPIGateway"
   action        = "lambda:InvokeFunction"
-  function_name = var.queue_toptask_survey_form_lambda_name
+  function_name = var.feedback_api_lambda_name
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_api_gateway_rest_api.feedback_api.execution_arn}/*/*"
 }
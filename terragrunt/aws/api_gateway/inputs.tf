@@ -1,19 +1,19 @@
-variable "queue_problem_form_lambda_invoke_arn" {
-  description = "Invoke ARN of the queue_problem_form Lambda function"
+variable "ingest_router_lambda_invoke_arn" {
+  description = "Invoke ARN of the ingest_router Lambda function (serves both form routes)"
   type        = string
 }
 
-variable "queue_problem_form_lambda_name" {
-  description = "Name of the queue_problem_form Lambda function"
+variable "ingest_router_lambda_name" {
+  description = "Name of the ingest_router Lambda function"
   type        = string
 }
 
-variable "queue_toptask_survey_form_lambda_invoke_arn" {
-  description = "Invoke ARN of the queue_toptask_survey_form Lambda function"
+variable "feedback_api_lambda_invoke_arn" {
+  description = "Invoke ARN of the feedback_api Lambda function"
   type        = string
 }
 
-variable "queue_toptask_survey_form_lambda_name" {
-  description = "Name of the queue_toptask_survey_form Lambda function"
+variable "feedback_api_lambda_name" {
+  description = "Name of the feedback_api Lambda function"
   type        = string
 }
@@ -22,6 +22,7 @@ data "aws_iam_policy_document" "lambda_sqs_receive_policy" {
     actions = [
       "sqs:ReceiveMessage",
       "sqs:DeleteMessage",
+      "sqs:ChangeMessageVisibility",
       "sqs:GetQueueAttributes"
     ]
     resources = [
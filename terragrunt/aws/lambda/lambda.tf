@@ -32,6 +32,13 @@ data "archive_file" "queue_toptask_survey_form" {
   excludes    = ["__pycache__", "*.pyc", ".pytest_cache", "tests"]
 }
 
+data "archive_file" "ingest_router" {
+  type        = "zip"
+  source_dir  = var.lambda_source_code_path
+  output_path = "${path.module}/.terraform/lambda-ingest-router.zip"
+  excludes    = ["__pycache__", "*.pyc", ".pytest_cache", "tests"]
+}
+
 # Build problem_commit Lambda with dependencies
 resource "null_resource" "problem_commit_build" {
   triggers = {
@@ -156,7 +163,7 @@ resource "aws_security_group" "lambda_sg" {
   }
 }
 
-# 1. queue_problem Lambda (SNS → SQS)
+# 1. queue_problem Lambda (SNS → SQS; subscribed via ingest_router)
 resource "aws_lambda_function" "queue_problem" {
   function_name    = "${var.product_name}-queue-problem"
   filename         = data.archive_file.queue_problem.output_path
@@ -220,21 +227,7 @@ resource "aws_cloudwatch_log_group" "queue_problem" {
   }
 }
 
-resource "aws_lambda_permission" "queue_problem_sns" {
-  statement_id  = "AllowExecutionFromSNS"
-  action        = "lambda:InvokeFunction"
-  function_name = aws_lambda_function.queue_problem.function_name
-  principal     = "sns.amazonaws.com"
-  source_arn    = var.problem_topic_arn
-}
-
-resource "aws_sns_topic_subscription" "problem_to_lambda" {
-  topic_arn = var.problem_topic_arn
-  protocol  = "lambda"
-  endpoint  = aws_lambda_function.queue_problem.arn
-}
-
-# 2. queue_problem_form Lambda (API Gateway → SQS)
+# 2. queue_problem_form Lambda (API Gateway → SQS; routed via ingest_router)
 resource "aws_lambda_function" "queue_problem_form" {
   function_name    = "${var.product_name}-queue-problem-form"
   filename         = data.archive_file.queue_problem_form.output_path
@@ -298,7 +291,7 @@ resource "aws_cloudwatch_log_group" "queue_problem_form" {
   }
 }
 
-# 3. queue_toptask Lambda (SNS → SQS)
+# 3. queue_toptask Lambda (SNS → SQS; subscribed via ingest_router)
 resource "aws_lambda_function" "queue_toptask" {
   function_name    = "${var.product_name}-queue-toptask"
   filename         = data.archive_file.queue_toptask.output_path
@@ -362,21 +355,7 @@ resource "aws_cloudwatch_log_group" "queue_toptask" {
   }
 }
 
-resource "aws_lambda_permission" "queue_toptask_sns" {
-  statement_id  = "AllowExecutionFromSNS"
-  action        = "lambda:InvokeFunction"
-  function_name = aws_lambda_function.queue_toptask.function_name
-  principal     = "sns.amazonaws.com"
-  source_arn    = var.toptask_topic_arn
-}
-
-resource "aws_sns_topic_subscription" "toptask_to_lambda" {
-  topic_arn = var.toptask_topic_arn
-  protocol  = "lambda"
-  endpoint  = aws_lambda_function.queue_toptask.arn
-}
-
-# 4. queue_toptask_survey_form Lambda (API Gateway → SQS)
+# 4. queue_toptask_survey_form Lambda (API Gateway → SQS; routed via ingest_router)
 resource "aws_lambda_function" "queue_toptask_survey_form" {
   function_name    = "${var.product_name}-queue-toptask-survey-form"
   filename         = data.archive_file.queue_toptask_survey_form.output_path
@@ -440,7 +419,13 @@ resource "aws_cloudwatch_log_group" "queue_toptask_survey_form" {
   }
 }
 
-# 5. problem_commit Lambda (EventBridge → SQS → DocumentDB)
+# Cap on concurrent commit workers per function: passed to the code as
+# MAX_COMMIT_CONCURRENCY and enforced by Lambda as reserved concurrency
+locals {
+  max_commit_concurrency = 4
+}
+
+# 5. problem_commit Lambda (manual / self-chained → SQS → DocumentDB; scheduled via commit_worker)
 resource "aws_lambda_function" "problem_commit" {
   function_name    = "${var.product_name}-problem-commit"
   filename         = "${path.module}/.terraform/lambda-problem-commit.zip"
@@ -451,15 +436,19 @@ resource "aws_lambda_function" "problem_commit" {
   memory_size      = 512
   role             = aws_iam_role.problem_commit_lambda.arn
 
+  reserved_concurrent_executions = local.max_commit_concurrency
+
   environment {
     variables = {
-      PROBLEM_QUEUE_URL    = var.problem_queue_url
-      MONGO_URL            = var.dto_feedback_cj_docdb_endpoint
-      MONGO_PORT           = "27017"
-      MONGO_DB             = "pagesuccess"
-      MONGO_USERNAME_PARAM = var.dto_feedback_cj_docdb_username_arn
-      MONGO_PASSWORD_PARAM = var.dto_feedback_cj_docdb_password_arn
-      ENVIRONMENT          = var.env
+      PROBLEM_QUEUE_URL      = var.problem_queue_url
+      MONGO_URL              = var.dto_feedback_cj_docdb_endpoint
+      MONGO_PORT             = "27017"
+      MONGO_DB               = "pagesuccess"
+      MONGO_USERNAME_PARAM   = var.dto_feedback_cj_docdb_username_arn
+      MONGO_PASSWORD_PARAM   = var.dto_feedback_cj_docdb_password_arn
+      ENVIRONMENT            = var.env
+      SELF_CHAIN_THRESHOLD   = "200"
+      MAX_COMMIT_CONCURRENCY = tostring(local.max_commit_concurrency)
     }
   }
 
@@ -510,6 +499,21 @@ resource "aws_iam_role_policy_attachment" "problem_commit_ssm" {
   policy_arn = var.lambda_ssm_policy_arn
 }
 
+# Allow problem_commit to re-invoke itself when the queue backlog is large
+resource "aws_iam_role_policy" "problem_commit_self_invoke" {
+  name = "${var.product_name}-problem-commit-self-invoke"
+  role = aws_iam_role.problem_commit_lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Action   = "lambda:InvokeFunction"
+      Effect   = "Allow"
+      Resource = aws_lambda_function.problem_commit.arn
+    }]
+  })
+}
+
 # Attach VPC execution policy for problem_commit Lambda
 resource "aws_iam_role_policy_attachment" "problem_commit_vpc" {
   role       = aws_iam_role.problem_commit_lambda.name
@@ -527,33 +531,7 @@ resource "aws_cloudwatch_log_group" "problem_commit" {
   }
 }
 
-# EventBridge rule to trigger problem_commit Lambda every 2 minutes
-resource "aws_cloudwatch_event_rule" "problem_commit_schedule" {
-  name                = "${var.product_name}-problem-commit-schedule"
-  description         = "Trigger problem_commit Lambda every 2 minutes"
-  schedule_expression = "rate(2 minutes)"
-
-  tags = {
-    CostCentre = var.billing_code
-    Terraform  = true
-  }
-}
-
-resource "aws_cloudwatch_event_target" "problem_commit_schedule" {
-  rule      = aws_cloudwatch_event_rule.problem_commit_schedule.name
-  target_id = "problem-commit-lambda"
-  arn       = aws_lambda_function.problem_commit.arn
-}
-
-resource "aws_lambda_permission" "problem_commit_eventbridge" {
-  statement_id  = "AllowExecutionFromEventBridge"
-  action        = "lambda:InvokeFunction"
-  function_name = aws_lambda_function.problem_commit.function_name
-  principal     = "events.amazonaws.com"
-  source_arn    = aws_cloudwatch_event_rule.problem_commit_schedule.arn
-}
-
-# 6. top_task_survey_commit Lambda (EventBridge → SQS → DocumentDB)
+# 6. top_task_survey_commit Lambda (manual / self-chained → SQS → DocumentDB; scheduled via commit_worker)
 resource "aws_lambda_function" "toptask_survey_commit" {
   function_name    = "${var.product_name}-toptask-survey-commit"
   filename         = "${path.module}/.terraform/lambda-toptask-survey-commit.zip"
@@ -564,15 +542,19 @@ resource "aws_lambda_function" "toptask_survey_commit" {
   memory_size      = 512
   role             = aws_iam_role.toptask_survey_commit_lambda.arn
 
+  reserved_concurrent_executions = local.max_commit_concurrency
+
   environment {
     variables = {
-      TOPTASK_QUEUE_URL    = var.toptask_queue_url
-      MONGO_URL            = var.dto_feedback_cj_docdb_endpoint
-      MONGO_PORT           = "27017"
-      MONGO_DB             = "pagesuccess"
-      MONGO_USERNAME_PARAM = var.dto_feedback_cj_docdb_username_arn
-      MONGO_PASSWORD_PARAM = var.dto_feedback_cj_docdb_password_arn
-      ENVIRONMENT          = var.env
+      TOPTASK_QUEUE_URL      = var.toptask_queue_url
+      MONGO_URL              = var.dto_feedback_cj_docdb_endpoint
+      MONGO_PORT             = "27017"
+      MONGO_DB               = "pagesuccess"
+      MONGO_USERNAME_PARAM   = var.dto_feedback_cj_docdb_username_arn
+      MONGO_PASSWORD_PARAM   = var.dto_feedback_cj_docdb_password_arn
+      ENVIRONMENT            = var.env
+      SELF_CHAIN_THRESHOLD   = "200"
+      MAX_COMMIT_CONCURRENCY = tostring(local.max_commit_concurrency)
     }
   }
 
@@ -623,6 +605,21 @@ resource "aws_iam_role_policy_attachment" "toptask_survey_commit_ssm" {
   policy_arn = var.lambda_ssm_policy_arn
 }
 
+# Allow toptask_survey_commit to re-invoke itself when the queue backlog is large
+resource "aws_iam_role_policy" "toptask_survey_commit_self_invoke" {
+  name = "${var.product_name}-toptask-survey-commit-self-invoke"
+  role = aws_iam_role.toptask_survey_commit_lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Action   = "lambda:InvokeFunction"
+      Effect   = "Allow"
+      Resource = aws_lambda_function.toptask_survey_commit.arn
+    }]
+  })
+}
+
 # Attach VPC execution policy for toptask_survey_commit Lambda
 resource "aws_iam_role_policy_attachment" "toptask_survey_commit_vpc" {
   role       = aws_iam_role.toptask_survey_commit_lambda.name
@@ -640,10 +637,375 @@ resource "aws_cloudwatch_log_group" "toptask_survey_commit" {
   }
 }
 
-# EventBridge rule to trigger toptask_survey_commit Lambda every 2 minutes
-resource "aws_cloudwatch_event_rule" "toptask_survey_commit_schedule" {
-  name                = "${var.product_name}-toptask-survey-commit-schedule"
-  description         = "Trigger toptask_survey_commit Lambda every 2 minutes"
+# 7. feedback_api Lambda (API Gateway GET → DocumentDB, read-only)
+# Shares the problem_commit package: same source tree and dependencies
+resource "aws_lambda_function" "feedback_api" {
+  function_name    = "${var.product_name}-feedback-api"
+  filename         = "${path.module}/.terraform/lambda-problem-commit.zip"
+  source_code_hash = null_resource.problem_commit_build.triggers.source_hash
+  handler          = "feedback_api.lambda_handler"
+  runtime          = "python3.11"
+  timeout          = 30
+  memory_size      = 512
+  role             = aws_iam_role.feedback_api_lambda.arn
+
+  environment {
+    variables = {
+      MONGO_URL                       = var.dto_feedback_cj_docdb_endpoint
+      MONGO_PORT                      = "27017"
+      MONGO_DB                        = "pagesuccess"
+      MONGO_USERNAME_PARAM            = var.dto_feedback_cj_docdb_username_arn
+      MONGO_PASSWORD_PARAM            = var.dto_feedback_cj_docdb_password_arn
+      ENVIRONMENT                     = var.env
+      FEEDBACK_API_MAX_PAGE_SIZE      = "500"
+      FEEDBACK_API_MAX_RESPONSE_BYTES = "1000000"
+    }
+  }
+
+  vpc_config {
+    subnet_ids         = var.dto_feedback_cj_vpc_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_sg.id]
+  }
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+
+  depends_on = [null_resource.problem_commit_build]
+}
+
+# IAM role for feedback_api Lambda
+resource "aws_iam_role" "feedback_api_lambda" {
+  name = "${var.product_name}-feedback-api-lambda-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+      }
+    ]
+  })
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+resource "aws_iam_role_policy_attachment" "feedback_api_ssm" {
+  role       = aws_iam_role.feedback_api_lambda.name
+  policy_arn = var.lambda_ssm_policy_arn
+}
+
+resource "aws_iam_role_policy_attachment" "feedback_api_vpc" {
+  role       = aws_iam_role.feedback_api_lambda.name
+  policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaVPCAccessExecutionRole"
+}
+
+# CloudWatch Log Group for feedback_api Lambda
+resource "aws_cloudwatch_log_group" "feedback_api" {
+  name              = "/aws/lambda/${var.product_name}-feedback-api"
+  retention_in_days = 30
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+# 8. archive Lambda (EventBridge → DocumentDB originalproblem → S3)
+# Moves old originalproblem documents to compressed blobs; shares the problem_commit package
+resource "aws_s3_bucket" "originalproblem_archive" {
+  bucket = "${var.product_name}-${var.env}-originalproblem-archive"
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+resource "aws_s3_bucket_public_access_block" "originalproblem_archive" {
+  bucket                  = aws_s3_bucket.originalproblem_archive.id
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
+
+resource "aws_s3_bucket_server_side_encryption_configuration" "originalproblem_archive" {
+  bucket = aws_s3_bucket.originalproblem_archive.id
+
+  rule {
+    apply_server_side_encryption_by_default {
+      sse_algorithm = "AES256"
+    }
+  }
+}
+
+# Archived blobs are rarely read; Glacier Instant Retrieval keeps restores immediate
+resource "aws_s3_bucket_lifecycle_configuration" "originalproblem_archive" {
+  bucket = aws_s3_bucket.originalproblem_archive.id
+
+  rule {
+    id     = "cold-tier"
+    status = "Enabled"
+
+    filter {
+      prefix = "originalproblem/"
+    }
+
+    transition {
+      days          = 30
+      storage_class = "GLACIER_IR"
+    }
+  }
+}
+
+resource "aws_lambda_function" "archive" {
+  function_name    = "${var.product_name}-archive"
+  filename         = "${path.module}/.terraform/lambda-problem-commit.zip"
+  source_code_hash = null_resource.problem_commit_build.triggers.source_hash
+  handler          = "archive.lambda_handler"
+  runtime          = "python3.11"
+  timeout          = 900
+  memory_size      = 1024
+  role             = aws_iam_role.archive_lambda.arn
+
+  environment {
+    variables = {
+      MONGO_URL            = var.dto_feedback_cj_docdb_endpoint
+      MONGO_PORT           = "27017"
+      MONGO_DB             = "pagesuccess"
+      MONGO_USERNAME_PARAM = var.dto_feedback_cj_docdb_username_arn
+      MONGO_PASSWORD_PARAM = var.dto_feedback_cj_docdb_password_arn
+      ENVIRONMENT          = var.env
+      ARCHIVE_LOCATION     = "s3://${aws_s3_bucket.originalproblem_archive.bucket}"
+      ARCHIVE_AFTER_DAYS   = "90"
+    }
+  }
+
+  # Needs an S3 gateway endpoint (or NAT) in the private subnets
+  vpc_config {
+    subnet_ids         = var.dto_feedback_cj_vpc_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_sg.id]
+  }
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+
+  depends_on = [null_resource.problem_commit_build]
+}
+
+# IAM role for archive Lambda
+resource "aws_iam_role" "archive_lambda" {
+  name = "${var.product_name}-archive-lambda-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+      }
+    ]
+  })
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+resource "aws_iam_role_policy_attachment" "archive_ssm" {
+  role       = aws_iam_role.archive_lambda.name
+  policy_arn = var.lambda_ssm_policy_arn
+}
+
+resource "aws_iam_role_policy_attachment" "archive_vpc" {
+  role       = aws_iam_role.archive_lambda.name
+  policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaVPCAccessExecutionRole"
+}
+
+resource "aws_iam_role_policy" "archive_s3" {
+  name = "${var.product_name}-archive-s3"
+  role = aws_iam_role.archive_lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action   = ["s3:PutObject", "s3:GetObject"]
+        Effect   = "Allow"
+        Resource = "${aws_s3_bucket.originalproblem_archive.arn}/*"
+      },
+      {
+        Action   = "s3:ListBucket"
+        Effect   = "Allow"
+        Resource = aws_s3_bucket.originalproblem_archive.arn
+      }
+    ]
+  })
+}
+
+# CloudWatch Log Group for archive Lambda
+resource "aws_cloudwatch_log_group" "archive" {
+  name              = "/aws/lambda/${var.product_name}-archive"
+  retention_in_days = 30
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+# EventBridge rule to run the archive job daily, off-peak
+resource "aws_cloudwatch_event_rule" "archive_schedule" {
+  name                = "${var.product_name}-archive-schedule"
+  description         = "Trigger archive Lambda daily"
+  schedule_expression = "cron(0 7 * * ? *)"
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+resource "aws_cloudwatch_event_target" "archive_schedule" {
+  rule      = aws_cloudwatch_event_rule.archive_schedule.name
+  target_id = "archive-lambda"
+  arn       = aws_lambda_function.archive.arn
+}
+
+resource "aws_lambda_permission" "archive_eventbridge" {
+  statement_id  = "AllowExecutionFromEventBridge"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.archive.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.archive_schedule.arn
+}
+
+# 9. commit_worker Lambda (EventBridge → both SQS queues → DocumentDB)
+# Drains the problem and TopTask queues in one invocation; it carries the commit
+# schedule, while problem_commit / toptask_survey_commit remain for single-queue runs
+resource "aws_lambda_function" "commit_worker" {
+  function_name    = "${var.product_name}-commit-worker"
+  filename         = "${path.module}/.terraform/lambda-problem-commit.zip"
+  source_code_hash = null_resource.problem_commit_build.triggers.source_hash
+  handler          = "commit_worker.lambda_handler"
+  runtime          = "python3.11"
+  timeout          = 300 # 5 minutes for batch processing
+  memory_size      = 512
+  role             = aws_iam_role.commit_worker_lambda.arn
+
+  reserved_concurrent_executions = local.max_commit_concurrency
+
+  environment {
+    variables = {
+      PROBLEM_QUEUE_URL      = var.problem_queue_url
+      TOPTASK_QUEUE_URL      = var.toptask_queue_url
+      MONGO_URL              = var.dto_feedback_cj_docdb_endpoint
+      MONGO_PORT             = "27017"
+      MONGO_DB               = "pagesuccess"
+      MONGO_USERNAME_PARAM   = var.dto_feedback_cj_docdb_username_arn
+      MONGO_PASSWORD_PARAM   = var.dto_feedback_cj_docdb_password_arn
+      ENVIRONMENT            = var.env
+      SELF_CHAIN_THRESHOLD   = "200"
+      MAX_COMMIT_CONCURRENCY = tostring(local.max_commit_concurrency)
+    }
+  }
+
+  vpc_config {
+    subnet_ids         = var.dto_feedback_cj_vpc_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_sg.id]
+  }
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+
+  depends_on = [null_resource.problem_commit_build]
+}
+
+# IAM role for commit_worker Lambda
+resource "aws_iam_role" "commit_worker_lambda" {
+  name = "${var.product_name}-commit-worker-lambda-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+      }
+    ]
+  })
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+resource "aws_iam_role_policy_attachment" "commit_worker_sqs" {
+  role       = aws_iam_role.commit_worker_lambda.name
+  policy_arn = var.lambda_sqs_receive_policy_arn
+}
+
+resource "aws_iam_role_policy_attachment" "commit_worker_ssm" {
+  role       = aws_iam_role.commit_worker_lambda.name
+  policy_arn = var.lambda_ssm_policy_arn
+}
+
+# Allow commit_worker to re-invoke itself when the combined backlog is large
+resource "aws_iam_role_policy" "commit_worker_self_invoke" {
+  name = "${var.product_name}-commit-worker-self-invoke"
+  role = aws_iam_role.commit_worker_lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Action   = "lambda:InvokeFunction"
+      Effect   = "Allow"
+      Resource = aws_lambda_function.commit_worker.arn
+    }]
+  })
+}
+
+resource "aws_iam_role_policy_attachment" "commit_worker_vpc" {
+  role       = aws_iam_role.commit_worker_lambda.name
+  policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaVPCAccessExecutionRole"
+}
+
+# CloudWatch Log Group for commit_worker Lambda
+resource "aws_cloudwatch_log_group" "commit_worker" {
+  name              = "/aws/lambda/${var.product_name}-commit-worker"
+  retention_in_days = 30
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+# EventBridge rule to trigger commit_worker Lambda every 2 minutes
+resource "aws_cloudwatch_event_rule" "commit_worker_schedule" {
+  name                = "${var.product_name}-commit-worker-schedule"
+  description         = "Trigger commit_worker Lambda every 2 minutes"
   schedule_expression = "rate(2 minutes)"
 
   tags = {
@@ -652,18 +1014,206 @@ resource "aws_cloudwatch_event_rule" "toptask_survey_commit_schedule" {
   }
 }
 
-resource "aws_cloudwatch_event_target" "toptask_survey_commit_schedule" {
-  rule      = aws_cloudwatch_event_rule.toptask_survey_commit_schedule.name
-  target_id = "toptask-survey-commit-lambda"
-  arn       = aws_lambda_function.toptask_survey_commit.arn
+resource "aws_cloudwatch_event_target" "commit_worker_schedule" {
+  rule      = aws_cloudwatch_event_rule.commit_worker_schedule.name
+  target_id = "commit-worker-lambda"
+  arn       = aws_lambda_function.commit_worker.arn
 }
 
-resource "aws_lambda_permission" "toptask_survey_commit_eventbridge" {
+resource "aws_lambda_permission" "commit_worker_eventbridge" {
   statement_id  = "AllowExecutionFromEventBridge"
   action        = "lambda:InvokeFunction"
-  function_name = aws_lambda_function.toptask_survey_commit.function_name
+  function_name = aws_lambda_function.commit_worker.function_name
   principal     = "events.amazonaws.com"
-  source_arn    = aws_cloudwatch_event_rule.toptask_survey_commit_schedule.arn
+  source_arn    = aws_cloudwatch_event_rule.commit_worker_schedule.arn
+}
+
+# 10. ingest_router Lambda (SNS + API Gateway → SQS)
+# Serves both inbound email topics and both form routes from one warm pool;
+# the four functions above remain deployed for direct invocation and rollback
+resource "aws_lambda_function" "ingest_router" {
+  function_name    = "${var.product_name}-ingest-router"
+  filename         = data.archive_file.ingest_router.output_path
+  source_code_hash = data.archive_file.ingest_router.output_base64sha256
+  handler          = "ingest_router.lambda_handler"
+  runtime          = "python3.11"
+  timeout          = 30
+  memory_size      = 256
+  role             = aws_iam_role.ingest_router_lambda.arn
+
+  environment {
+    variables = {
+      PROBLEM_QUEUE_URL = var.problem_queue_url
+      TOPTASK_QUEUE_URL = var.toptask_queue_url
+      PROBLEM_TOPIC_ARN = var.problem_topic_arn
+      TOPTASK_TOPIC_ARN = var.toptask_topic_arn
+      ENVIRONMENT       = var.env
+    }
+  }
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+resource "aws_iam_role" "ingest_router_lambda" {
+  name = "${var.product_name}-ingest-router-lambda-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Action = "sts:AssumeRole"
+      Effect = "Allow"
+      Principal = {
+        Service = "lambda.amazonaws.com"
+      }
+    }]
+  })
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+resource "aws_iam_role_policy_attachment" "ingest_router_sqs" {
+  role       = aws_iam_role.ingest_router_lambda.name
+  policy_arn = var.lambda_sqs_policy_arn
+}
+
+resource "aws_iam_role_policy_attachment" "ingest_router_logs" {
+  role       = aws_iam_role.ingest_router_lambda.name
+  policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
+}
+
+resource "aws_cloudwatch_log_group" "ingest_router" {
+  name              = "/aws/lambda/${var.product_name}-ingest-router"
+  retention_in_days = 30
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+resource "aws_lambda_permission" "ingest_router_problem_sns" {
+  statement_id  = "AllowExecutionFromProblemSNS"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.ingest_router.function_name
+  principal     = "sns.amazonaws.com"
+  source_arn    = var.problem_topic_arn
+}
+
+resource "aws_sns_topic_subscription" "problem_to_lambda" {
+  topic_arn = var.problem_topic_arn
+  protocol  = "lambda"
+  endpoint  = aws_lambda_function.ingest_router.arn
+}
+
+resource "aws_lambda_permission" "ingest_router_toptask_sns" {
+  statement_id  = "AllowExecutionFromTopTaskSNS"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.ingest_router.function_name
+  principal     = "sns.amazonaws.com"
+  source_arn    = var.toptask_topic_arn
+}
+
+resource "aws_sns_topic_subscription" "toptask_to_lambda" {
+  topic_arn = var.toptask_topic_arn
+  protocol  = "lambda"
+  endpoint  = aws_lambda_function.ingest_router.arn
+}
+
+# 11. indexes Lambda (deploy step → DocumentDB indexes)
+# Creates missing indexes after every code change, so index builds never run
+# inside a commit invocation; shares the problem_commit package
+resource "aws_lambda_function" "indexes" {
+  function_name    = "${var.product_name}-indexes"
+  filename         = "${path.module}/.terraform/lambda-problem-commit.zip"
+  source_code_hash = null_resource.problem_commit_build.triggers.source_hash
+  handler          = "indexes.lambda_handler"
+  runtime          = "python3.11"
+  timeout          = 900
+  memory_size      = 256
+  role             = aws_iam_role.indexes_lambda.arn
+
+  environment {
+    variables = {
+      MONGO_URL            = var.dto_feedback_cj_docdb_endpoint
+      MONGO_PORT           = "27017"
+      MONGO_DB             = "pagesuccess"
+      MONGO_USERNAME_PARAM = var.dto_feedback_cj_docdb_username_arn
+      MONGO_PASSWORD_PARAM = var.dto_feedback_cj_docdb_password_arn
+      ENVIRONMENT          = var.env
+    }
+  }
+
+  vpc_config {
+    subnet_ids         = var.dto_feedback_cj_vpc_private_subnet_ids
+    security_group_ids = [aws_security_group.lambda_sg.id]
+  }
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+
+  depends_on = [null_resource.problem_commit_build]
+}
+
+# IAM role for indexes Lambda
+resource "aws_iam_role" "indexes_lambda" {
+  name = "${var.product_name}-indexes-lambda-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+      }
+    ]
+  })
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+resource "aws_iam_role_policy_attachment" "indexes_ssm" {
+  role       = aws_iam_role.indexes_lambda.name
+  policy_arn = var.lambda_ssm_policy_arn
+}
+
+resource "aws_iam_role_policy_attachment" "indexes_vpc" {
+  role       = aws_iam_role.indexes_lambda.name
+  policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaVPCAccessExecutionRole"
+}
+
+# CloudWatch Log Group for indexes Lambda
+resource "aws_cloudwatch_log_group" "indexes" {
+  name              = "/aws/lambda/${var.product_name}-indexes"
+  retention_in_days = 30
+
+  tags = {
+    CostCentre = var.billing_code
+    Terraform  = true
+  }
+}
+
+# Build missing indexes on apply whenever the code (and so the declared indexes) changes
+resource "aws_lambda_invocation" "indexes" {
+  function_name = aws_lambda_function.indexes.function_name
+  input         = jsonencode({})
+
+  triggers = {
+    source_hash = null_resource.problem_commit_build.triggers.source_hash
+  }
 }
 
 # Note: Lambda permissions and CloudWatch Log Groups are managed above for scheduled functions
@@ -68,6 +68,16 @@ output "queue_toptask_survey_form_lambda_name" {
   value       = aws_lambda_function.queue_toptask_survey_form.function_name
 }
 
+output "lambda_ingest_router_invoke_arn" {
+  description = "Invoke ARN of the ingest_router Lambda function (for API Gateway)"
+  value       = aws_lambda_function.ingest_router.invoke_arn
+}
+
+output "ingest_router_lambda_name" {
+  description = "Name of the ingest_router Lambda function"
+  value       = aws_lambda_function.ingest_router.function_name
+}
+
 output "problem_commit_lambda_name" {
   description = "Name of the problem_commit Lambda function"
   value       = aws_lambda_function.problem_commit.function_name
@@ -78,6 +88,36 @@ output "top_task_survey_commit_lambda_name" {
   value       = aws_lambda_function.toptask_survey_commit.function_name
 }
 
+output "lambda_feedback_api_invoke_arn" {
+  description = "Invoke ARN of the feedback_api Lambda function (for API Gateway)"
+  value       = aws_lambda_function.feedback_api.invoke_arn
+}
+
+output "feedback_api_lambda_name" {
+  description = "Name of the feedback_api Lambda function"
+  value       = aws_lambda_function.feedback_api.function_name
+}
+
+output "commit_worker_lambda_name" {
+  description = "Name of the commit_worker Lambda function"
+  value       = aws_lambda_function.commit_worker.function_name
+}
+
+output "indexes_lambda_name" {
+  description = "Name of the indexes Lambda function"
+  value       = aws_lambda_function.indexes.function_name
+}
+
+output "archive_lambda_name" {
+  description = "Name of the archive Lambda function"
+  value       = aws_lambda_function.archive.function_name
+}
+
+output "originalproblem_archive_bucket" {
+  description = "S3 bucket holding archived originalproblem documents"
+  value       = aws_s3_bucket.originalproblem_archive.bucket
+}
+
 output "lambda_security_group_id" {
   description = "Security group ID for Lambda functions"
   value       = aws_security_group.lambda_sg.id
@@ -11,18 +11,18 @@ dependency "lambda" {
   mock_outputs_allowed_terraform_commands = ["init", "fmt", "validate", "plan", "show"]
   mock_outputs_merge_with_state           = true
   mock_outputs = {
-    lambda_queue_problem_form_invoke_arn        = "arn:aws:lambda:ca-central-1:123456789012:function:mock-queue-problem-form"
-    lambda_queue_toptask_survey_form_invoke_arn = "arn:aws:lambda:ca-central-1:123456789012:function:mock-queue-toptask-survey-form"
-    queue_problem_form_lambda_name              = "mock-queue-problem-form"
-    queue_toptask_survey_form_lambda_name       = "mock-queue-toptask-survey-form"
+    lambda_ingest_router_invoke_arn = "arn:aws:lambda:ca-central-1:123456789012:function:mock-ingest-router"
+    ingest_router_lambda_name       = "mock-ingest-router"
+    lambda_feedback_api_invoke_arn  = "arn:aws:lambda:ca-central-1:123456789012:function:mock-feedback-api"
+    feedback_api_lambda_name        = "mock-feedback-api"
   }
 }
 
 inputs = {
-  queue_problem_form_lambda_invoke_arn        = dependency.lambda.outputs.lambda_queue_problem_form_invoke_arn
-  queue_problem_form_lambda_name              = dependency.lambda.outputs.queue_problem_form_lambda_name
-  queue_toptask_survey_form_lambda_invoke_arn = dependency.lambda.outputs.lambda_queue_toptask_survey_form_invoke_arn
-  queue_toptask_survey_form_lambda_name       = dependency.lambda.outputs.queue_toptask_survey_form_lambda_name
+  ingest_router_lambda_invoke_arn = dependency.lambda.outputs.lambda_ingest_router_invoke_arn
+  ingest_router_lambda_name       = dependency.lambda.outputs.ingest_router_lambda_name
+  feedback_api_lambda_invoke_arn  = dependency.lambda.outputs.lambda_feedback_api_invoke_arn
+  feedback_api_lambda_name        = dependency.lambda.outputs.feedback_api_lambda_name
 }
 
 include {